@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+"""跑团冒险的规则数据与一局游戏的状态机，不依赖 tkinter。
+
+AdventureGame（界面）、adventure_sim（批量模拟）与 adventure_solver
+（最优策略求解）共用这里的商品价格、每日地点、特殊事件与收入区间，
+规则只在一处定义。
+
+价格有两种规则：固定价格（基础价格按幸运打折，商品不能卖出，solver 求解的
+就是这种规则）与动态市场（adventure_market：价格每天波动、受买卖影响，
+背包里的商品可以卖出）。
+"""
+from rng_streams import RngStreams
+from weighted_sampler import WeightedSampler
+
+ATTRIBUTE_NAMES = ('体质', '智力', '情商', '幸运')
+
+START_MONEY = 100  # 初始资金
+TARGET_MONEY = 2000  # 目标资金
+MAX_DAYS = 10  # 最大天数
+DAILY_INCOME = (10, 50)  # 每天的日常收入区间（含两端）
+LUCK_DISCOUNT = 0.1  # 每点幸运的降价比例
+
+# 商品价格（基础价格，会根据幸运值波动）
+ITEM_PRICES = {
+    '面包': 10,
+    '苹果': 15,
+    'CD': 25,
+    '器材': 50,
+    '宝石': 100,
+    '古董': 200,
+    '股票': 300,
+    '房产': 500
+}
+
+# 每日事件（可选 weight 字段，默认等概率）
+DAILY_EVENTS = [
+    {
+        'name': '自由市场',
+        'description': '你来到了自由市场，请选择你要购买的货物：',
+        'items': ['面包', '苹果', 'CD', '器材']
+    },
+    {
+        'name': '古董店',
+        'description': '你发现了一家古董店，店主正在出售一些珍品：',
+        'items': ['古董', '宝石', 'CD', '器材']
+    },
+    {
+        'name': '投资中心',
+        'description': '你来到了投资中心，可以投资一些金融产品：',
+        'items': ['股票', '房产', '宝石', '古董']
+    },
+    {
+        'name': '黑市',
+        'description': '你偶然发现了黑市，这里有一些特殊商品：',
+        'items': ['器材', '宝石', '古董', '股票']
+    }
+]
+
+# 特殊事件：按顺序判定，第一个触发的生效
+SPECIAL_EVENTS = [
+    {
+        'name': '幸运发现',
+        'description': '你在路上发现了一个钱包！',
+        'money_bonus': 50,
+        'condition': '幸运'
+    },
+    {
+        'name': '智慧投资',
+        'description': '你的智慧让你发现了一个投资机会！',
+        'money_bonus': 100,
+        'condition': '智力'
+    },
+    {
+        'name': '社交机会',
+        'description': '你通过社交获得了一个赚钱的机会！',
+        'money_bonus': 75,
+        'condition': '情商'
+    },
+    {
+        'name': '体力工作',
+        'description': '你通过体力劳动赚取了一些外快！',
+        'money_bonus': 30,
+        'condition': '体质'
+    }
+]
+
+
+def adjusted_price(base_price, attributes):
+    """幸运值调整后的价格"""
+    luck_bonus = attributes.get('幸运', 0) * LUCK_DISCOUNT
+    return int(base_price * (1 - luck_bonus))
+
+
+def special_event_chance(event, attributes):
+    """特殊事件的触发概率：属性值越高，触发概率越大"""
+    value = attributes.get(event['condition'], 0)
+    return min(1.0, value / 10) if value > 0 else 0.0
+
+
+def roll_special_event(attributes, rng, special_events=SPECIAL_EVENTS):
+    """按顺序判定特殊事件，返回第一个触发的事件（都未触发时为 None）"""
+    for event in special_events:
+        value = attributes.get(event['condition'], 0)
+        # 与 special_event_chance 相同的判定；属性为 0 时不消耗随机数
+        if value > 0 and rng.random() < (value / 10):
+            return event
+    return None
+
+
+def special_bonus_distribution(attributes, special_events=SPECIAL_EVENTS):
+    """一次购买后特殊事件奖励的分布 {奖励金额: 概率}（含 0）"""
+    distribution = {}
+    remaining = 1.0
+    for event in special_events:
+        chance = special_event_chance(event, attributes)
+        if chance and remaining > 0:
+            bonus = event['money_bonus']
+            distribution[bonus] = distribution.get(bonus, 0.0) + remaining * chance
+            remaining *= 1 - chance
+    if remaining > 0:
+        distribution[0] = distribution.get(0, 0.0) + remaining
+    return distribution
+
+
+class AdventureRun:
+    """一局跑团冒险的状态与规则。
+
+    每天先 start_day() 抽一个地点，再 buy(商品) 结算一次购买：扣钱、
+    判定特殊事件、检查是否达标，未结束时进入下一天并获得日常收入。
+    随机数：地点与收入用 market 流，特殊事件用 rolls 流（与界面一致）。
+    """
+
+    def __init__(self, attributes=None, rng=None, seed=None, dynamic_market=False):
+        self.rng = rng if rng is not None else RngStreams(seed)
+        self.attributes = {name: 0 for name in ATTRIBUTE_NAMES}
+        if attributes:
+            self.attributes.update(attributes)
+        self.target_money = TARGET_MONEY
+        self.max_days = MAX_DAYS
+        self.item_prices = dict(ITEM_PRICES)
+        self.daily_events = DAILY_EVENTS
+        # 每日地点抽样器（可选 weight 字段，默认等概率）
+        self.daily_event_sampler = WeightedSampler(
+            range(len(self.daily_events)),
+            [event.get('weight', 1) for event in self.daily_events]
+        )
+        self.special_events = SPECIAL_EVENTS
+        self.dynamic_market = dynamic_market
+        self.market = None
+        self.reset()
+
+    def reset(self, price_path=None):
+        """回到第一天（属性与随机数流保持不变）。
+
+        动态市场下 price_path 为本局的走势数组 (天数, 商品数)；不传时由 market 流生成一条
+        """
+        self.day = 1
+        self.money = START_MONEY
+        self.inventory = {}
+        self.shop_index = None
+        self.outcome = None  # None（进行中）/ 'win' / 'over'（天数用完）/ 'stuck'（买不起任何商品）
+        if self.dynamic_market:
+            import adventure_market
+            if price_path is None:
+                seed = self.rng.market.getrandbits(63)
+                price_path = adventure_market.price_paths(seed, 1, self.max_days)[0]
+            self.market = adventure_market.Market(price_path, self.attributes, self.item_prices)
+
+    @property
+    def finished(self):
+        return self.outcome is not None
+
+    @property
+    def shop(self):
+        return None if self.shop_index is None else self.daily_events[self.shop_index]
+
+    def price(self, item):
+        """今天的买入价"""
+        if self.market is not None:
+            return self.market.buy_price(self.day, item)
+        return adjusted_price(self.item_prices[item], self.attributes)
+
+    def sell_price(self, item):
+        """今天的卖出价；固定价格规则下不能卖出，返回 None"""
+        if self.market is None:
+            return None
+        return self.market.sell_price(self.day, item)
+
+    def start_day(self):
+        """抽取今天的地点并返回"""
+        self.shop_index = self.daily_event_sampler.sample(self.rng.market)
+        return self.shop
+
+    def offers(self):
+        """今天地点的 [(商品, 价格)]"""
+        return [(item, self.price(item)) for item in self.shop['items']]
+
+    def affordable(self):
+        return [(item, price) for item, price in self.offers() if price <= self.money]
+
+    def sellable(self):
+        """背包中可以卖出的 [(商品, 卖出价)]（固定价格规则下为空）"""
+        if self.market is None:
+            return []
+        return [(item, self.sell_price(item)) for item in self.inventory]
+
+    def sell(self, item):
+        """卖出一件背包中的商品（不结束这一天），返回卖出价；不能卖出时返回 None。
+
+        卖出后金钱达到目标即胜利。
+        """
+        if self.market is None or self.finished or not self.inventory.get(item):
+            return None
+        price = self.sell_price(item)
+        self.money += price
+        self.inventory[item] -= 1
+        if not self.inventory[item]:
+            del self.inventory[item]
+        self.market.sold(item)
+        if self.money >= self.target_money:
+            self.outcome = 'win'
+        return price
+
+    def buy(self, item):
+        """购买一件商品并结算这一天，返回结算结果 dict；钱不够时不做任何改变，返回 None。
+
+        结果：item、price、special（触发的特殊事件或 None）、income（进入下一天时的
+        日常收入，否则 None）、outcome（结束时为 'win' / 'over'）。本局已结束时同样返回 None
+        """
+        price = self.price(item)
+        if self.finished or self.money < price:
+            return None
+        self.money -= price
+        self.inventory[item] = self.inventory.get(item, 0) + 1
+        if self.market is not None:
+            self.market.bought(item)
+        special = roll_special_event(self.attributes, self.rng.rolls, self.special_events)
+        if special is not None:
+            self.money += special['money_bonus']
+        result = {'item': item, 'price': price, 'special': special, 'income': None, 'outcome': None}
+        if self.money >= self.target_money:
+            self.outcome = result['outcome'] = 'win'
+            return result
+        # 进入下一天
+        self.day += 1
+        if self.day > self.max_days:
+            self.outcome = result['outcome'] = 'over'
+            return result
+        if self.market is not None:
+            self.market.next_day()
+        # 随机获得一些金钱（模拟其他收入）
+        result['income'] = self.rng.market.randint(*DAILY_INCOME)
+        self.money += result['income']
+        return result
+
+    def give_up(self):
+        """今天的地点买不起任何商品：本局到此结束"""
+        self.outcome = 'stuck'
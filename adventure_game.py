@@ -1,111 +1,62 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import random
 import sys
-import ast
+import adventure_engine
+from rng_streams import RngStreams, split_seed_arg
+from scenes import SceneManager, parse_attributes
+from button_bar import ButtonBar
+from render import RenderScheduler, replace_text
 
 class AdventureGame:
-    def __init__(self, root):
+    """跑团冒险场景：组件建在 frame 里，每次 enter() 以传入的角色属性重新开始"""
+    TITLE = "🎮 跑团冒险游戏"
+    GEOMETRY = "1000x700"
+    BG = '#2c3e50'
+
+    def __init__(self, root, frame=None, seed=None, scenes=None):
         self.root = root
-        self.root.title("🎮 跑团冒险游戏")
-        self.root.geometry("1000x700")
-        self.root.configure(bg='#2c3e50')
-        
-        # 游戏状态
-        self.day = 1
-        self.money = 100  # 初始资金
-        self.target_money = 2000  # 目标资金
-        self.max_days = 10  # 最大天数
-        
+        self.frame = frame if frame is not None else root
+        self.scenes = scenes
+        # 市场（每日事件、收入）与特殊事件判定各用独立的随机数流
+        self.rng = RngStreams(seed)
+        
+        # 游戏状态与规则（adventure_engine.AdventureRun，界面只负责显示与输入）
+        # 动态市场：价格每天波动、受买卖影响，背包里的商品可以卖出
+        self.run = adventure_engine.AdventureRun(rng=self.rng, dynamic_market=True)
         # 角色属性（从start.py传入）
-        self.attributes = {
-            '体质': 0,
-            '智力': 0,
-            '情商': 0,
-            '幸运': 0
-        }
-        
-        # 背包物品
-        self.inventory = {}
-        
-        # 商品价格（基础价格，会根据幸运值波动）
-        self.item_prices = {
-            '面包': 10,
-            '苹果': 15,
-            'CD': 25,
-            '器材': 50,
-            '宝石': 100,
-            '古董': 200,
-            '股票': 300,
-            '房产': 500
-        }
-        
-        # 每日事件
-        self.daily_events = [
-            {
-                'name': '自由市场',
-                'description': '你来到了自由市场，请选择你要购买的货物：',
-                'items': ['面包', '苹果', 'CD', '器材']
-            },
-            {
-                'name': '古董店',
-                'description': '你发现了一家古董店，店主正在出售一些珍品：',
-                'items': ['古董', '宝石', 'CD', '器材']
-            },
-            {
-                'name': '投资中心',
-                'description': '你来到了投资中心，可以投资一些金融产品：',
-                'items': ['股票', '房产', '宝石', '古董']
-            },
-            {
-                'name': '黑市',
-                'description': '你偶然发现了黑市，这里有一些特殊商品：',
-                'items': ['器材', '宝石', '古董', '股票']
-            }
-        ]
-        
-        # 特殊事件
-        self.special_events = [
-            {
-                'name': '幸运发现',
-                'description': '你在路上发现了一个钱包！',
-                'money_bonus': 50,
-                'condition': '幸运'
-            },
-            {
-                'name': '智慧投资',
-                'description': '你的智慧让你发现了一个投资机会！',
-                'money_bonus': 100,
-                'condition': '智力'
-            },
-            {
-                'name': '社交机会',
-                'description': '你通过社交获得了一个赚钱的机会！',
-                'money_bonus': 75,
-                'condition': '情商'
-            },
-            {
-                'name': '体力工作',
-                'description': '你通过体力劳动赚取了一些外快！',
-                'money_bonus': 30,
-                'condition': '体质'
-            }
-        ]
+        self.attributes = self.run.attributes
+        self.target_money = self.run.target_money  # 目标资金
+        self.max_days = self.run.max_days  # 最大天数
+        
+        # 界面刷新：状态变化只标脏，空闲时只推送变化的值
+        self.render = RenderScheduler(self.root)
         
         # 创建界面
         self.create_widgets()
-        
-        # 如果有命令行参数，加载角色属性
-        if len(sys.argv) > 1:
-            self.load_character_attributes(sys.argv[1])
-        
-        # 开始第一天
-        self.start_new_day()
+        self._bind_views()
+    
+    @property
+    def day(self):
+        return self.run.day
+    
+    @property
+    def money(self):
+        return self.run.money
+    
+    @property
+    def inventory(self):
+        return self.run.inventory
+    
+    def enter(self, attributes=None):
+        """显示场景：载入角色属性（字典）并从第一天开始"""
+        if attributes is not None:
+            self.load_character_attributes(attributes)
+        self.restart_game()
     
     def create_widgets(self):
         # 主标题
         title_label = tk.Label(
-            self.root,
+            self.frame,
             text="🎮 跑团冒险游戏",
             font=("Arial", 24, "bold"),
             bg='#2c3e50',
@@ -114,7 +65,7 @@ class AdventureGame:
         title_label.pack(pady=20)
         
         # 主框架
-        main_frame = tk.Frame(self.root, bg='#2c3e50')
+        main_frame = tk.Frame(self.frame, bg='#2c3e50')
         main_frame.pack(expand=True, fill='both', padx=20, pady=20)
         
         # 左侧 - 游戏状态
@@ -314,6 +265,7 @@ class AdventureGame:
         """创建选择按钮"""
         self.choice_frame = tk.Frame(parent, bg='#34495e')
         self.choice_frame.pack(fill='x', padx=20, pady=10)
+        self.choice_bar = ButtonBar(self.choice_frame)
     
     def create_game_log(self, parent):
         """创建游戏日志"""
@@ -338,45 +290,43 @@ class AdventureGame:
         )
         self.log_text.pack(padx=20, pady=10)
     
-    def load_character_attributes(self, attr_string):
-        """加载角色属性"""
-        try:
-            attr_dict = ast.literal_eval(attr_string)
-            self.attributes.update(attr_dict)
-            self.update_attribute_display()
-            self.add_log(f"角色属性已加载：{attr_dict}")
-        except Exception as e:
-            self.add_log(f"加载角色属性失败：{str(e)}")
+    def load_character_attributes(self, attributes):
+        """加载角色属性（字典）"""
+        self.attributes.update(attributes)
+        self.update_attribute_display()
+        self.add_log(f"角色属性已加载：{attributes}")
+    
+    def _bind_views(self):
+        """登记状态、属性与背包面板的取值函数"""
+        render = self.render
+        for attr_name, label in self.attr_labels.items():
+            render.bind_label(('attr', attr_name), label, lambda n=attr_name: str(self.attributes.get(n, 0)))
+        render.bind_label('day', self.day_label, lambda: str(self.day))
+        render.bind_label('money', self.money_label, lambda: str(self.money))
+        render.bind_label('target', self.target_label, lambda: str(self.target_money))
+        render.bind_text('inventory', self.inv_text, self._inventory_text)
+    
+    def _inventory_text(self):
+        if not self.inventory:
+            return "背包为空"
+        return "".join(f"{item}: {count}个\n" for item, count in self.inventory.items())
     
     def update_attribute_display(self):
         """更新属性显示"""
-        for attr_name, value in self.attributes.items():
-            if attr_name in self.attr_labels:
-                self.attr_labels[attr_name].config(text=str(value))
+        self.render.mark(*(('attr', attr_name) for attr_name in self.attr_labels))
     
     def update_status_display(self):
         """更新状态显示"""
-        self.day_label.config(text=str(self.day))
-        self.money_label.config(text=str(self.money))
-        self.target_label.config(text=str(self.target_money))
+        self.render.mark('day', 'money', 'target')
     
     def update_inventory_display(self):
-        """更新背包显示"""
-        self.inv_text.config(state='normal')
-        self.inv_text.delete(1.0, 'end')
-        
-        if not self.inventory:
-            self.inv_text.insert('end', "背包为空")
-        else:
-            for item, count in self.inventory.items():
-                self.inv_text.insert('end', f"{item}: {count}个\n")
-        
-        self.inv_text.config(state='disabled')
+        """更新背包显示（内容不变时不重绘）"""
+        self.render.mark('inventory')
     
-    def add_log(self, message):
-        """添加日志消息"""
+    def add_log(self, message, day=None):
+        """添加日志消息（day 默认为当天）"""
         self.log_text.config(state='normal')
-        self.log_text.insert('end', f"第{self.day}天: {message}\n")
+        self.log_text.insert('end', f"第{self.day if day is None else day}天: {message}\n")
         self.log_text.see('end')
         self.log_text.config(state='disabled')
     
@@ -386,52 +336,58 @@ class AdventureGame:
         self.update_inventory_display()
         
         # 随机选择事件
-        event = random.choice(self.daily_events)
-        
-        # 显示事件
-        self.event_text.config(state='normal')
-        self.event_text.delete(1.0, 'end')
-        self.event_text.insert('end', f"第{self.day}天：\n\n")
-        self.event_text.insert('end', f"{event['description']}\n\n")
-        
-        # 计算商品价格（根据幸运值调整）
-        luck_bonus = self.attributes.get('幸运', 0) * 0.1  # 幸运值影响价格
-        for i, item in enumerate(event['items']):
-            base_price = self.item_prices[item]
-            adjusted_price = int(base_price * (1 - luck_bonus))
-            self.event_text.insert('end', f"{i+1}. {item} - {adjusted_price}金币\n")
-        
-        self.event_text.config(state='disabled')
+        event = self.run.start_day()
+        self.show_market(event)
+        self.add_log(f"来到了{event['name']}")
+    
+    def show_market(self, event):
+        """显示今天的报价与买卖按钮（报价每次只计算一遍）"""
+        offers = self.run.offers()
+        sellable = self.run.sellable()
+        
+        parts = [f"第{self.day}天：\n\n", f"{event['description']}\n\n"]
+        for i, (item, price) in enumerate(offers):
+            parts.append(f"{i+1}. {item} - {price}金币\n")
+        if sellable:
+            parts.append("\n背包商品今日收购价：" + "，".join(f"{item} {price}金币" for item, price in sellable) + "\n")
+        replace_text(self.event_text, "".join(parts))
         
         # 创建选择按钮
-        self.create_choice_buttons_for_event(event)
-        
-        self.add_log(f"来到了{event['name']}")
+        self.create_choice_buttons_for_event(offers, sellable)
     
-    def create_choice_buttons_for_event(self, event):
-        """为事件创建选择按钮"""
-        # 清除现有按钮
-        for widget in self.choice_frame.winfo_children():
-            widget.destroy()
-        
-        # 计算商品价格
-        luck_bonus = self.attributes.get('幸运', 0) * 0.1
-        for i, item in enumerate(event['items']):
-            base_price = self.item_prices[item]
-            adjusted_price = int(base_price * (1 - luck_bonus))
-            
-            button = tk.Button(
-                self.choice_frame,
-                text=f"{item} - {adjusted_price}金币",
-                font=("Arial", 10, "bold"),
-                bg='#3498db',
-                fg='white',
-                relief='raised',
-                bd=2,
-                command=lambda item=item, price=adjusted_price: self.make_choice(item, price),
-                height=2
-            )
-            button.pack(fill='x', pady=5)
+    def create_choice_buttons_for_event(self, offers, sellable=()):
+        """设置买入与卖出按钮（复用已有按钮）"""
+        specs = []
+        for item, adjusted_price in offers:
+            specs.append({
+                'text': f"{item} - {adjusted_price}金币",
+                'font': ("Arial", 10, "bold"),
+                'bd': 2,
+                'command': lambda item=item, price=adjusted_price: self.make_choice(item, price),
+            })
+        for item, price in sellable:
+            specs.append({
+                'text': f"卖出{item}（{self.inventory[item]}个）+{price}金币",
+                'font': ("Arial", 10, "bold"),
+                'bg': '#16a085',
+                'bd': 2,
+                'command': lambda item=item: self.sell_item(item),
+            })
+        self.choice_bar.show(specs)
+    
+    def sell_item(self, item):
+        """卖出一件商品（不结束这一天）"""
+        price = self.run.sell(item)
+        if price is None:
+            return
+        self.add_log(f"卖出了{item}，获得{price}金币")
+        self.update_status_display()
+        self.update_inventory_display()
+        if self.run.outcome == 'win':
+            self.game_win()
+            return
+        # 卖出会压低该商品的价格，刷新报价
+        self.show_market(self.run.shop)
     
     def make_choice(self, item, price):
         """做出选择"""
@@ -440,130 +396,99 @@ class AdventureGame:
             messagebox.showwarning("金钱不足", f"你需要{price}金币，但只有{self.money}金币！")
             return
         
-        # 购买物品
-        self.money -= price
-        if item in self.inventory:
-            self.inventory[item] += 1
-        else:
-            self.inventory[item] = 1
-        
-        self.add_log(f"购买了{item}，花费{price}金币")
-        
-        # 检查特殊事件
-        self.check_special_events()
+        # 购买物品、判定特殊事件并结算这一天
+        day = self.day
+        result = self.run.buy(item)
+        if result is None:
+            return
+        self.add_log(f"购买了{item}，花费{result['price']}金币", day)
+        special = result['special']
+        if special is not None:
+            self.add_log(f"触发特殊事件：{special['name']}！获得{special['money_bonus']}金币", day)
         
         # 更新显示
         self.update_status_display()
         self.update_inventory_display()
         
-        # 检查胜利条件
-        if self.money >= self.target_money:
+        if result['outcome'] == 'win':
             self.game_win()
             return
-        
-        # 进入下一天
-        self.next_day()
-    
-    def check_special_events(self):
-        """检查特殊事件"""
-        # 根据属性值决定是否触发特殊事件
-        for event in self.special_events:
-            attr_value = self.attributes.get(event['condition'], 0)
-            if attr_value > 0 and random.random() < (attr_value / 10):  # 属性值越高，触发概率越大
-                self.money += event['money_bonus']
-                self.add_log(f"触发特殊事件：{event['name']}！获得{event['money_bonus']}金币")
-                break
-    
-    def next_day(self):
-        """进入下一天"""
-        self.day += 1
-        
-        if self.day > self.max_days:
+        if result['outcome'] == 'over':
             self.game_over()
             return
         
-        # 随机获得一些金钱（模拟其他收入）
-        daily_income = random.randint(10, 50)
-        self.money += daily_income
-        self.add_log(f"获得日常收入{daily_income}金币")
+        self.add_log(f"获得日常收入{result['income']}金币")
         
         # 开始新的一天
         self.start_new_day()
     
     def game_win(self):
         """游戏胜利"""
-        self.event_text.config(state='normal')
-        self.event_text.delete(1.0, 'end')
-        self.event_text.insert('end', f"🎉 恭喜！你成功了！\n\n")
-        self.event_text.insert('end', f"你在第{self.day}天就攒够了{self.target_money}金币！\n\n")
-        self.event_text.insert('end', f"最终金钱：{self.money}金币\n")
-        self.event_text.insert('end', f"剩余天数：{self.max_days - self.day + 1}天\n\n")
-        self.event_text.insert('end', "你是一个成功的商人！")
-        self.event_text.config(state='disabled')
-        
-        # 清除选择按钮
-        for widget in self.choice_frame.winfo_children():
-            widget.destroy()
-        
-        # 添加重新开始按钮
-        restart_button = tk.Button(
-            self.choice_frame,
-            text="🔄 重新开始",
-            font=("Arial", 12, "bold"),
-            bg='#27ae60',
-            fg='white',
-            relief='raised',
-            bd=3,
-            command=self.restart_game,
-            height=2
-        )
-        restart_button.pack(fill='x', pady=10)
+        replace_text(self.event_text, (
+            "🎉 恭喜！你成功了！\n\n"
+            f"你在第{self.day}天就攒够了{self.target_money}金币！\n\n"
+            f"最终金钱：{self.money}金币\n"
+            f"剩余天数：{self.max_days - self.day + 1}天\n\n"
+            "你是一个成功的商人！"
+        ))
+        
+        # 选择按钮换成重新开始按钮
+        self.choice_bar.show(self._end_buttons('#27ae60'))
         
         self.add_log("游戏胜利！")
         messagebox.showinfo("游戏胜利", f"恭喜！你在第{self.day}天就攒够了{self.target_money}金币！")
     
     def game_over(self):
         """游戏结束"""
-        self.event_text.config(state='normal')
-        self.event_text.delete(1.0, 'end')
-        self.event_text.insert('end', f"😞 游戏结束\n\n")
-        self.event_text.insert('end', f"10天过去了，你只攒到了{self.money}金币\n\n")
-        self.event_text.insert('end', f"目标：{self.target_money}金币\n")
-        self.event_text.insert('end', f"差距：{self.target_money - self.money}金币\n\n")
-        self.event_text.insert('end', "不要灰心，再来一次吧！")
-        self.event_text.config(state='disabled')
-        
-        # 清除选择按钮
-        for widget in self.choice_frame.winfo_children():
-            widget.destroy()
-        
-        # 添加重新开始按钮
-        restart_button = tk.Button(
-            self.choice_frame,
-            text="🔄 重新开始",
-            font=("Arial", 12, "bold"),
-            bg='#e74c3c',
-            fg='white',
-            relief='raised',
-            bd=3,
-            command=self.restart_game,
-            height=2
-        )
-        restart_button.pack(fill='x', pady=10)
+        replace_text(self.event_text, (
+            "😞 游戏结束\n\n"
+            f"10天过去了，你只攒到了{self.money}金币\n\n"
+            f"目标：{self.target_money}金币\n"
+            f"差距：{self.target_money - self.money}金币\n\n"
+            "不要灰心，再来一次吧！"
+        ))
+        
+        # 选择按钮换成重新开始按钮
+        self.choice_bar.show(self._end_buttons('#e74c3c'))
         
         self.add_log("游戏结束")
         messagebox.showinfo("游戏结束", f"10天过去了，你只攒到了{self.money}金币，距离目标还差{self.target_money - self.money}金币。")
     
+    def _end_buttons(self, bg):
+        """结局时的按钮：重新开始；从掷骰界面进入时还可回去重新生成角色"""
+        buttons = [{
+            'text': "🔄 重新开始",
+            'bg': bg,
+            'command': self.restart_game,
+            'pady': 10,
+        }]
+        if self.scenes is not None and self.scenes.has('dice'):
+            buttons.append({
+                'text': "🎲 重新生成角色",
+                'bg': '#3498db',
+                'command': lambda: self.scenes.show('dice'),
+                'pady': 10,
+            })
+        return buttons
+    
     def restart_game(self):
         """重新开始游戏"""
-        self.day = 1
-        self.money = 100
-        self.inventory = {}
+        self.run.reset()
         self.start_new_day()
 
 def main():
+    # 启动参数：[角色属性JSON] [--seed 种子]
+    args, seed = split_seed_arg(sys.argv[1:])
+    attributes = None
+    if args:
+        try:
+            attributes = parse_attributes(args[0])
+        except ValueError as e:
+            print(f"加载角色属性失败：{e}")
     root = tk.Tk()
-    app = AdventureGame(root)
+    scenes = SceneManager(root)
+    scenes.register('adventure', lambda frame: AdventureGame(root, frame, seed, scenes))
+    scenes.show('adventure', attributes=attributes)
     root.mainloop()
 
 if __name__ == "__main__":
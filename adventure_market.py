@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""跑团冒险的动态市场：基于 NumPy 预生成整局的价格走势。
+
+每件商品的中间价 = 基础价格 × 走势倍率 × 供需倍率，买入价与卖出价分列两侧：
+- 走势倍率：price_paths 一次生成多局、全部天数、全部商品的倍率数组
+  （对数空间的均值回归随机游走，波动率按商品区分），当天报价只是一次查表
+- 供需倍率：玩家买入推高、卖出压低该商品的价格，冲击每天按比例消退
+- 买卖价差：幸运收窄价差，但价差不低于 MIN_SPREAD，任何幸运值下卖出价都
+  低于买入价，只有行情上涨超过价差时转手才能获利
+
+同一种子的走势数组可在批量模拟的多个属性向量之间共用（shared_paths），
+不同属性组合面对完全相同的行情，比较时方差更小。
+"""
+import functools
+import math
+
+import numpy as np
+
+import adventure_engine
+
+# 每件商品每天的对数价格波动率：日用品稳定，金融产品波动大
+ITEM_VOLATILITY = {
+    '面包': 0.05,
+    '苹果': 0.08,
+    'CD': 0.12,
+    '器材': 0.15,
+    '宝石': 0.22,
+    '古董': 0.28,
+    '股票': 0.40,
+    '房产': 0.18,
+}
+DEFAULT_VOLATILITY = 0.15
+# 对数价格每天向基础价格回归的比例
+MEAN_REVERSION = 0.2
+# 走势倍率的上下限
+PRICE_FLOOR = 0.3
+PRICE_CAP = 3.0
+# 买入 / 卖出一件商品对该商品价格的对数冲击，以及冲击每天保留的比例
+DEMAND_IMPACT = 0.08
+SUPPLY_IMPACT = 0.08
+IMPACT_DECAY = 0.5
+# 买卖价差（相对中间价）：买入价 = 中间价 × (1 + 价差/2)，卖出价 = 中间价 × (1 - 价差/2)
+BASE_SPREAD = 0.4
+# 每点幸运收窄的价差，以及价差下限
+LUCK_SPREAD_CUT = 0.03
+MIN_SPREAD = 0.1
+
+
+def item_names(item_prices=adventure_engine.ITEM_PRICES):
+    return tuple(item_prices)
+
+
+def price_paths(seed, runs, days, items=None, volatility=None):
+    """生成 runs 局、days 天、每件商品的走势倍率，形状 (runs, days, 商品数)。
+
+    第一天的倍率为 1（开局按基础价格），之后每天在对数空间中
+    x[t] = (1 - MEAN_REVERSION) * x[t-1] + σ * ε，倍率为 exp(x) 并限制在上下限之内。
+    """
+    items = item_names() if items is None else tuple(items)
+    volatility = ITEM_VOLATILITY if volatility is None else volatility
+    sigma = np.array([volatility.get(item, DEFAULT_VOLATILITY) for item in items])
+    rng = np.random.default_rng(seed)
+    shocks = rng.standard_normal((runs, max(0, days - 1), len(items))) * sigma
+    log_paths = np.zeros((runs, days, len(items)))
+    for day in range(1, days):
+        log_paths[:, day] = (1 - MEAN_REVERSION) * log_paths[:, day - 1] + shocks[:, day - 1]
+    return np.clip(np.exp(log_paths), PRICE_FLOOR, PRICE_CAP)
+
+
+@functools.lru_cache(maxsize=8)
+def shared_paths(seed, runs, days):
+    """按 (seed, runs, days) 缓存的只读走势数组，供批量模拟共用"""
+    paths = price_paths(seed, runs, days)
+    paths.setflags(write=False)
+    return paths
+
+
+class Market:
+    """一局游戏的市场：走势数组（days, 商品数）+ 玩家交易造成的供需冲击"""
+
+    def __init__(self, path, attributes, item_prices=adventure_engine.ITEM_PRICES):
+        self.path = path
+        self.attributes = attributes  # 引用角色属性，幸运变化时报价随之变化
+        self.items = item_names(item_prices)
+        self.index = {item: i for i, item in enumerate(self.items)}
+        self.base = [item_prices[item] for item in self.items]
+        self.impact = [0.0] * len(self.items)  # 对数供需冲击
+
+    def multiplier(self, day, item):
+        """第 day 天（从 1 开始）item 的总价格倍率（走势 × 供需）"""
+        i = self.index[item]
+        return float(self.path[day - 1, i]) * math.exp(self.impact[i])
+
+    def _quote(self, day, item):
+        return self.base[self.index[item]] * self.multiplier(day, item)
+
+    def spread(self):
+        """当前幸运值下的买卖价差"""
+        return max(MIN_SPREAD, BASE_SPREAD - self.attributes.get('幸运', 0) * LUCK_SPREAD_CUT)
+
+    def buy_price(self, day, item):
+        return max(1, round(self._quote(day, item) * (1 + self.spread() / 2)))
+
+    def sell_price(self, day, item):
+        """卖出价，取整后也严格低于同一天的买入价"""
+        price = int(self._quote(day, item) * (1 - self.spread() / 2))
+        return max(0, min(price, self.buy_price(day, item) - 1))
+
+    def bought(self, item):
+        self.impact[self.index[item]] += DEMAND_IMPACT
+
+    def sold(self, item):
+        self.impact[self.index[item]] -= SUPPLY_IMPACT
+
+    def next_day(self):
+        self.impact = [value * IMPACT_DECAY for value in self.impact]
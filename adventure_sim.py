@@ -0,0 +1,349 @@
+# -*- coding: utf-8 -*-
+"""跑团冒险的无界面批量模拟（按属性向量统计胜率）。
+
+用法：
+  python game.py adventure --runs 200 --jobs 4 --seed 1 --policy cheapest
+  python game.py adventure 5 5 5 5 --runs 10000 --policy optimal --market static
+
+不指定属性时遍历掷骰界面能掷出的全部组合（每项 0–10，共 14641 种），每种
+组合跑 runs 局十天交易。工作进程直接驱动 adventure_engine.AdventureRun，
+每个属性向量只返回一份可合并的统计（胜负、逐日金钱、特殊事件触发次数）。
+
+--market dynamic（默认）使用 adventure_market 的动态价格：第 i 局的价格走势
+由 seed 决定，所有属性向量的第 i 局共用同一条走势（同一个只读数组）。
+--market static 为固定价格、不能卖出的规则。
+
+购买策略 policy(run, rng) 返回要买的商品名，返回 None 表示放弃（本局结束）；
+策略可以在返回前先调用 run.sell() 卖出背包中的商品：
+- cheapest / priciest：买得起的商品中最便宜 / 最贵的
+- random：买得起的商品中随机一件
+- trader：卖出价高于基础价格的存货全部卖出，再买入相对基础价格最便宜的商品
+- optimal：adventure_solver 求出的最优策略（仅限固定价格；结果有磁盘缓存，
+  建议先运行 python game.py solve --all）
+"""
+import argparse
+import json
+import os
+import random
+import sys
+from collections import Counter
+from multiprocessing import Pool
+
+import adventure_market
+import adventure_solver
+from adventure_engine import AdventureRun, ATTRIBUTE_NAMES
+
+
+# ---- 购买策略 ----
+def cheapest_policy(run, rng):
+    """买最便宜的商品，保留尽量多的金钱"""
+    offers = run.affordable()
+    return min(offers, key=lambda offer: offer[1])[0] if offers else None
+
+
+def priciest_policy(run, rng):
+    """买买得起的最贵商品"""
+    offers = run.affordable()
+    return max(offers, key=lambda offer: offer[1])[0] if offers else None
+
+
+def random_policy(run, rng):
+    """在买得起的商品中等概率随机选择"""
+    offers = run.affordable()
+    return rng.choice(offers)[0] if offers else None
+
+
+def trader_policy(run, rng):
+    """卖出价高于基础价格时卖出存货，再买入当天相对基础价格最便宜的商品（固定价格规则下只买不卖）"""
+    for item, _ in run.sellable():
+        while (not run.finished and run.inventory.get(item)
+               and run.sell_price(item) > run.item_prices[item]):
+            run.sell(item)
+    if run.finished:
+        return None
+    offers = run.affordable()
+    if not offers:
+        return None
+    return min(offers, key=lambda offer: (offer[1] / run.item_prices[offer[0]], offer[1]))[0]
+
+
+class SolverPolicy:
+    """按 adventure_solver 的最优策略表购买（只保留最近一个属性向量的表）"""
+
+    def __init__(self, cache_dir=adventure_solver.DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.rules = adventure_solver.default_rules()
+        self._vector = None
+        self._solution = None
+        self._tables = None
+
+    def __call__(self, run, rng):
+        vector = tuple(run.attributes[name] for name in ATTRIBUTE_NAMES)
+        if vector != self._vector:
+            self._solution = adventure_solver.solve_cached(run.attributes, self.rules, 1, self.cache_dir)
+            self._tables = adventure_solver.policy_tables(self._solution)
+            self._vector = vector
+        return adventure_solver.best_purchase(self._solution, run.day, run.shop_index, run.money,
+                                              self.rules, self._tables)
+
+
+POLICIES = {
+    'cheapest': cheapest_policy,
+    'priciest': priciest_policy,
+    'random': random_policy,
+    'trader': trader_policy,
+    'optimal': SolverPolicy,  # 每个工作进程各自创建一个实例
+}
+
+
+def make_policy(name):
+    policy = POLICIES[name]
+    return policy() if isinstance(policy, type) else policy
+
+
+def play_adventure(run, policy, rng, on_purchase=None):
+    """在已重置的 run 上跑完一局，返回每天开始时的金钱列表；每次购买后调用 on_purchase(结算结果)"""
+    trajectory = []
+    while not run.finished:
+        run.start_day()
+        trajectory.append(run.money)
+        item = policy(run, rng)
+        if run.finished:
+            break  # 卖出后已达到目标
+        result = None if item is None else run.buy(item)
+        if result is None:
+            run.give_up()
+        elif on_purchase is not None:
+            on_purchase(result)
+    return trajectory
+
+
+# ---- 统计聚合 ----
+class AdventureStats:
+    """一个属性向量的可合并统计：结局计数、逐日金钱之和、特殊事件次数"""
+
+    def __init__(self, attributes, max_days):
+        self.attributes = dict(attributes)
+        self.runs = 0
+        self.outcomes = Counter()  # {'win' / 'over' / 'stuck': 局数}
+        self.win_days = Counter()  # {达标的那天: 局数}
+        # 第 d 天开始时的金钱之和（提前结束的局按最终金钱计），最后一项为最终金钱之和
+        self.money_sums = [0] * (max_days + 1)
+        self.final_money_max = None
+        self.purchases = 0
+        self.special_fires = Counter()  # {特殊事件名: 次数}
+
+    def record(self, run, trajectory):
+        self.runs += 1
+        self.outcomes[run.outcome] += 1
+        if run.outcome == 'win':
+            self.win_days[run.day] += 1
+        days = len(self.money_sums) - 1
+        for day in range(days):
+            self.money_sums[day] += trajectory[day] if day < len(trajectory) else run.money
+        self.money_sums[days] += run.money
+        if self.final_money_max is None or run.money > self.final_money_max:
+            self.final_money_max = run.money
+
+    def record_purchase(self, result):
+        self.purchases += 1
+        if result['special'] is not None:
+            self.special_fires[result['special']['name']] += 1
+
+    def merge(self, other):
+        self.runs += other.runs
+        self.outcomes.update(other.outcomes)
+        self.win_days.update(other.win_days)
+        self.money_sums = [a + b for a, b in zip(self.money_sums, other.money_sums)]
+        if other.final_money_max is not None and (self.final_money_max is None
+                                                  or other.final_money_max > self.final_money_max):
+            self.final_money_max = other.final_money_max
+        self.purchases += other.purchases
+        self.special_fires.update(other.special_fires)
+
+    @property
+    def win_rate(self):
+        return self.outcomes['win'] / self.runs if self.runs else 0.0
+
+    def to_dict(self):
+        runs = self.runs or 1
+        return {
+            'attributes': self.attributes,
+            'runs': self.runs,
+            'win_rate': self.win_rate,
+            'outcomes': dict(self.outcomes),
+            'win_days': dict(sorted(self.win_days.items())),
+            'mean_money_by_day': [total / runs for total in self.money_sums[:-1]],
+            'mean_final_money': self.money_sums[-1] / runs,
+            'max_final_money': self.final_money_max,
+            'special_rate_per_purchase': {
+                name: count / self.purchases
+                for name, count in self.special_fires.most_common()
+            } if self.purchases else {},
+        }
+
+
+# ---- 工作进程 ----
+_worker_policy = None
+
+
+def _init_worker(policy_name):
+    global _worker_policy
+    _worker_policy = make_policy(policy_name)
+
+
+def _run_vectors(args):
+    """对一段属性向量各跑 runs 局，返回 [(向量序号, AdventureStats)]"""
+    vectors, runs, seed, market = args
+    run = AdventureRun(dynamic_market=market == 'dynamic')
+    paths = adventure_market.shared_paths(seed, runs, run.max_days) if run.dynamic_market else None
+    rng = random.Random()
+    results = []
+    for vector_index, values in vectors:
+        run.attributes.update(zip(ATTRIBUTE_NAMES, values))
+        stats = AdventureStats(run.attributes, run.max_days)
+        for run_index in range(runs):
+            # 每局独立播种：同一 seed 下结果与进程数、分块方式无关
+            run_seed = seed * 1000003 + vector_index * runs + run_index
+            rng.seed(run_seed)  # 选择策略
+            run.rng.seed(run_seed)  # 地点、收入与特殊事件的随机数流
+            run.reset(None if paths is None else paths[run_index])
+            stats.record(run, play_adventure(run, _worker_policy, rng, stats.record_purchase))
+        results.append((vector_index, stats))
+    return results
+
+
+def attribute_vectors(values=None):
+    """要模拟的属性向量：指定 values 时只有这一个，否则为全部组合"""
+    if values is not None:
+        return [tuple(values)]
+    return [tuple(attributes.values()) for attributes in adventure_solver.attribute_grid()]
+
+
+def run_grid(vectors, runs, jobs=None, seed=None, policy='cheapest', market='dynamic',
+             chunk_size=None, on_progress=None):
+    """对每个属性向量跑 runs 局，返回与 vectors 同序的 AdventureStats 列表"""
+    if seed is None:
+        seed = random.SystemRandom().randrange(2**32)
+    jobs = jobs or os.cpu_count() or 1
+    if chunk_size is None:
+        chunk_size = max(1, min(256, len(vectors) // (jobs * 8) or 1))
+    indexed = list(enumerate(vectors))
+    tasks = [(indexed[i:i + chunk_size], runs, seed, market) for i in range(0, len(indexed), chunk_size)]
+
+    results = [None] * len(vectors)
+    done = 0
+    if jobs == 1:
+        _init_worker(policy)
+        pool = None
+        chunks = map(_run_vectors, tasks)
+    else:
+        pool = Pool(jobs, initializer=_init_worker, initargs=(policy,))
+        chunks = pool.imap_unordered(_run_vectors, tasks)
+    try:
+        for chunk in chunks:
+            for vector_index, stats in chunk:
+                results[vector_index] = stats
+            done += len(chunk)
+            if on_progress:
+                on_progress(done, len(vectors))
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return results
+
+
+# ---- 报告 ----
+def marginal_win_rates(results):
+    """按单项属性取值汇总的胜率 {属性名: [取值 0–10 的胜率]}"""
+    table = {}
+    for position, name in enumerate(ATTRIBUTE_NAMES):
+        wins = Counter()
+        totals = Counter()
+        for stats in results:
+            value = stats.attributes[name]
+            wins[value] += stats.outcomes['win']
+            totals[value] += stats.runs
+        table[name] = [wins[v] / totals[v] if totals[v] else None
+                       for v in adventure_solver.ATTRIBUTE_VALUES]
+    return table
+
+
+def _total(results):
+    total = AdventureStats({}, len(results[0].money_sums) - 1)
+    for stats in results:
+        total.merge(stats)
+    return total
+
+
+def _row(stats):
+    d = stats.to_dict()
+    values = ' '.join(f"{stats.attributes[name]:>2}" for name in ATTRIBUTE_NAMES)
+    trajectory = ' '.join(f"{money:>5.0f}" for money in d['mean_money_by_day'])
+    return (f"{values} | {d['win_rate']:>7.2%} | {trajectory} | {d['mean_final_money']:>6.0f} "
+            f"{d['max_final_money']:>5} | {sum(stats.special_fires.values()) / (stats.purchases or 1):>5.1%}")
+
+
+def format_report(results, top=10):
+    total = _total(results)
+    days = len(total.money_sums) - 1
+    lines = [f"🗺️ 属性组合 {len(results)} 种，每种 {results[0].runs} 局，共 {total.runs} 局："
+             f"胜率 {total.win_rate:.2%}，结局 {dict(total.outcomes)}"]
+    if len(results) > 1:
+        lines.append("— 按单项属性取值的胜率 —")
+        lines.append("      " + ' '.join(f"{v:>6}" for v in adventure_solver.ATTRIBUTE_VALUES))
+        for name, rates in marginal_win_rates(results).items():
+            lines.append(f"  {name} " + ' '.join('     -' if r is None else f"{r:>6.1%}" for r in rates))
+    header = (' '.join(f"{name[:1]:>1}" for name in ATTRIBUTE_NAMES) + " |    胜率 | "
+              + ' '.join(f"{'D' + str(day):>5}" for day in range(1, days + 1))
+              + " |   最终  最高 | 特殊事件")
+    ranked = sorted(results, key=lambda s: (s.win_rate, s.money_sums[-1] / (s.runs or 1)), reverse=True)
+    shown = ranked if len(ranked) <= top * 2 else ranked[:top] + [None] + ranked[-top:]
+    lines.append("— 属性组合（逐日为每天开始时的平均金钱；特殊事件为每次购买的触发率）—")
+    lines.append("  " + header)
+    for stats in shown:
+        lines.append("  ..." if stats is None else "  " + _row(stats))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='game.py adventure', description='跑团冒险无界面批量模拟')
+    parser.add_argument('values', nargs='*', type=int, help='体质 智力 情商 幸运（默认遍历全部组合）')
+    parser.add_argument('--runs', type=int, default=100, help='每种属性组合的局数')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count())
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--policy', choices=sorted(POLICIES), default='cheapest')
+    parser.add_argument('--market', choices=['dynamic', 'static'], default='dynamic',
+                        help='动态价格（可卖出）或固定价格')
+    parser.add_argument('--top', type=int, default=10, help='表格中显示最好与最差的组合数')
+    parser.add_argument('--json', action='store_true', help='以 JSON 输出每种组合的统计')
+    args = parser.parse_args(argv)
+    if args.values and len(args.values) != len(ATTRIBUTE_NAMES):
+        parser.error('需要 4 个属性值：体质 智力 情商 幸运（或不指定以遍历全部组合）')
+    if args.runs < 1:
+        parser.error('--runs 必须 >= 1')
+    if args.policy == 'optimal' and args.market != 'static':
+        parser.error('optimal 策略只适用于固定价格（--market static）')
+
+    def progress(done, total):
+        print(f"\r进度 {done}/{total}", end='', file=sys.stderr, flush=True)
+
+    vectors = attribute_vectors(args.values or None)
+    results = run_grid(vectors, args.runs, args.jobs, args.seed, args.policy, args.market, on_progress=progress)
+    print(file=sys.stderr)
+    if args.json:
+        print(json.dumps({
+            'policy': args.policy,
+            'market': args.market,
+            'runs_per_vector': args.runs,
+            'marginal_win_rate': marginal_win_rates(results),
+            'vectors': [stats.to_dict() for stats in results],
+        }, ensure_ascii=False))
+    else:
+        print(format_report(results, args.top))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
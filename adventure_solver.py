@@ -0,0 +1,425 @@
+# -*- coding: utf-8 -*-
+"""跑团冒险的最优策略求解（有限步长期望最大化 / 动态规划）。
+
+求解的是固定价格规则（AdventureRun 不启用动态市场）：背包物品不能卖出，
+也不参与任何判定，所以局面只需 (第几天, 金钱)。每天：
+按权重抽一个地点 → 在买得起的商品中买一件 → 特殊事件奖励 → 达到目标即胜利 →
+否则进入下一天并获得日常收入。最后一天买完仍未达标即失败；买不起任何商品时
+游戏无法继续，也按失败计。
+
+从最后一天倒推，对每个 (天, 金钱, 地点) 求胜率最大的购买（胜率相同时取期望
+最终金钱更高的），同时求出运气最好时能达到的最高金钱，用来判断目标是否可能
+达成。金钱按 bucket 分桶：bucket=1 为精确解；bucket>1 时每次金钱变化向下取整，
+得到胜率的下界，适合更大的目标金额。
+
+结果按属性向量缓存到磁盘，规则（价格、地点、奖励、目标等）改变后自动失效。
+
+用法：
+  python game.py solve 5 5 5 5                  # 体质 智力 情商 幸运
+  python game.py solve 5 5 5 5 --policy         # 同时打印第 1 天各地点的最优购买
+  python game.py solve --all --jobs 4           # 掷骰界面能掷出的全部属性组合
+"""
+import argparse
+import functools
+import hashlib
+import itertools
+import marshal
+import os
+import sys
+import zlib
+from multiprocessing import Pool
+
+import numpy as np
+
+import adventure_engine
+
+ATTRIBUTE_NAMES = adventure_engine.ATTRIBUTE_NAMES
+# 掷骰界面每项属性为两个 0–5 骰子之和
+ATTRIBUTE_VALUES = range(0, 11)
+SOLUTION_FORMAT = 1
+_HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CACHE_DIR = os.path.join(_HERE, 'adventure_solver.cache')
+# 胜率相差不超过该值视为相同，再比较期望金钱
+TIE_EPSILON = 1e-12
+# 一次批量求解的属性向量数
+SOLVE_BATCH = 32
+
+
+def default_rules(target=None, max_days=None):
+    """求解用的规则（取自 adventure_engine，可覆盖目标金额与天数）"""
+    return {
+        'start': adventure_engine.START_MONEY,
+        'target': adventure_engine.TARGET_MONEY if target is None else target,
+        'days': adventure_engine.MAX_DAYS if max_days is None else max_days,
+        'income': tuple(adventure_engine.DAILY_INCOME),
+        'prices': dict(adventure_engine.ITEM_PRICES),
+        'shops': [(event['name'], event.get('weight', 1), list(event['items']))
+                  for event in adventure_engine.DAILY_EVENTS],
+        'special': [(event['condition'], event['money_bonus']) for event in adventure_engine.SPECIAL_EVENTS],
+        'luck_discount': adventure_engine.LUCK_DISCOUNT,
+    }
+
+
+def rules_fingerprint(rules):
+    # 版本 2 不写对象引用，相同的规则总是得到相同的字节
+    return hashlib.sha256(marshal.dumps(rules, 2)).hexdigest()[:16]
+
+
+def _special_events(rules):
+    return [{'condition': condition, 'money_bonus': bonus} for condition, bonus in rules['special']]
+
+
+def effective_key(attributes, rules):
+    """决定求解结果的全部输入：(价格向量, 奖励分布)。键相同的属性向量结果相同"""
+    prices = tuple(adventure_engine.adjusted_price(price, attributes) for price in rules['prices'].values())
+    bonus = adventure_engine.special_bonus_distribution(attributes, _special_events(rules))
+    return prices, tuple(sorted(bonus.items()))
+
+
+def _shift_distribution(distribution, bucket):
+    """{金额: 概率} → {桶偏移: 概率}（向下取整，合并相同偏移）"""
+    shifts = {}
+    for amount, probability in distribution.items():
+        shifts[amount // bucket] = shifts.get(amount // bucket, 0.0) + probability
+    return shifts
+
+
+def _window_expect(values, shifts, length):
+    """result[:, i] = Σ p·values[:, i + s]，偏移 s 为连续整数（如日常收入）。
+
+    用前缀和求窗口和，再修正概率与众数不同的偏移，代价与窗口宽度无关。
+    """
+    first, last = shifts[0][0], shifts[-1][0]
+    common = max(probability for _, probability in shifts)
+    prefix = np.zeros((values.shape[0], values.shape[1] + 1))
+    np.cumsum(values, axis=1, out=prefix[:, 1:])
+    result = common * (prefix[:, last + 1:last + 1 + length] - prefix[:, first:first + length])
+    for shift, probability in shifts:
+        if probability != common:
+            result += (probability - common) * values[:, shift:shift + length]
+    return result
+
+
+def _window_max(values, first, last, length):
+    """result[:, i] = max values[:, i + first .. i + last]（倍增，代价为 log(窗口宽度)）"""
+    width = last - first + 1
+    span = 1
+    table = values[:, first:first + length + width - 1]
+    while span * 2 <= width:
+        table = np.maximum(table[:, :-span], table[:, span:])
+        span *= 2
+    return np.maximum(table[:, :length], table[:, width - span:width - span + length])
+
+
+def solve_batch(batch, rules=None, bucket=1):
+    """同时求解一批幸运值相同（即价格相同）的属性向量，返回结果字典列表。
+
+    所有数组的第一维是批内的属性向量，第二维是金钱桶；第 d 天只计算
+    从初始金钱出发那天可能达到的金钱范围。
+    """
+    rules = rules or default_rules()
+    target, days = rules['target'], rules['days']
+    low, high = rules['income']
+    n = len(batch)
+    item_names = list(rules['prices'])
+    prices = [adventure_engine.adjusted_price(rules['prices'][name], batch[0]) for name in item_names]
+    if any(adventure_engine.adjusted_price(rules['prices'][name], attributes) != price
+           for attributes in batch for name, price in zip(item_names, prices)):
+        raise ValueError("同一批属性向量的幸运值必须相同")
+    if min(prices) < 0:
+        raise ValueError(f"幸运为 {batch[0].get('幸运')} 时商品价格为负，不在求解范围内")
+    # 买得起 ⇔ 金钱桶 ≥ ⌈价格/bucket⌉，买后的桶下标为 i - ⌈价格/bucket⌉
+    price_shift = [-(-price // bucket) for price in prices]
+    # 特殊事件奖励：各向量共用偏移，概率各不相同 (n, K)
+    distributions = [_shift_distribution(adventure_engine.special_bonus_distribution(
+        attributes, _special_events(rules)), bucket) for attributes in batch]
+    bonus_shifts = sorted(set().union(*distributions))
+    bonus_probs = np.array([[d.get(shift, 0.0) for shift in bonus_shifts] for d in distributions])
+    # 金钱范围按规则中的最大奖励计算，与批内组成无关（同一向量的结果总是相同）
+    top_bonus = max([bonus for _, bonus in rules['special']] + [0]) // bucket
+    income_shifts = sorted(_shift_distribution(
+        {amount: 1 / (high - low + 1) for amount in range(low, high + 1)}, bucket).items())
+    high_shift = income_shifts[-1][0]
+    total_weight = sum(weight for _, weight, _ in rules['shops'])
+    shops = [(weight / total_weight, [item_names.index(name) for name in items])
+             for _, weight, items in rules['shops']]
+
+    # 下标 i 表示金钱 i*bucket；未达标的结算金钱 < goal，每天开始时至多 goal + 收入
+    goal = -(-target // bucket)
+    start = rules['start'] // bucket
+    reach = [start]  # 第 d 天开始时可能的最大下标
+    for _ in range(days - 1):
+        reach.append(min(reach[-1] + top_bonus + high_shift, goal - 1 + high_shift))
+    rows = np.arange(n)[:, None]
+
+    policy = []
+    next_win = next_money = next_max = None
+    for day in range(days, 0, -1):
+        length = reach[day - 1] + 1
+        settled_length = length + top_bonus
+        live = min(goal, settled_length)
+        money = np.arange(settled_length, dtype=np.float64) * bucket
+        # 结算之后（未达标）的价值：最后一天即结局，否则进入下一天并获得收入
+        settled_win = np.ones((n, settled_length))
+        settled_money = np.tile(money, (n, 1))
+        settled_max = settled_money.copy()
+        settled_win[:, :live] = 0
+        if day < days:
+            settled_win[:, :live] = _window_expect(next_win, income_shifts, live)
+            settled_money[:, :live] = _window_expect(next_money, income_shifts, live)
+            settled_max[:, :live] = _window_max(next_max, income_shifts[0][0], high_shift, live)
+        # 买完商品后（扣价之后、奖励之前）的价值；最好情况只考虑可能发生的奖励
+        bought_win = np.zeros((n, length))
+        bought_money = np.zeros((n, length))
+        bought_max = np.full((n, length), -np.inf)
+        for k, shift in enumerate(bonus_shifts):
+            p = bonus_probs[:, k:k + 1]
+            bought_win += p * settled_win[:, shift:shift + length]
+            bought_money += p * settled_money[:, shift:shift + length]
+            bought_max = np.maximum(bought_max, np.where(p > 0, settled_max[:, shift:shift + length], -np.inf))
+
+        # 扣价：在左侧补上“买不起”，每个商品的候选值是补齐后数组的一个切片
+        pad = max(shift for shift in price_shift if shift < length) if min(price_shift) < length else 0
+        padded_win = np.concatenate([np.full((n, pad), -1.0), bought_win], axis=1)
+        padded_money = np.concatenate([np.full((n, pad), -np.inf), bought_money], axis=1)
+        padded_max = np.concatenate([np.full((n, pad), -np.inf), bought_max], axis=1)
+        current = money[:length]
+        day_win = np.zeros((n, length))
+        day_money = np.zeros((n, length))
+        day_max = np.full((n, length), -np.inf)
+        day_policy = np.full((n, len(shops), length), -1, dtype=np.int8)
+        for shop_index, (weight, items) in enumerate(shops):
+            slots = [slot for slot, item in enumerate(items) if price_shift[item] < length]
+            if slots:
+                # 各商品的候选值都是补齐数组的切片（视图，不复制）
+                offsets = [pad - price_shift[items[slot]] for slot in slots]
+                wins = [padded_win[:, o:o + length] for o in offsets]
+                cashes = [padded_money[:, o:o + length] for o in offsets]
+                best_win = functools.reduce(np.maximum, wins)
+                # 胜率最高的商品中取期望金钱最高的（相同时取靠前的）
+                threshold = best_win - TIE_EPSILON
+                tied = [np.where(win >= threshold, cash, -np.inf) for win, cash in zip(wins, cashes)]
+                best_money = functools.reduce(np.maximum, tied)
+                choice = np.full((n, length), -1, dtype=np.int8)
+                for slot, candidate in reversed(list(zip(slots, tied))):
+                    choice[candidate == best_money] = slot
+                stuck = best_win < 0
+                chosen_win = np.where(stuck, 0.0, best_win)
+                chosen_money = np.where(stuck, current, best_money)
+                best_max = functools.reduce(np.maximum, [padded_max[:, o:o + length] for o in offsets])
+                chosen_max = np.where(stuck, current, best_max)
+                choice[stuck] = -1
+                day_policy[:, shop_index] = choice
+            else:
+                # 这个地点什么都买不起：游戏停在这里（胜率 0，金钱不变）
+                chosen_win, chosen_money, chosen_max = 0.0, current, current
+            day_win += weight * chosen_win
+            day_money += weight * chosen_money
+            day_max = np.maximum(day_max, chosen_max)
+        policy.append(day_policy)
+        next_win, next_money, next_max = day_win, day_money, day_max
+
+    policy.reverse()
+    solutions = []
+    for row, attributes in enumerate(batch):
+        tables = [day_policy[row] for day_policy in policy]
+        solutions.append({
+            'format': SOLUTION_FORMAT,
+            'attributes': {name: attributes.get(name, 0) for name in ATTRIBUTE_NAMES},
+            'bucket': bucket,
+            'win_probability': float(min(1.0, next_win[row, start])),
+            'expected_money': float(next_money[row, start]),
+            'max_money': float(next_max[row, start]),
+            'policy_lengths': [table.shape[1] for table in tables],
+            'policy': zlib.compress(b''.join(table.tobytes() for table in tables)),
+        })
+    return solutions
+
+
+def solve(attributes, rules=None, bucket=1):
+    """求解一个属性向量，返回结果字典（胜率、期望最终金钱、最高可达金钱与每日最优购买表）"""
+    return solve_batch([attributes], rules, bucket)[0]
+
+
+def policy_tables(solution):
+    """每天一张 (地点, 金钱桶) 的最优购买表（商品在该地点中的序号，-1 为买不起）"""
+    data = np.frombuffer(zlib.decompress(solution['policy']), dtype=np.int8)
+    shops = len(data) // sum(solution['policy_lengths'])
+    tables, offset = [], 0
+    for length in solution['policy_lengths']:
+        tables.append(data[offset:offset + shops * length].reshape(shops, length))
+        offset += shops * length
+    return tables
+
+
+def best_purchase(solution, day, shop_index, money, rules=None, tables=None):
+    """第 day 天在地点 shop_index、持有 money 时的最优购买（商品名；买不起时为 None）。
+
+    超出那天可能达到的金钱范围时按范围内最高的金钱处理。
+    """
+    rules = rules or default_rules()
+    tables = policy_tables(solution) if tables is None else tables
+    table = tables[day - 1]
+    slot = int(table[shop_index, min(max(0, money // solution['bucket']), table.shape[1] - 1)])
+    if slot < 0:
+        return None
+    return rules['shops'][shop_index][2][slot]
+
+
+# ---- 磁盘缓存：每个属性向量一个文件，目录名包含规则指纹与分桶大小 ----
+def cache_root(cache_dir, rules, bucket):
+    return os.path.join(cache_dir, f"{rules_fingerprint(rules)}-b{bucket}")
+
+
+def _cache_path(root, attributes):
+    vector = '-'.join(str(attributes.get(name, 0)) for name in ATTRIBUTE_NAMES)
+    return os.path.join(root, f"{vector}.solution")
+
+
+def load_cached(root, attributes):
+    try:
+        with open(_cache_path(root, attributes), 'rb') as f:
+            solution = marshal.load(f)
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if not isinstance(solution, dict) or solution.get('format') != SOLUTION_FORMAT:
+        return None
+    return solution
+
+
+def save_cached(root, solution):
+    path = _cache_path(root, solution['attributes'])
+    os.makedirs(root, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        marshal.dump(solution, f, 2)
+    os.replace(tmp, path)
+
+
+def solve_cached(attributes, rules=None, bucket=1, cache_dir=DEFAULT_CACHE_DIR):
+    """先查磁盘缓存，没有再求解并写入缓存；cache_dir 为 None 时不使用缓存"""
+    rules = rules or default_rules()
+    root = None if cache_dir is None else cache_root(cache_dir, rules, bucket)
+    if root is not None:
+        solution = load_cached(root, attributes)
+        if solution is not None:
+            return solution
+    solution = solve(attributes, rules, bucket)
+    if root is not None:
+        try:
+            save_cached(root, solution)
+        except OSError as e:
+            print(f"无法写入求解缓存：{e}")
+    return solution
+
+
+# ---- 全部属性组合 ----
+def attribute_grid():
+    for values in itertools.product(ATTRIBUTE_VALUES, repeat=len(ATTRIBUTE_NAMES)):
+        yield dict(zip(ATTRIBUTE_NAMES, values))
+
+
+def _solve_chunk(args):
+    batch, rules, bucket = args
+    return solve_batch(batch, rules, bucket)
+
+
+def solve_all(rules=None, bucket=1, jobs=1, cache_dir=DEFAULT_CACHE_DIR, on_progress=None):
+    """求解全部属性组合（已缓存的直接读取），返回按属性排列的结果列表"""
+    rules = rules or default_rules()
+    root = None if cache_dir is None else cache_root(cache_dir, rules, bucket)
+    results = {}
+    groups = {}  # {等价键: [属性向量...]}，每组只求解第一个
+    for attributes in attribute_grid():
+        vector = tuple(attributes.values())
+        solution = load_cached(root, attributes) if root is not None else None
+        if solution is not None:
+            results[vector] = solution
+        else:
+            groups.setdefault(effective_key(attributes, rules), []).append(attributes)
+    if on_progress and results:
+        on_progress(len(results))
+
+    # 价格相同（幸运相同）的代表向量按 SOLVE_BATCH 个一批求解
+    by_luck = {}
+    for key, members in groups.items():
+        by_luck.setdefault(key[0], []).append(members[0])
+    tasks = [(reps[i:i + SOLVE_BATCH], rules, bucket)
+             for reps in by_luck.values() for i in range(0, len(reps), SOLVE_BATCH)]
+    if jobs == 1:
+        solved = map(_solve_chunk, tasks)
+        pool = None
+    else:
+        pool = Pool(jobs)
+        solved = pool.imap_unordered(_solve_chunk, tasks)
+    try:
+        for chunk in solved:
+            for solution in chunk:
+                for attributes in groups[effective_key(solution['attributes'], rules)]:
+                    copy = dict(solution, attributes=dict(attributes))
+                    results[tuple(attributes.values())] = copy
+                    if root is not None:
+                        save_cached(root, copy)
+            if on_progress:
+                on_progress(len(results))
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return [results[vector] for vector in sorted(results)]
+
+
+def _describe(solution):
+    attributes = '，'.join(f"{name}{value}" for name, value in solution['attributes'].items())
+    return (f"{attributes}：胜率 {solution['win_probability']:.4%}，"
+            f"期望最终金钱 {solution['expected_money']:.1f}，最高可达 {solution['max_money']:.0f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='game.py solve', description='跑团冒险最优策略求解')
+    parser.add_argument('values', nargs='*', type=int, help='体质 智力 情商 幸运')
+    parser.add_argument('--all', action='store_true', help='求解全部属性组合（每项 0–10）')
+    parser.add_argument('--target', type=int, default=None, help='目标金额（默认取游戏规则）')
+    parser.add_argument('--days', type=int, default=None, help='天数（默认取游戏规则）')
+    parser.add_argument('--bucket', type=int, default=1, help='金钱分桶大小（1 为精确解，>1 时胜率为下界）')
+    parser.add_argument('--policy', action='store_true', help='打印第 1 天各地点的最优购买')
+    parser.add_argument('--no-cache', action='store_true', help='不读写磁盘缓存')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR)
+    parser.add_argument('--jobs', type=int, default=os.cpu_count())
+    args = parser.parse_args(argv)
+    if args.bucket < 1:
+        parser.error('--bucket 必须 >= 1')
+    rules = default_rules(args.target, args.days)
+    cache_dir = None if args.no_cache else args.cache_dir
+
+    if args.all:
+        def progress(done):
+            print(f"\r已求解 {done}/{len(ATTRIBUTE_VALUES) ** len(ATTRIBUTE_NAMES)}", end='', file=sys.stderr, flush=True)
+
+        results = solve_all(rules, args.bucket, args.jobs or 1, cache_dir, on_progress=progress)
+        print(file=sys.stderr)
+        reachable = [s for s in results if s['win_probability'] > 0]
+        best = max(results, key=lambda s: (s['win_probability'], s['expected_money']))
+        highest = max(results, key=lambda s: s['max_money'])
+        print(f"目标 {rules['target']} 金币、{rules['days']} 天：{len(reachable)}/{len(results)} 种属性组合有可能达成")
+        print(f"胜率最高 —— {_describe(best)}")
+        print(f"最高可达 —— {_describe(highest)}")
+        return 0
+
+    if len(args.values) != len(ATTRIBUTE_NAMES):
+        parser.error('需要 4 个属性值：体质 智力 情商 幸运（或使用 --all）')
+    attributes = dict(zip(ATTRIBUTE_NAMES, args.values))
+    solution = solve_cached(attributes, rules, args.bucket, cache_dir)
+    print(_describe(solution))
+    if solution['win_probability'] == 0:
+        print(f"❌ 目标 {rules['target']} 金币无法达成（运气最好时最多 {solution['max_money']:.0f} 金币）")
+    if args.policy:
+        tables = policy_tables(solution)
+        for shop_index, (name, _, _) in enumerate(rules['shops']):
+            item = best_purchase(solution, 1, shop_index, rules['start'], rules, tables)
+            print(f"  第1天 {name}：{item or '买不起任何商品'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
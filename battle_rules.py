@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""Boss 战斗规则（不依赖 tkinter），供 BossBattleUI 与无界面模拟共用。"""
+import random
+
+# Boss 基础属性
+BOSS_ATTACK = 10
+BOSS_DODGE = 0
+
+# 战斗结束经验奖励
+VICTORY_EXP = 50
+DEFEAT_EXP = 20
+
+# 防御时承受伤害的比例（整除 2）
+DEFEND_DIVISOR = 2
+
+# 无界面模拟的回合上限（双方都无法造成伤害时避免死循环）
+MAX_TURNS = 10000
+
+
+def is_dodged(dodge, rng=random):
+    """按闪避百分比判定本次攻击是否被闪避"""
+    return rng.randint(1, 100) <= dodge
+
+
+def boss_damage(boss_attack, defending=False):
+    """Boss 对玩家造成的伤害（防御时减半）"""
+    if defending:
+        return boss_attack // DEFEND_DIVISOR
+    return boss_attack
+
+
+def simulate_boss_fight(player_stats, boss_health, boss_attack=BOSS_ATTACK,
+                        boss_dodge=BOSS_DODGE, policy='attack', rng=random,
+                        max_turns=MAX_TURNS, policy_rng=None):
+    """按 BossBattleUI 的回合规则完整结算一场战斗。
+
+    policy 为 'attack'（总是攻击）、'defend'（总是防御）或 'random'（各一半）。
+    rng 用于闪避判定；policy_rng 用于 'random' 策略，默认与 rng 相同。
+    返回 (victory, turns, player_health, boss_health)。
+    """
+    if policy_rng is None:
+        policy_rng = rng
+    player_health = player_stats['health']
+    player_attack = player_stats['attack']
+    player_dodge = player_stats['dodge']
+
+    for turn in range(1, max_turns + 1):
+        if policy == 'attack':
+            defending = False
+        elif policy == 'defend':
+            defending = True
+        else:
+            defending = policy_rng.random() < 0.5
+
+        # 玩家回合
+        if not defending:
+            if not is_dodged(boss_dodge, rng):
+                boss_health -= player_attack
+            if boss_health <= 0:
+                return True, turn, player_health, 0
+
+        # Boss 回合
+        if not is_dodged(player_dodge, rng):
+            player_health -= boss_damage(boss_attack, defending)
+        if player_health <= 0:
+            return False, turn, 0, boss_health
+
+    return False, max_turns, player_health, boss_health
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""基于 NumPy 的批量 Boss 战斗模拟，规则与 battle_rules / BossBattleUI 一致。
+
+一次调用同时结算成百上千万场战斗，用于按阶段调校 boss_hp：
+
+    python game.py battle --fights 1000000 --health 50 --attack 10 --dodge 10 --boss-hp 80 120 160
+    python game.py battle --health 50 --attack 10 --boss-hp 120 --json    # 输出完整汇总
+"""
+import argparse
+import json
+import sys
+
+import numpy as np
+
+import battle_rules
+
+
+def _defending_mask(policy, rng, turn, player_health, boss_health):
+    """按策略返回本回合哪些战斗选择防御"""
+    if policy == 'attack':
+        return np.zeros(player_health.shape, dtype=bool)
+    if policy == 'defend':
+        return np.ones(player_health.shape, dtype=bool)
+    if callable(policy):
+        return np.asarray(policy(turn, player_health, boss_health), dtype=bool)
+    # 数值：每回合进攻的概率
+    return rng.random(player_health.shape) >= float(policy)
+
+
+def simulate_boss_fights(player_health, player_attack, player_dodge, boss_health,
+                         boss_attack=battle_rules.BOSS_ATTACK, boss_dodge=battle_rules.BOSS_DODGE,
+                         policy='attack', seed=None, max_turns=battle_rules.MAX_TURNS):
+    """批量结算战斗，所有数值参数可为标量或可广播的一维数组。
+
+    policy：'attack'、'defend'、每回合进攻概率（0-1 浮点数），或
+    callable(turn, player_health, boss_health) -> 防御布尔数组（只传入仍在进行的战斗）。
+    返回 dict：victory/turns/player_health/boss_health/timeout 均为长度 n 的数组。
+    """
+    arrays = np.broadcast_arrays(
+        np.asarray(player_health, dtype=np.int64), np.asarray(player_attack, dtype=np.int64),
+        np.asarray(player_dodge, dtype=np.int64), np.asarray(boss_health, dtype=np.int64),
+        np.asarray(boss_attack, dtype=np.int64), np.asarray(boss_dodge, dtype=np.int64),
+    )
+    p_hp, p_atk, p_dodge, b_hp, b_atk, b_dodge = (np.array(a, dtype=np.int64).ravel() for a in arrays)
+    n = p_hp.size
+    rng = np.random.default_rng(seed)
+
+    victory = np.zeros(n, dtype=bool)
+    turns = np.full(n, max_turns, dtype=np.int64)
+    timeout = np.ones(n, dtype=bool)
+    b_dmg_full = b_atk
+    b_dmg_half = b_atk // battle_rules.DEFEND_DIVISOR
+
+    active = np.arange(n)
+    turn = 0
+    while active.size and turn < max_turns:
+        turn += 1
+        cur_p_hp = p_hp[active]
+        cur_b_hp = b_hp[active]
+        defending = _defending_mask(policy, rng, turn, cur_p_hp, cur_b_hp)
+        attacking = ~defending
+
+        # 玩家回合
+        hit = attacking & (rng.integers(1, 101, active.size) > b_dodge[active])
+        cur_b_hp = cur_b_hp - np.where(hit, p_atk[active], 0)
+        won = attacking & (cur_b_hp <= 0)
+        cur_b_hp[won] = 0
+
+        # Boss 回合（已获胜的战斗不再结算）
+        boss_hit = ~won & (rng.integers(1, 101, active.size) > p_dodge[active])
+        damage = np.where(defending, b_dmg_half[active], b_dmg_full[active])
+        cur_p_hp = cur_p_hp - np.where(boss_hit, damage, 0)
+        lost = ~won & (cur_p_hp <= 0)
+        cur_p_hp[lost] = 0
+
+        p_hp[active] = cur_p_hp
+        b_hp[active] = cur_b_hp
+        done = won | lost
+        if done.any():
+            finished = active[done]
+            victory[finished] = won[done]
+            turns[finished] = turn
+            timeout[finished] = False
+            active = active[~done]
+
+    return {
+        'victory': victory,
+        'turns': turns,
+        'player_health': p_hp,
+        'boss_health': b_hp,
+        'timeout': timeout,
+    }
+
+
+def summarize(result, hp_bins=20):
+    """汇总胜率、回合数直方图与剩余血量分布"""
+    victory = result['victory']
+    n = victory.size
+    summary = {
+        'fights': int(n),
+        'win_rate': float(victory.mean()) if n else 0.0,
+        'timeout_rate': float(result['timeout'].mean()) if n else 0.0,
+        'mean_turns': float(result['turns'].mean()) if n else 0.0,
+        'turns_histogram': np.bincount(result['turns']).tolist(),
+    }
+    for key, mask in (('player_health', victory), ('boss_health', ~victory)):
+        values = result[key][mask]
+        if values.size:
+            counts, edges = np.histogram(values, bins=hp_bins)
+            summary[f'{key}_remaining'] = {
+                'mean': float(values.mean()),
+                'p50': float(np.median(values)),
+                'histogram': counts.tolist(),
+                'bin_edges': edges.tolist(),
+            }
+    return summary
+
+
+def format_summary(boss_hp, summary):
+    """把 summarize() 的结果排成文本：胜率、回合数直方图与剩余血量分布"""
+    lines = [f"boss_hp={boss_hp}: 胜率 {summary['win_rate']:.2%}，平均回合 {summary['mean_turns']:.1f}，"
+             f"超时 {summary['timeout_rate']:.2%}"]
+    fights = summary['fights'] or 1
+    lines.append("  — 回合数 —")
+    for turn, count in enumerate(summary['turns_histogram']):
+        if count:
+            lines.append(f"    {turn:>3} 回合: {count / fights:7.2%}")
+    for key, label in (('player_health', '获胜时玩家剩余血量'), ('boss_health', '失败时 Boss 剩余血量')):
+        d = summary.get(f'{key}_remaining')
+        if d is None:
+            continue
+        lines.append(f"  — {label} — 均值{d['mean']:.1f} p50={d['p50']:g}")
+        edges = d['bin_edges']
+        total = sum(d['histogram']) or 1
+        for i, count in enumerate(d['histogram']):
+            if count:
+                lines.append(f"    [{edges[i]:6.1f}, {edges[i + 1]:6.1f}{']' if i == len(d['histogram']) - 1 else ')'}"
+                             f": {count / total:7.2%}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='game.py battle', description='批量模拟 Boss 战斗以调校 boss_hp')
+    parser.add_argument('--fights', type=int, default=100000)
+    parser.add_argument('--health', type=int, required=True, help='玩家血量（体质*5）')
+    parser.add_argument('--attack', type=int, required=True, help='玩家攻击（情商）')
+    parser.add_argument('--dodge', type=int, default=0, help='玩家闪避%%（幸运*2）')
+    parser.add_argument('--boss-hp', type=int, nargs='+', required=True)
+    parser.add_argument('--boss-attack', type=int, default=battle_rules.BOSS_ATTACK)
+    parser.add_argument('--policy', default='attack', help="attack / defend / 每回合进攻概率")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--hp-bins', type=int, default=10, help='剩余血量分布的分组数')
+    parser.add_argument('--json', action='store_true', help='以 JSON 输出每个 boss_hp 的完整汇总')
+    args = parser.parse_args(argv)
+
+    policy = args.policy if args.policy in ('attack', 'defend') else float(args.policy)
+    report = {}
+    for boss_hp in args.boss_hp:
+        result = simulate_boss_fights(args.health, args.attack, args.dodge,
+                                      np.full(args.fights, boss_hp), boss_attack=args.boss_attack,
+                                      policy=policy, seed=args.seed)
+        report[str(boss_hp)] = summarize(result, hp_bins=args.hp_bins)
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print("\n".join(format_summary(boss_hp, s) for boss_hp, s in report.items()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
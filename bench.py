@@ -0,0 +1,314 @@
+# -*- coding: utf-8 -*-
+"""游戏引擎热点路径的基准测试（只用标准库 timeit / perf_counter）。
+
+每个基准有固定的名称，结果可输出为 JSON、保存为基线，并与基线比较：
+任一基准比基线慢超过阈值即返回 1。
+
+用法：
+  python game.py bench                           # 运行全部基准
+  python game.py bench -k select --json          # 只运行名称含 select 的基准
+  python game.py bench --save bench_baseline.json
+  python game.py bench --compare bench_baseline.json --threshold 0.2
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import timeit
+
+import battle_rules
+import event_bundle
+import simulate
+from game_state import GameState, DEFAULT_EVENTS_FILE, STAGES
+
+BENCH_FORMAT = 1
+# 合成大事件库的事件数
+LARGE_EVENTS = 20000
+# 默认回归阈值：比基线慢 20% 视为退化
+DEFAULT_THRESHOLD = 0.2
+
+
+def synthetic_library(base, count, seed=0):
+    """以 base 中的事件为模板生成 count 个事件（随机权重、冷却、阶段、前置条件）"""
+    rng = random.Random(seed)
+    templates = list(base.values())
+    stage_tags = [f"stage={stage['name']}" for stage in STAGES]
+    names = [f"合成事件{i}" for i in range(count)]
+    library = {}
+    for i, name in enumerate(names):
+        event = json.loads(json.dumps(templates[i % len(templates)]))
+        event['tags'] = rng.sample(stage_tags, rng.randint(1, 3))
+        event['weight'] = rng.randint(1, 5)
+        event['cooldown'] = rng.randint(0, 3)
+        if rng.random() < 0.3:
+            requires = {'attributes': {rng.choice(['体质', '智力', '情商', '幸运']): f">={rng.randint(1, 8)}"}}
+            if i and rng.random() < 0.5:
+                requires['flags_any'] = [f"见过_{names[rng.randrange(i)]}"]
+            event['requires'] = requires
+        library[name] = event
+    return library
+
+
+class Fixtures:
+    """基准共用的事件文件与局面（临时目录在 close() 时删除）"""
+
+    def __init__(self, large_events=LARGE_EVENTS):
+        self.tmpdir = tempfile.mkdtemp(prefix='bench-')
+        self.small_file = os.path.join(self.tmpdir, 'small.json')
+        shutil.copyfile(DEFAULT_EVENTS_FILE, self.small_file)
+        with open(DEFAULT_EVENTS_FILE, encoding='utf-8') as f:
+            base = json.load(f)
+        self.large_file = os.path.join(self.tmpdir, 'large.json')
+        with open(self.large_file, 'w', encoding='utf-8') as f:
+            json.dump(synthetic_library(base, large_events), f, ensure_ascii=False)
+        self._states = {}
+
+    def state(self, which='small'):
+        """一个进行到中途的局面（已触发若干事件，负面事件已可出现）"""
+        if which not in self._states:
+            events_file = self.small_file if which == 'small' else self.large_file
+            state = quiet(GameState, events_file=events_file, seed=1)
+            state.load_character_attributes({'体质': 6, '智力': 6, '情商': 6, '幸运': 6})
+            for _ in range(30):
+                state.next_event()
+                if state.current_choices:
+                    state.make_choice(state.current_choices[0])
+                else:
+                    state.resolve_auto_roll(state.current_event)
+            self._states[which] = state
+        return self._states[which]
+
+    def close(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+
+def quiet(func, *args, **kwargs):
+    """调用 func 并丢弃其 stdout / stderr 输出（事件库载入会向 stderr 打印提示，
+    不丢弃时计时的是终端输出而不是载入本身）"""
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        return func(*args, **kwargs)
+
+
+# ---- 基准定义：setup(fixtures) 返回被计时的无参函数 ----
+def bench_load(which, cold):
+    def setup(fx):
+        events_file = fx.small_file if which == 'small' else fx.large_file
+        state = quiet(GameState, events_file=events_file)
+        bundle = event_bundle.bundle_path(events_file)
+
+        def run():
+            if cold:
+                os.remove(bundle)
+            quiet(state.init_event_library)
+        return run
+    return setup
+
+
+def bench_select(which):
+    def setup(fx):
+        return fx.state(which)._select_next_event_name
+    return setup
+
+
+def bench_check_requires(which):
+    def setup(fx):
+        state = fx.state(which)
+        names = [n for n, m in state.event_meta.items() if m.get('requires_check') is not None] \
+            or list(state.event_meta)
+        check = state._check_requires
+
+        def run():
+            for name in names:
+                check(name)
+        return run
+    return setup
+
+
+def setup_success_probability(fx):
+    state = fx.state()
+    formulas = [m['success_probability'] for m in state.event_meta.values()
+                if m.get('success_probability') is not None]
+    calc = state.calculate_success_probability
+
+    def run():
+        for formula in formulas:
+            calc(formula)
+    return run
+
+
+def setup_apply_effects(fx):
+    state = fx.state()
+    effects = {'体质': (1, 3), '智力': (0, 2), 'health': 5, 'magic': (1, 4)}
+    attributes = dict(state.attributes)
+
+    def run():
+        state.apply_effects(effects)
+        state.attributes.update(attributes)
+    return run
+
+
+def setup_level_ups(fx):
+    state = fx.state()
+    attributes = dict(state.attributes)
+
+    def run():
+        # 每次恰好连升两级
+        state.level = 3
+        state.experience = 400 + 500
+        state.check_and_apply_level_ups()
+        state.attributes.update(attributes)
+    return run
+
+
+def setup_boss_fight(fx):
+    rng = random.Random(1)
+    stats = {'health': 40, 'attack': 12, 'dodge': 15, 'magic': 30}
+
+    def run():
+        battle_rules.simulate_boss_fight(stats, 200, policy='random', rng=rng)
+    return run
+
+
+def setup_life(fx):
+    state = fx.state()
+    rng = random.Random(1)
+    policy = simulate.POLICIES['random']
+
+    def run():
+        state.rng.seed(rng.randrange(2**32))
+        state.reset()
+        simulate.play_life(state, policy, rng)
+    return run
+
+
+# (名称, setup, 重复次数)；名称保持稳定，基线按名称比较
+BENCHMARKS = [
+    ('library.load.small', bench_load('small', cold=False), 5),
+    ('library.load.small.cold', bench_load('small', cold=True), 5),
+    ('library.load.large', bench_load('large', cold=False), 3),
+    ('library.load.large.cold', bench_load('large', cold=True), 3),
+    ('state.select_next_event', bench_select('small'), 5),
+    ('state.select_next_event.large', bench_select('large'), 5),
+    ('state.check_requires.all', bench_check_requires('small'), 5),
+    ('state.check_requires.all.large', bench_check_requires('large'), 5),
+    ('state.success_probability.all', setup_success_probability, 5),
+    ('state.apply_effects', setup_apply_effects, 5),
+    ('state.level_ups', setup_level_ups, 5),
+    ('battle.boss_fight', setup_boss_fight, 5),
+    ('life.full_run', setup_life, 5),
+]
+
+
+def measure(func, repeat, min_time):
+    """自动选择每轮调用次数，使一轮至少耗时 min_time 秒；返回每次调用的耗时列表（秒）"""
+    timer = timeit.Timer(func, timer=time.perf_counter)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time:
+            break
+        number *= 10 if elapsed < min_time / 10 else 2
+    timings = [elapsed / number] + [t / number for t in timer.repeat(repeat - 1, number)]
+    return number, timings
+
+
+def run_benchmarks(pattern=None, large_events=LARGE_EVENTS, min_time=0.2, on_result=None):
+    """运行名称包含 pattern 的基准，返回 {名称: 结果}"""
+    fx = Fixtures(large_events)
+    results = {}
+    try:
+        for name, setup, repeat in BENCHMARKS:
+            if pattern and pattern not in name:
+                continue
+            number, timings = measure(setup(fx), repeat, min_time)
+            results[name] = {
+                'min_us': min(timings) * 1e6,
+                'median_us': statistics.median(timings) * 1e6,
+                'number': number,
+                'repeat': repeat,
+            }
+            if on_result:
+                on_result(name, results[name])
+    finally:
+        fx.close()
+    return results
+
+
+def compare(results, baseline, threshold):
+    """与基线比较（按最小耗时），返回 [(名称, 当前, 基线, 比值, 是否退化)]"""
+    rows = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        ratio = result['min_us'] / base['min_us'] if base['min_us'] else float('inf')
+        rows.append((name, result['min_us'], base['min_us'], ratio, ratio > 1 + threshold))
+    return rows
+
+
+def _format_us(us):
+    if us >= 1e6:
+        return f"{us / 1e6:.2f} s"
+    if us >= 1e3:
+        return f"{us / 1e3:.2f} ms"
+    return f"{us:.2f} µs"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='game.py bench', description='游戏引擎热点路径基准测试')
+    parser.add_argument('-k', dest='pattern', default=None, help='只运行名称包含该字符串的基准')
+    parser.add_argument('--large-events', type=int, default=LARGE_EVENTS, help='合成大事件库的事件数')
+    parser.add_argument('--min-time', type=float, default=0.2, help='每轮最短计时（秒）')
+    parser.add_argument('--json', action='store_true', help='以 JSON 输出结果')
+    parser.add_argument('--save', default=None, help='把结果保存为基线文件')
+    parser.add_argument('--compare', default=None, help='与基线文件比较')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='比基线慢超过该比例视为退化（默认 0.2）')
+    args = parser.parse_args(argv)
+
+    def show(name, result):
+        if not args.json:
+            print(f"{name:<34} {_format_us(result['min_us']):>12}  "
+                  f"(中位数 {_format_us(result['median_us'])}，{result['number']}×{result['repeat']})")
+
+    results = run_benchmarks(args.pattern, args.large_events, args.min_time, on_result=show)
+    report = {
+        'format': BENCH_FORMAT,
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': results,
+    }
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    rows = []
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+        rows = compare(results, baseline, args.threshold)
+        report['comparison'] = {
+            name: {'ratio': ratio, 'regressed': regressed}
+            for name, _, _, ratio, regressed in rows
+        }
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    elif rows:
+        print("— 与基线比较 —")
+        for name, current, base, ratio, regressed in rows:
+            mark = "❌ 退化" if regressed else "✅"
+            print(f"{name:<34} {_format_us(base):>12} → {_format_us(current):>12}  ×{ratio:.2f} {mark}")
+    return 1 if any(row[4] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
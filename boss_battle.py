@@ -1,6 +1,15 @@
 # -*- coding: utf-8 -*-
-import tkinter as tk
 import random
+import tkinter as tk
+import battle_rules
+from ui_log import LogSink
+import ui_timeline
+from ui_timeline import Timeline, Tween, Sequence, Pause, Call
+
+# 血量数字滚动到新值的时长与受击闪烁时长（毫秒）
+HEALTH_TWEEN_MS = 300
+HIT_FLASH_MS = 150
+HIT_FLASH_COLOR = '#ffffff'
 
 
 class BossBattleUI:
@@ -14,11 +23,15 @@ class BossBattleUI:
     - set_boss_persistent(new_health): 持久化 Boss 当前血量
     - update_main_attributes(): 刷新主界面属性显示
     - on_continue_game(): 关闭后继续游戏/事件
+    - get_battle_progress()（可选）: 返回中断时的 (玩家血量, Boss血量) 或 None
+    - on_battle_action(action, player_health, boss_health)（可选）: 每回合结束后记录行动与进度
+    - rng（可选）: 闪避判定用的随机数流，默认使用全局 random
     """
 
     def __init__(self, root, callbacks):
         self.root = root
         self.cb = callbacks
+        self.rng = self.cb.get('rng', random)
 
         player_stats = self.cb['get_player_stats']()
         boss_current, _ = self.cb['get_boss_persistent']()
@@ -26,8 +39,8 @@ class BossBattleUI:
         # 基础 Boss 配置（可按需扩展成参数）
         boss_stats = {
             'health': boss_current,
-            'attack': 10,
-            'dodge': 0,
+            'attack': battle_rules.BOSS_ATTACK,
+            'dodge': battle_rules.BOSS_DODGE,
         }
 
         # 初始化战斗状态
@@ -40,8 +53,18 @@ class BossBattleUI:
         self.battle_boss_attack = boss_stats['attack']
         self.battle_boss_dodge = boss_stats['dodge']
 
+        # 从中断的战斗继续
+        progress = self.cb.get('get_battle_progress', lambda: None)()
+        if progress is not None:
+            self.battle_player_health, self.battle_boss_health = progress
+
         self._build_window()
+        # 血量变化动画（不阻塞按钮；Esc 跳过）
+        self.timeline = Timeline(self.window)
+        self.window.bind('<Escape>', lambda event: self.timeline.finish_all())
         self._build_interface()
+        # 界面上当前显示（或正滚动到）的血量
+        self._shown_health = {'player': self.battle_player_health, 'boss': self.battle_boss_health}
 
         self.add_battle_log("⚔️ Boss战斗开始！")
         self.add_battle_log(
@@ -167,6 +190,7 @@ class BossBattleUI:
             state='disabled'
         )
         self.battle_log_text.pack(padx=20, pady=10)
+        self.battle_log = LogSink(self.battle_log_text)
 
         self.battle_action_frame = tk.Frame(right_frame, bg='#34495e')
         self.battle_action_frame.pack(fill='x', padx=20, pady=10)
@@ -199,20 +223,36 @@ class BossBattleUI:
 
     # ---- 逻辑与事件 ----
     def add_battle_log(self, message):
-        self.battle_log_text.config(state='normal')
-        self.battle_log_text.insert('end', f"{message}\n")
-        self.battle_log_text.see('end')
-        self.battle_log_text.config(state='disabled')
+        self.battle_log.write(message)
 
     def update_battle_display(self):
-        self.player_health_label.config(text=f"❤️ 血量: {self.battle_player_health}")
+        self._animate_health('player', self.player_health_label, self.battle_player_health)
         self.player_magic_label.config(text=f"🔮 魔法: {self.battle_player_magic}")
         self.player_attack_label.config(text=f"⚔️ 攻击: {self.battle_player_attack}")
-        self.boss_health_label.config(text=f"❤️ 血量: {self.battle_boss_health}")
+        self._animate_health('boss', self.boss_health_label, self.battle_boss_health)
         self.boss_attack_label.config(text=f"⚔️ 攻击: {self.battle_boss_attack}")
 
+    def _animate_health(self, who, label, health):
+        """血量数字滚动到新值，受到伤害时闪烁一下"""
+        shown = self._shown_health[who]
+        if health == shown:
+            return
+        self._shown_health[who] = health
+
+        def apply(value):
+            label.config(text=f"❤️ 血量: {round(value)}")
+
+        self.timeline.play(Tween(HEALTH_TWEEN_MS, apply, shown, health), key=f'{who}.health')
+        if health < shown and ui_timeline.speed() > 0:
+            # 先结束上一次闪烁，取到的才是原本的颜色
+            flash = f'{who}.flash'
+            self.timeline.finish(flash)
+            color = label.cget('fg')
+            self.timeline.play(Sequence(Call(label.config, fg=HIT_FLASH_COLOR), Pause(HIT_FLASH_MS),
+                                        Call(label.config, fg=color)), key=flash)
+
     def player_attack(self):
-        if random.randint(1, 100) <= self.battle_boss_dodge:
+        if battle_rules.is_dodged(self.battle_boss_dodge, self.rng):
             self.add_battle_log("Boss闪避了你的攻击！")
         else:
             damage = self.battle_player_attack
@@ -224,6 +264,7 @@ class BossBattleUI:
         if self.battle_boss_health <= 0:
             self.battle_boss_health = 0
             self.add_battle_log("🎉 你击败了Boss！")
+            self._report_action('attack')
             self.end_battle(True)
             return
 
@@ -234,12 +275,11 @@ class BossBattleUI:
         self.boss_turn(defending=True)
 
     def boss_turn(self, defending=False):
-        if random.randint(1, 100) <= self.battle_player_dodge:
+        if battle_rules.is_dodged(self.battle_player_dodge, self.rng):
             self.add_battle_log("你闪避了Boss的攻击！")
         else:
-            damage = self.battle_boss_attack
+            damage = battle_rules.boss_damage(self.battle_boss_attack, defending)
             if defending:
-                damage = damage // 2
                 self.add_battle_log(f"Boss攻击了你，但由于防御只造成{damage}点伤害！")
             else:
                 self.add_battle_log(f"Boss攻击了你，造成{damage}点伤害！")
@@ -251,12 +291,22 @@ class BossBattleUI:
         if self.battle_player_health <= 0:
             self.battle_player_health = 0
             self.add_battle_log("💀 你被Boss击败了！")
+            self._report_action('defend' if defending else 'attack')
             self.end_battle(False)
             return
 
+        self._report_action('defend' if defending else 'attack')
         self.add_battle_log("轮到你的回合了...")
 
+    def _report_action(self, action):
+        on_action = self.cb.get('on_battle_action')
+        if on_action is not None:
+            on_action(action, self.battle_player_health, self.battle_boss_health)
+
     def end_battle(self, victory):
+        # 结算前显示最终血量
+        self.timeline.finish_all()
+
         # 同步持久化 Boss 血量
         self.cb['set_boss_persistent'](self.battle_boss_health)
 
@@ -266,8 +316,8 @@ class BossBattleUI:
 
         if victory:
             self.add_battle_log("🎉 战斗胜利！你获得了经验奖励！")
-            exp_delta = 50
-            self.cb['on_log']("Boss战斗胜利！获得50经验值")
+            exp_delta = battle_rules.VICTORY_EXP
+            self.cb['on_log'](f"Boss战斗胜利！获得{exp_delta}经验值")
             # Boss 被击败则重置血量
             boss_current, boss_max = self.cb['get_boss_persistent']()
             if self.battle_boss_health <= 0:
@@ -275,8 +325,8 @@ class BossBattleUI:
                 self.add_battle_log("Boss已被击败，血量已重置！")
         else:
             self.add_battle_log("💀 战斗失败！但你从中获得了经验...")
-            exp_delta = 20
-            self.cb['on_log']("Boss战斗失败，获得20经验值")
+            exp_delta = battle_rules.DEFEAT_EXP
+            self.cb['on_log'](f"Boss战斗失败，获得{exp_delta}经验值")
             self.add_battle_log(f"Boss剩余血量：{self.battle_boss_health}")
 
         # 通知宿主经验变化
@@ -297,6 +347,8 @@ class BossBattleUI:
         close_button.pack(fill='x', pady=10)
 
     def close_window(self):
+        self.battle_log.cancel()
+        self.timeline.cancel_all()
         self.window.destroy()
         # 回到宿主继续随机事件
         self.cb['on_continue_game']()
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""可复用的按钮栏：选项按钮、继续/重新开始按钮与提示标签共用一组组件。
+
+原先每一步都 destroy() 掉 choice_frame 的全部子组件再新建按钮。ButtonBar
+保留已创建的按钮，只就地修改文字、颜色、命令与显示状态；布局只在按钮
+数量或间距变化时调整。
+"""
+import tkinter as tk
+
+# 按钮的默认外观
+BUTTON_DEFAULTS = {
+    'font': ("Arial", 12, "bold"),
+    'bg': '#3498db',
+    'fg': 'white',
+    'relief': 'raised',
+    'bd': 3,
+    'height': 2,
+}
+
+
+class ButtonBar:
+    """在 parent 中按顺序纵向排列的一组按钮，外加一条可选的提示标签"""
+
+    def __init__(self, parent, label_bg='#34495e', label_fg='#f39c12', label_font=("Arial", 10, "bold")):
+        self.parent = parent
+        self.buttons = []
+        self._options = []  # 每个按钮上次设置的选项，只提交变化的部分
+        self._packed = []  # 每个按钮当前的 pady；未显示时为 None
+        self.label = tk.Label(parent, font=label_font, bg=label_bg, fg=label_fg)
+        self._label_shown = False
+
+    def show(self, specs, warning=None):
+        """显示 specs 描述的按钮（其余隐藏）。
+
+        specs：[{'text':..., 'command':..., 'pady': 5, 其余为 tk.Button 选项}, ...]
+        warning：按钮上方的提示文字；None 表示不显示
+        """
+        self._show_label(warning)
+        for i, spec in enumerate(specs):
+            options = dict(BUTTON_DEFAULTS)
+            options.update(spec)
+            pady = options.pop('pady', 5)
+            if i == len(self.buttons):
+                self.buttons.append(tk.Button(self.parent, **options))
+                self._options.append(options)
+                self._packed.append(None)
+            else:
+                last = self._options[i]
+                changed = {k: v for k, v in options.items() if last.get(k) != v}
+                if changed:
+                    self.buttons[i].configure(**changed)
+                    last.update(changed)
+            if self._packed[i] is None:
+                self.buttons[i].pack(fill='x', pady=pady)
+                self._packed[i] = pady
+            elif self._packed[i] != pady:
+                self.buttons[i].pack_configure(pady=pady)
+                self._packed[i] = pady
+        for i in range(len(specs), len(self.buttons)):
+            if self._packed[i] is not None:
+                self.buttons[i].pack_forget()
+                self._packed[i] = None
+
+    def clear(self):
+        """隐藏全部按钮与提示"""
+        self.show([])
+
+    def _show_label(self, text):
+        if text is None:
+            if self._label_shown:
+                self.label.pack_forget()
+                self._label_shown = False
+            return
+        if self.label.cget('text') != text:
+            self.label.configure(text=text)
+        if not self._label_shown:
+            # 提示总在第一个按钮之前
+            if self.buttons and self._packed[0] is not None:
+                self.label.pack(fill='x', pady=(0, 8), before=self.buttons[0])
+            else:
+                self.label.pack(fill='x', pady=(0, 8))
+            self._label_shown = True
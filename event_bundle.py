@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+"""事件库预编译缓存。
+
+init_event_library 原本每次启动都要 json.load、把效果区间转成元组、
+重建 event_meta 并解析全部表达式。这里把这些结果（已规范化的事件库、
+静态元数据与表达式 AST）用 marshal 写成 events.json 旁边的
+events.json.bundle，下次启动一次读入即可；源文件的 mtime/大小变化且
+内容哈希也变化时自动重建。
+
+缓存中事件正文按事件分别存放，启动时只读入索引，正文由 LazyEventLibrary
+在事件被抽中时从 mmap 中解码。
+"""
+import gc
+import hashlib
+import json
+import marshal
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from event_expr import ExpressionError, build, build_requires, parse, parse_requires
+from event_store import LazyEventLibrary, pack_bodies
+
+# 缓存格式版本：规范化规则或字段变化时递增
+BUNDLE_VERSION = 2
+BUNDLE_MAGIC = b'EVB2'
+BUNDLE_SUFFIX = '.bundle'
+
+_LEN = struct.Struct('<Q')
+
+
+def bundle_path(events_file):
+    return events_file + BUNDLE_SUFFIX
+
+
+# ---- 规范化 ----
+def _tuple_ranges(effects):
+    """将JSON中的列表格式转换为元组格式（为了兼容现有代码）"""
+    for effect_name, effect_value in effects.items():
+        if isinstance(effect_value, list) and len(effect_value) == 2:
+            effects[effect_name] = tuple(effect_value)
+
+
+def _digest(event_data):
+    # marshal 第 2 版不含对象引用，同样的内容总是得到同样的字节
+    return hashlib.blake2b(marshal.dumps(event_data, 2), digest_size=16).digest()
+
+
+def normalize_library(library):
+    """就地规范化事件库，返回静态元数据 {name: meta}（不含编译后的函数）"""
+    for event_data in library.values():
+        # 处理有choices字段的事件
+        for choice in event_data.get('choices', []):
+            _tuple_ranges(choice['effects'])
+        # 处理auto_roll事件
+        if 'auto_roll' in event_data:
+            auto_roll = event_data['auto_roll']
+            _tuple_ranges(auto_roll.get('success_effects', {}))
+            _tuple_ranges(auto_roll.get('failure_effects', {}))
+
+    # 解析扩展元数据（向后兼容默认值）
+    event_meta = {}
+    for event_name, event_data in library.items():
+        meta = {
+            'tags': event_data.get('tags', []),
+            'weight': int(event_data.get('weight', 1) or 1),
+            'cooldown': int(event_data.get('cooldown', 0) or 0),
+            'once': bool(event_data.get('once', False)),
+            'min_level': int(event_data.get('min_level', 1) or 1),
+            'max_level': int(event_data.get('max_level', 999) or 999),
+            'requires': event_data.get('requires', {}),
+            'excludes': event_data.get('excludes', []),
+            'has_choices': 'choices' in event_data,
+            # 内容摘要：热更新时据此判断事件是否变化，无需解码正文
+            'digest': _digest(event_data),
+        }
+        # 表达式只解析一次，AST 可随缓存一起序列化
+        try:
+            meta['requires_parsed'] = parse_requires(meta['requires'])
+            if 'auto_roll' in event_data:
+                meta['success_ast'] = parse(event_data['auto_roll']['success_probability'])
+        except ExpressionError as e:
+            raise ExpressionError(f"事件「{event_name}」表达式错误：{e}") from e
+        event_meta[event_name] = meta
+    return event_meta
+
+
+def compile_meta(event_meta, names):
+    """把元数据中的表达式 AST 编译成闭包（requires_check / success_probability）"""
+    names = frozenset(names)
+    for event_name, meta in event_meta.items():
+        try:
+            meta['requires_check'] = build_requires(meta.get('requires_parsed'), names)
+            if 'success_ast' in meta:
+                meta['success_probability'] = build(meta['success_ast'], names)
+        except ExpressionError as e:
+            raise ExpressionError(f"事件「{event_name}」表达式错误：{e}") from e
+    return event_meta
+
+
+# ---- 缓存读写 ----
+# 文件布局：MAGIC | 头部长度 | 头部 | 索引长度 | 索引 | 正文区
+# 索引（名称、偏移、静态元数据）启动时整体读入；正文区留在 mmap 中按需解码。
+def source_version(events_file):
+    """事件文件的版本标识 (mtime, 大小)"""
+    st = os.stat(events_file)
+    return st.st_mtime_ns, st.st_size
+
+
+def _interpreter_key():
+    # marshal 格式随解释器版本变化，偏移数组按本机字节序存放
+    return marshal.version, sys.version_info[:2], sys.byteorder
+
+
+def read_bundle(events_file):
+    """读取仍然有效的缓存，返回 (LazyEventLibrary, meta)；无效或不存在时返回 None"""
+    try:
+        with open(bundle_path(events_file), 'rb') as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    try:
+        if buffer[:4] != BUNDLE_MAGIC:
+            raise ValueError("bad magic")
+        (header_len,) = _LEN.unpack_from(buffer, 4)
+        payload_start = 4 + _LEN.size + header_len
+        header = marshal.loads(buffer[4 + _LEN.size:payload_start])
+        if header.get('version') != BUNDLE_VERSION or header.get('interpreter') != _interpreter_key():
+            raise ValueError("stale format")
+        source_key = source_version(events_file)
+        if header.get('source') != source_key:
+            # mtime 变了但内容可能没变（如 git checkout），再比哈希
+            with open(events_file, 'rb') as f:
+                source_bytes = f.read()
+            if hashlib.sha256(source_bytes).hexdigest() != header.get('sha256'):
+                raise ValueError("stale source")
+            _write(events_file, source_key, source_bytes, buffer[payload_start:])
+        (index_len,) = _LEN.unpack_from(buffer, payload_start)
+        index_start = payload_start + _LEN.size
+        index = _loads_without_gc(buffer[index_start:index_start + index_len])
+        offsets = array('Q')
+        offsets.frombytes(index['offsets'])
+        library = LazyEventLibrary(buffer, index['names'], offsets, index_start + index_len)
+        return library, index['meta']
+    except (OSError, ValueError, EOFError, TypeError, KeyError, struct.error):
+        buffer.close()
+        return None
+
+
+def _loads_without_gc(payload_bytes):
+    """反序列化大量小对象时暂停循环 GC（只生成无环的新对象，GC 扫描纯属浪费）"""
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return marshal.loads(payload_bytes)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def write_bundle(events_file, source_key, source_bytes, library, event_meta):
+    """原子写入缓存；目录不可写时静默跳过。source_key 须在读取源文件之前取得"""
+    names, offsets, bodies = pack_bodies(library)
+    index = marshal.dumps({'names': names, 'offsets': offsets.tobytes(), 'meta': event_meta})
+    _write(events_file, source_key, source_bytes, _LEN.pack(len(index)) + index + bodies)
+
+
+def _write(events_file, source_key, source_bytes, payload):
+    header = marshal.dumps({
+        'version': BUNDLE_VERSION,
+        'interpreter': _interpreter_key(),
+        'source': source_key,
+        'sha256': hashlib.sha256(source_bytes).hexdigest(),
+    })
+    target = bundle_path(events_file)
+    tmp = f"{target}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, 'wb') as f:
+            f.write(BUNDLE_MAGIC + _LEN.pack(len(header)) + header)
+            f.write(payload)
+        os.replace(tmp, target)
+    except OSError:
+        # 目录只读，或（Windows 上）旧缓存仍被映射而无法替换
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+
+
+def compile_events_file(events_file):
+    """从 JSON 重新编译事件库并写入缓存，返回 (library 字典, meta)"""
+    # 先取 mtime 再读内容：读取期间被改写时缓存会被判为过期，而不是误用
+    source_key = source_version(events_file)
+    with open(events_file, 'rb') as f:
+        source_bytes = f.read()
+    library = json.loads(source_bytes.decode('utf-8'))
+    event_meta = normalize_library(library)
+    write_bundle(events_file, source_key, source_bytes, library, event_meta)
+    return library, event_meta
+
+
+def load_event_library(events_file, use_cache=True):
+    """载入事件库：优先使用有效缓存，否则从 JSON 编译并刷新缓存。
+
+    返回 (library, meta)。library 通常是按需解码的 LazyEventLibrary；
+    缓存无法写入时退回普通字典。meta 中的表达式仍是 AST，需再调用 compile_meta。
+    """
+    if use_cache:
+        cached = read_bundle(events_file)
+        if cached is not None:
+            return cached
+    library, event_meta = compile_events_file(events_file)
+    if use_cache:
+        # 改用刚写好的缓存，完整解码的字典随即释放
+        cached = read_bundle(events_file)
+        if cached is not None:
+            return cached
+    return library, event_meta
+
+
+def main(argv=None):
+    """python game.py compile [events.json ...]：强制重建缓存"""
+    from game_state import DEFAULT_EVENTS_FILE
+    files = list(argv if argv is not None else sys.argv[1:]) or [DEFAULT_EVENTS_FILE]
+    for events_file in files:
+        library, _ = compile_events_file(events_file)
+        print(f"已编译 {events_file} -> {bundle_path(events_file)}（{len(library)} 个事件）")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+"""事件表达式：success_probability 公式与 requires 属性条件的安全编译器。
+
+表达式在载入事件库时解析一次，编译成接收属性字典的闭包，之后每次求值
+只是几次函数调用，不再 str.replace + eval，也无法执行任意 Python。
+
+语法：
+- 数字、属性名（如 智力）、括号
+- 算术：+ - * / // %，一元负号
+- 比较：< <= > >= == !=
+- 函数：min(a, b, ...)、max(a, b, ...)、clamp(x, lo, hi)、abs(x)
+
+requires 中的属性条件写作 ">=2"、"<智力+1" 或单个值（表示相等）。
+"""
+import functools
+import operator
+import re
+
+
+class ExpressionError(ValueError):
+    """表达式语法或名称错误"""
+
+
+_TOKEN_RE = re.compile(r'\s*(?:(\d+(?:\.\d+)?)|([^\W\d]\w*)|(//|<=|>=|==|!=|[-+*/%()<>,]))')
+
+_BINARY_OPS = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': operator.truediv,
+    '//': operator.floordiv,
+    '%': operator.mod,
+}
+
+_COMPARE_OPS = {
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '==': operator.eq,
+    '!=': operator.ne,
+}
+
+# 二元运算符优先级（比较最低且不可连写）
+_PRECEDENCE = {op: 1 for op in _COMPARE_OPS}
+_PRECEDENCE.update({'+': 2, '-': 2, '*': 3, '/': 3, '//': 3, '%': 3})
+
+
+def _clamp(x, lo, hi):
+    return max(lo, min(hi, x))
+
+
+_FUNCTIONS = {
+    'min': (min, 1, None),
+    'max': (max, 1, None),
+    'clamp': (_clamp, 3, 3),
+    'abs': (abs, 1, 1),
+}
+
+
+# ---- 解析 ----
+def tokenize(source):
+    tokens = []
+    pos = 0
+    source = source.rstrip()
+    while pos < len(source):
+        m = _TOKEN_RE.match(source, pos)
+        if not m or m.end() == pos:
+            raise ExpressionError(f"无法识别的字符 {source[pos:].strip()[:1]!r}（位置 {pos}）")
+        number, name, op = m.groups()
+        if number is not None:
+            tokens.append(('num', float(number) if '.' in number else int(number)))
+        elif name is not None:
+            tokens.append(('name', name))
+        else:
+            tokens.append(('op', op))
+        pos = m.end()
+    return tokens
+
+
+class _Parser:
+    def __init__(self, source):
+        self.source = source
+        self.tokens = tokenize(source)
+        self.pos = 0
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def next(self):
+        token = self.peek()
+        self.pos += 1
+        return token
+
+    def expect(self, op):
+        kind, value = self.next()
+        if kind != 'op' or value != op:
+            raise ExpressionError(f"期望 {op!r}，得到 {value!r}")
+
+    def parse(self):
+        if not self.tokens:
+            raise ExpressionError("表达式为空")
+        node = self.expression(0)
+        if self.pos != len(self.tokens):
+            raise ExpressionError(f"多余的内容 {self.peek()[1]!r}")
+        return node
+
+    def expression(self, min_prec):
+        left = self.unary()
+        while True:
+            kind, op = self.peek()
+            if kind != 'op' or op not in _PRECEDENCE or _PRECEDENCE[op] <= min_prec:
+                return left
+            self.pos += 1
+            prec = _PRECEDENCE[op]
+            right = self.expression(prec)
+            if op in _COMPARE_OPS:
+                if left[0] == 'cmp' or right[0] == 'cmp':
+                    raise ExpressionError("比较运算不能连写")
+                left = ('cmp', op, left, right)
+            else:
+                left = ('bin', op, left, right)
+
+    def unary(self):
+        kind, value = self.peek()
+        if kind == 'op' and value in ('-', '+'):
+            self.pos += 1
+            operand = self.unary()
+            return ('neg', operand) if value == '-' else operand
+        return self.primary()
+
+    def primary(self):
+        kind, value = self.next()
+        if kind == 'num':
+            return ('num', value)
+        if kind == 'name':
+            if self.peek() == ('op', '('):
+                self.pos += 1
+                args = []
+                if self.peek() != ('op', ')'):
+                    args.append(self.expression(0))
+                    while self.peek() == ('op', ','):
+                        self.pos += 1
+                        args.append(self.expression(0))
+                self.expect(')')
+                return ('call', value, tuple(args))
+            return ('var', value)
+        if kind == 'op' and value == '(':
+            node = self.expression(0)
+            self.expect(')')
+            return node
+        raise ExpressionError(f"意外的 {value!r}" if value is not None else "表达式不完整")
+
+
+@functools.lru_cache(maxsize=4096)
+def parse(source):
+    """把表达式源码解析成嵌套元组 AST"""
+    return _Parser(str(source)).parse()
+
+
+def names_in(node):
+    """返回 AST 中引用的全部变量名"""
+    kind = node[0]
+    if kind == 'var':
+        return {node[1]}
+    if kind == 'num':
+        return set()
+    if kind == 'neg':
+        return names_in(node[1])
+    if kind == 'call':
+        return set().union(*(names_in(a) for a in node[2])) if node[2] else set()
+    return names_in(node[2]) | names_in(node[3])
+
+
+# ---- 编译 ----
+def build(node, names=None):
+    """把 AST 编译成 fn(attributes) 闭包；names 非空时校验变量名"""
+    kind = node[0]
+    if kind == 'num':
+        const = node[1]
+        return lambda a: const
+    if kind == 'var':
+        name = node[1]
+        if names is not None and name not in names:
+            raise ExpressionError(f"未知名称 {name!r}")
+        return lambda a: a[name]
+    if kind == 'neg':
+        inner = node[1]
+        if inner[0] == 'num':
+            const = -inner[1]
+            return lambda a: const
+        f = build(inner, names)
+        return lambda a: -f(a)
+    if kind == 'call':
+        fname, args = node[1], node[2]
+        if fname not in _FUNCTIONS:
+            raise ExpressionError(f"未知函数 {fname!r}")
+        func, min_args, max_args = _FUNCTIONS[fname]
+        if len(args) < min_args or (max_args is not None and len(args) > max_args):
+            raise ExpressionError(f"函数 {fname} 参数个数错误")
+        fs = tuple(build(arg, names) for arg in args)
+        if len(fs) == 1 and fname in ('min', 'max'):
+            return fs[0]
+        if len(fs) == 1:
+            f = fs[0]
+            return lambda a: func(f(a))
+        if len(fs) == 2:
+            f1, f2 = fs
+            return lambda a: func(f1(a), f2(a))
+        return lambda a: func(*[f(a) for f in fs])
+
+    op, left, right = node[1], node[2], node[3]
+    fn = _COMPARE_OPS[op] if kind == 'cmp' else _BINARY_OPS[op]
+    # 常见形态特化：属性 与 常数 之间的运算
+    if left[0] == 'var' and right[0] == 'num':
+        build(left, names)
+        name, const = left[1], right[1]
+        return lambda a: fn(a[name], const)
+    if left[0] == 'num' and right[0] == 'num':
+        try:
+            value = fn(left[1], right[1])
+        except ZeroDivisionError:
+            raise ExpressionError("除以零") from None
+        return lambda a: value
+    fl = build(left, names)
+    fr = build(right, names)
+    return lambda a: fn(fl(a), fr(a))
+
+
+def compile_expression(source, names=None):
+    """解析并编译表达式，返回 fn(attributes)（同一公式只编译一次）"""
+    return _compile_cached(str(source), frozenset(names) if names is not None else None)
+
+
+@functools.lru_cache(maxsize=4096)
+def _compile_cached(source, names):
+    return build(parse(source), names)
+
+
+def parse_condition(attr_name, source):
+    """把 requires 中的单个属性条件（">=2" 等）解析成比较 AST"""
+    text = str(source).strip()
+    for op in ('>=', '<=', '==', '!=', '>', '<'):
+        if text.startswith(op):
+            rhs = text[len(op):]
+            break
+    else:
+        op, rhs = '==', text
+    return ('cmp', op, ('var', attr_name), parse(rhs))
+
+
+def compile_condition(attr_name, source, names=None):
+    """编译单个属性条件，返回 fn(attributes) -> bool"""
+    if names is not None and attr_name not in names:
+        raise ExpressionError(f"未知属性 {attr_name!r}")
+    return build(parse_condition(attr_name, source), frozenset(names) if names is not None else None)
+
+
+def parse_requires(requires):
+    """把 requires 解析成可序列化的 (条件AST元组, flags_all, flags_any)；无条件时返回 None"""
+    if not requires:
+        return None
+    if not isinstance(requires, dict):
+        raise ExpressionError("requires 必须是对象")
+    conditions = tuple(
+        parse_condition(attr_name, expr)
+        for attr_name, expr in (requires.get('attributes', {}) or {}).items()
+    )
+    flags_all = tuple(requires.get('flags_all', []) or [])
+    flags_any = tuple(requires.get('flags_any', []) or [])
+    return conditions, flags_all, flags_any
+
+
+def build_requires(parsed, names=None):
+    """把 parse_requires 的结果编译成 fn(attributes, flags) -> bool；无条件时返回 None"""
+    if parsed is None:
+        return None
+    names = frozenset(names) if names is not None else None
+    condition_asts, flags_all, flags_any = parsed
+    for node in condition_asts:
+        if names is not None and node[2][1] not in names:
+            raise ExpressionError(f"未知属性 {node[2][1]!r}")
+    conditions = tuple(build(node, names) for node in condition_asts)
+
+    def check(attributes, flags):
+        for cond in conditions:
+            if not cond(attributes):
+                return False
+        for flag in flags_all:
+            if flag not in flags:
+                return False
+        if flags_any and not any(flag in flags for flag in flags_any):
+            return False
+        return True
+
+    return check
+
+
+def compile_requires(requires, names=None):
+    """编译整个 requires，返回 fn(attributes, flags) -> bool；无条件时返回 None"""
+    return build_requires(parse_requires(requires), names)
@@ -0,0 +1,294 @@
+# -*- coding: utf-8 -*-
+"""事件可用性索引：把 _select_next_event_name 的全库扫描变成增量维护。
+
+- 静态部分（载入时构建）：事件池归属、stage= 标签分区、等级区间的进出点、
+  requires 依赖的属性名与旗标。
+- 动态部分（随局面变化）：once 已触发、冷却到期队列、前置条件结果。
+  只有依赖项真的发生变化的事件才会重新求值 requires。
+- 每个候选池是一个 WeightedSampler，事件进出候选池即改权重，抽样 O(log n)。
+"""
+import heapq
+import random
+
+from event_expr import ExpressionError, names_in, parse_requires
+from weighted_sampler import WeightedSampler
+
+POOL_POSITIVE = 'positive'
+POOL_NEGATIVE = 'negative'
+
+
+class _Entry:
+    __slots__ = ('name', 'pool', 'weight', 'in_stage', 'level_ok', 'once_ok', 'cool_ok', 'req_ok')
+
+    def __init__(self, name, pool, weight):
+        self.name = name
+        self.pool = pool
+        self.weight = weight  # 可用时在抽样器中的权重
+        self.in_stage = False
+        self.level_ok = False
+        self.once_ok = True
+        self.cool_ok = True
+        self.req_ok = True
+
+    def eligible(self):
+        return self.in_stage and self.level_ok and self.once_ok and self.cool_ok and self.req_ok
+
+
+class EventIndex:
+    """GameState 的事件候选池索引"""
+
+    def __init__(self, state):
+        self.state = state
+        self.build()
+
+    # ---- 静态结构 ----
+    def build(self):
+        """按当前事件库重建静态分区"""
+        state = self.state
+        library = state.event_library
+
+        self.all_names = list(library.keys())
+        self.entries = {}
+        # 抽样器中的插入顺序即原始候选顺序（保证加权抽样结果与全量扫描一致）
+        self.samplers = {POOL_POSITIVE: WeightedSampler(), POOL_NEGATIVE: WeightedSampler()}
+        # 阶段分区：无 stage= 标签的事件放入 unstaged，各阶段通用
+        self.stage_members = {}
+        self.unstaged = set()
+        # 等级区间：进入点 min_level、离开点 max_level+1
+        self.level_changes = {}
+        # requires 依赖
+        self.attr_dependents = {}
+        self.flag_dependents = {}
+
+        for name in self.all_names:
+            if self._pool_of(name) == POOL_POSITIVE:
+                self._register(name, POOL_POSITIVE)
+        for name in state.negative_events:
+            if name in library:
+                self._register(name, POOL_NEGATIVE)
+
+        self.rebuild()
+
+    def _pool_of(self, name):
+        state = self.state
+        if name in state.negative_events:
+            return POOL_NEGATIVE
+        m = state.event_meta.get(name)
+        # 元数据中已记录是否有选项，免得为判断池归属解码事件正文
+        if m is not None and 'has_choices' in m:
+            has_choices = m['has_choices']
+        else:
+            has_choices = 'choices' in state.event_library[name]
+        if has_choices:
+            return POOL_POSITIVE
+        return None
+
+    def _register(self, name, pool):
+        """登记事件的静态信息（候选池、阶段、等级区间、依赖）"""
+        m = self.state.event_meta.get(name, {})
+        self.entries[name] = _Entry(name, pool, max(1, int(m.get('weight', 1))))
+        self.samplers[pool].add(name, 0)
+
+        stage_tags = self._stage_tags(m)
+        for stage_name in stage_tags:
+            self.stage_members.setdefault(stage_name, set()).add(name)
+        if not stage_tags:
+            self.unstaged.add(name)
+        for level in self._level_points(m):
+            self.level_changes.setdefault(level, []).append(name)
+        attrs, flags = self._dependencies(m)
+        for attr_name in attrs:
+            self.attr_dependents.setdefault(attr_name, set()).add(name)
+        for flag in flags:
+            self.flag_dependents.setdefault(flag, set()).add(name)
+
+    def _unregister(self, name, m):
+        """撤销 _register（m 为登记时使用的元数据）"""
+        entry = self.entries.pop(name, None)
+        if entry is None:
+            return
+        self.samplers[entry.pool].set_weight(name, 0)
+        for stage_name in self._stage_tags(m):
+            self.stage_members.get(stage_name, set()).discard(name)
+        self.unstaged.discard(name)
+        for level in self._level_points(m):
+            points = self.level_changes.get(level, [])
+            if name in points:
+                points.remove(name)
+        attrs, flags = self._dependencies(m)
+        for attr_name in attrs:
+            self.attr_dependents.get(attr_name, set()).discard(name)
+        for flag in flags:
+            self.flag_dependents.get(flag, set()).discard(name)
+
+    @staticmethod
+    def _stage_tags(m):
+        return [t[len('stage='):] for t in (m.get('tags', []) or [])
+                if isinstance(t, str) and t.startswith('stage=')]
+
+    @staticmethod
+    def _level_points(m):
+        return m.get('min_level', 1), m.get('max_level', 999) + 1
+
+    @staticmethod
+    def _dependencies(m):
+        """requires 依赖的属性名（含条件右侧引用的属性，如 ">=智力"）与旗标"""
+        requires = m.get('requires', {})
+        if not requires:
+            return (), ()
+        parsed = m.get('requires_parsed')
+        if parsed is None:
+            try:
+                parsed = parse_requires(requires)
+            except ExpressionError:
+                parsed = None
+        if parsed is None:
+            attrs = tuple(requires.get('attributes', {}) or {})
+        else:
+            names = set()
+            for node in parsed[0]:
+                names |= names_in(node)
+            attrs = tuple(sorted(names))
+        flags = tuple(requires.get('flags_all', []) or []) + tuple(requires.get('flags_any', []) or [])
+        return attrs, flags
+
+    def update_events(self, old_meta):
+        """事件被新增/修改/删除后增量更新索引。
+
+        old_meta：{name: 修改前的元数据}，新增事件对应 {}；调用前 state 中的
+        event_library / event_meta 须已更新为新内容。
+        """
+        state = self.state
+        library = state.event_library
+        for name, m in old_meta.items():
+            self._unregister(name, m)
+            if name in library:
+                if name not in self.all_names:
+                    self.all_names.append(name)
+                pool = self._pool_of(name)
+                if pool is not None:
+                    self._register(name, pool)
+                    self._refresh(self.entries[name])
+            elif name in self.all_names:
+                self.all_names.remove(name)
+
+    # ---- 动态状态 ----
+    def rebuild(self):
+        """按 state 当前局面完整重算动态状态（新一局或外部大改后调用）"""
+        state = self.state
+        self.cooldown_queue = []
+        self.stage_name = state.current_stage()['name']
+        self.level = state._get_progress_level()
+        self.attr_snapshot = dict(state.attributes)
+        self.flags_seen = set(state.flags)
+        for entry in self.entries.values():
+            self._refresh(entry)
+
+    def _refresh(self, entry):
+        """按 state 当前局面重算单个事件的全部动态条件"""
+        state = self.state
+        name = entry.name
+        m = state.event_meta.get(name, {})
+        entry.in_stage = name in self.unstaged or name in self.stage_members.get(self.stage_name, ())
+        entry.level_ok = self._level_ok(m)
+        entry.once_ok = not (m.get('once') and state.event_trigger_count.get(name, 0) > 0)
+        entry.cool_ok = self._cool_ok(name, m, state.event_count)
+        entry.req_ok = state._check_requires(name)
+        self._place(entry)
+
+    def _level_ok(self, m):
+        return m.get('min_level', 1) <= self.level <= m.get('max_level', 999)
+
+    def _cool_ok(self, name, m, event_count):
+        """判断冷却；未到期时登记到期时间"""
+        ready_at = self.state.event_last_seen.get(name, -10**9) + m.get('cooldown', 0)
+        if event_count < ready_at:
+            heapq.heappush(self.cooldown_queue, (ready_at, name))
+            return False
+        return True
+
+    def _place(self, entry):
+        self.samplers[entry.pool].set_weight(entry.name, entry.weight if entry.eligible() else 0)
+
+    def sync(self):
+        """在抽取前把索引同步到 state 的最新局面"""
+        state = self.state
+        entries = self.entries
+        meta = state.event_meta
+
+        # 阶段切换
+        stage_name = state.current_stage()['name']
+        if stage_name != self.stage_name:
+            old = self.stage_members.get(self.stage_name, set())
+            new = self.stage_members.get(stage_name, set())
+            self.stage_name = stage_name
+            for name in old - new:
+                entries[name].in_stage = False
+                self._place(entries[name])
+            for name in new - old:
+                entries[name].in_stage = True
+                self._place(entries[name])
+
+        # 等级变化：只处理跨过区间端点的事件
+        level = state._get_progress_level()
+        if level != self.level:
+            if level > self.level:
+                changed = [n for lv in range(self.level + 1, level + 1) for n in self.level_changes.get(lv, ())]
+            else:
+                changed = list(entries)
+            self.level = level
+            for name in changed:
+                entry = entries[name]
+                entry.level_ok = self._level_ok(meta.get(name, {}))
+                self._place(entry)
+
+        # 冷却到期
+        queue = self.cooldown_queue
+        while queue and queue[0][0] <= state.event_count:
+            _, name = heapq.heappop(queue)
+            entry = entries.get(name)
+            if entry is not None and not entry.cool_ok:
+                entry.cool_ok = self._cool_ok(name, meta.get(name, {}), state.event_count)
+                self._place(entry)
+
+        # 属性变化：只重算依赖这些属性的 requires
+        dirty = set()
+        snapshot = self.attr_snapshot
+        for attr_name, value in state.attributes.items():
+            if snapshot.get(attr_name) != value:
+                snapshot[attr_name] = value
+                dirty.update(self.attr_dependents.get(attr_name, ()))
+        # 新旗标
+        if len(state.flags) != len(self.flags_seen):
+            new_flags = state.flags - self.flags_seen
+            self.flags_seen |= new_flags
+            for flag in new_flags:
+                dirty.update(self.flag_dependents.get(flag, ()))
+        for name in dirty:
+            entry = entries[name]
+            entry.req_ok = state._check_requires(name)
+            self._place(entry)
+
+    def record_trigger(self, name):
+        """事件被抽中后更新 once 与冷却状态"""
+        entry = self.entries.get(name)
+        if entry is None:
+            return
+        m = self.state.event_meta.get(name, {})
+        if m.get('once'):
+            entry.once_ok = False
+        # 抽中当次的 event_count 已计入，冷却从下一次抽取开始判定
+        entry.cool_ok = self._cool_ok(name, m, self.state.event_count + 1)
+        self._place(entry)
+
+    def candidates(self, pool):
+        """返回候选池中当前可用的事件名（保持原始顺序，调试用）"""
+        sampler = self.samplers[pool]
+        return [name for name in sampler.keys if sampler.weight(name)]
+
+    def has_candidates(self, pool):
+        return self.samplers[pool].total > 0
+
+    def sample(self, pool, rng=random):
+        """按权重从候选池抽取一个事件名；候选池为空时返回 None"""
+        return self.samplers[pool].sample(rng)
@@ -0,0 +1,311 @@
+# -*- coding: utf-8 -*-
+"""events.json 静态检查与死内容检测。
+
+init_event_library 对很多内容错误要么静默吞掉、要么直到抽中该事件才崩溃。
+这里在合并内容前一次性检查整个事件库：
+
+    python game.py lint events.json [more.json ...] [--strict]
+
+发现错误时退出码为 1（--strict 时警告也算失败），可直接用作合并门禁。
+"""
+import argparse
+import json
+import sys
+from collections import namedtuple
+
+from event_expr import ExpressionError, build, parse, parse_condition
+from game_state import ATTRIBUTE_NAMES, DEFAULT_EVENTS_FILE, EFFECT_KEY_MAP, NEGATIVE_EVENTS, STAGES
+
+ERROR = 'error'
+WARNING = 'warning'
+
+# 触发事件时唯一会写入的旗标
+SEEN_FLAG_PREFIX = '见过_'
+
+Issue = namedtuple('Issue', 'severity event message')
+
+_INT_FIELDS = ('weight', 'cooldown', 'min_level', 'max_level')
+
+
+def _is_int(value):
+    # bool 是 int 的子类，但不是合法数值
+    return type(value) is int
+
+
+def _string_list(value):
+    """字符串列表字段的内容：缺省或 null 时为空元组，不是字符串列表时返回 None"""
+    if value is None:
+        return ()
+    if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+        return None
+    return value
+
+
+class _Linter:
+    def __init__(self, library, stage_names, negative_events, attribute_names):
+        self.library = library
+        self.stage_names = frozenset(stage_names)
+        self.negative_events = frozenset(negative_events)
+        self.attribute_names = frozenset(attribute_names)
+        self.effect_keys = self.attribute_names | set(EFFECT_KEY_MAP) | set(EFFECT_KEY_MAP.values())
+        self.issues = []
+        # 同一公式在大事件库中反复出现，只检查一次
+        self._formula_cache = {}
+
+    def report(self, severity, event, message):
+        self.issues.append(Issue(severity, event, message))
+
+    # ---- 单个事件 ----
+    def check_event(self, name, event):
+        if not isinstance(event, dict):
+            self.report(ERROR, name, "事件必须是对象")
+            return
+        if 'choices' not in event and 'auto_roll' not in event:
+            self.report(ERROR, name, "缺少 choices 或 auto_roll")
+        for key in _INT_FIELDS:
+            if key in event and not _is_int(event[key]):
+                self.report(ERROR, name, f"{key} 必须是整数：{event[key]!r}")
+        if _is_int(event.get('min_level', 1)) and _is_int(event.get('max_level', 999)):
+            if event.get('min_level', 1) > event.get('max_level', 999):
+                self.report(ERROR, name, "min_level 大于 max_level，事件永远不会出现")
+
+        tags = event.get('tags', [])
+        if not isinstance(tags, list):
+            self.report(ERROR, name, "tags 必须是列表")
+        else:
+            for tag in tags:
+                if isinstance(tag, str) and tag.startswith('stage=') and tag[len('stage='):] not in self.stage_names:
+                    self.report(ERROR, name, f"未知阶段标签 {tag!r}")
+
+        choices = event.get('choices')
+        if choices is not None:
+            if not isinstance(choices, list) or not choices:
+                self.report(ERROR, name, "choices 必须是非空列表")
+            else:
+                for i, choice in enumerate(choices, 1):
+                    if not isinstance(choice, dict) or 'text' not in choice:
+                        self.report(ERROR, name, f"选项 {i} 缺少 text")
+                        continue
+                    self.check_effects(name, f"选项「{choice['text']}」", choice.get('effects'))
+
+        auto_roll = event.get('auto_roll')
+        if auto_roll is not None:
+            if not isinstance(auto_roll, dict):
+                self.report(ERROR, name, "auto_roll 必须是对象")
+            else:
+                if 'success_probability' not in auto_roll:
+                    self.report(ERROR, name, "auto_roll 缺少 success_probability")
+                else:
+                    self.check_formula(name, auto_roll['success_probability'])
+                self.check_effects(name, "成功效果", auto_roll.get('success_effects', {}))
+                self.check_effects(name, "失败效果", auto_roll.get('failure_effects', {}))
+            if name not in self.negative_events:
+                self.report(WARNING, name, "auto_roll 事件不在负面事件列表中，永远不会被抽中")
+
+        self.check_requires(name, event.get('requires', {}))
+
+        excludes = _string_list(event.get('excludes'))
+        if excludes is None:
+            self.report(ERROR, name, f"excludes 必须是事件名列表：{event['excludes']!r}")
+        else:
+            for other in excludes:
+                if other not in self.library:
+                    self.report(ERROR, name, f"excludes 指向不存在的事件 {other!r}")
+
+    def check_effects(self, name, where, effects):
+        if not isinstance(effects, dict):
+            self.report(ERROR, name, f"{where}：effects 必须是对象")
+            return
+        for key, value in effects.items():
+            if key not in self.effect_keys:
+                self.report(ERROR, name, f"{where}：未知效果键 {key!r}")
+            if type(value) is int:
+                continue
+            if isinstance(value, list):
+                if len(value) != 2 or type(value[0]) is not int or type(value[1]) is not int:
+                    self.report(ERROR, name, f"{where}：{key} 的区间必须是两个整数 [最小, 最大]：{value!r}")
+                elif value[0] > value[1]:
+                    self.report(ERROR, name, f"{where}：{key} 的区间下限大于上限：{value!r}")
+            else:
+                self.report(ERROR, name, f"{where}：{key} 的值必须是整数或区间：{value!r}")
+
+    def check_formula(self, name, source):
+        error = self._expression_error(source, None)
+        if error is not None:
+            self.report(ERROR, name, f"success_probability {source!r}：{error}")
+
+    def _expression_error(self, source, attr_name):
+        """编译公式（attr_name 非空时为 requires 条件），返回错误信息或 None"""
+        key = (source, attr_name)
+        if key not in self._formula_cache:
+            try:
+                node = parse(source) if attr_name is None else parse_condition(attr_name, source)
+                build(node, self.attribute_names)
+                self._formula_cache[key] = None
+            except ExpressionError as e:
+                self._formula_cache[key] = str(e)
+            except TypeError:
+                self._formula_cache[key] = "必须是字符串或数字"
+        return self._formula_cache[key]
+
+    def check_requires(self, name, requires):
+        if not requires:
+            return
+        if not isinstance(requires, dict):
+            self.report(ERROR, name, "requires 必须是对象")
+            return
+        attributes = requires.get('attributes') or {}
+        if not isinstance(attributes, dict):
+            self.report(ERROR, name, f"requires.attributes 必须是对象：{attributes!r}")
+            attributes = {}
+        for attr_name, source in attributes.items():
+            if attr_name not in self.attribute_names:
+                self.report(ERROR, name, f"requires 引用未知属性 {attr_name!r}")
+                continue
+            error = self._expression_error(source, attr_name)
+            if error is not None:
+                self.report(ERROR, name, f"requires 条件 {attr_name}{source}：{error}")
+        flags_all = _string_list(requires.get('flags_all'))
+        if flags_all is None:
+            self.report(ERROR, name, f"requires.flags_all 必须是字符串列表：{requires['flags_all']!r}")
+            flags_all = ()
+        for flag in flags_all:
+            if self._flag_source(flag) is None:
+                self.report(ERROR, name, f"flags_all 中的旗标 {flag!r} 没有任何事件能设置")
+        flags_any = _string_list(requires.get('flags_any'))
+        if flags_any is None:
+            self.report(ERROR, name, f"requires.flags_any 必须是字符串列表：{requires['flags_any']!r}")
+        elif flags_any and all(self._flag_source(flag) is None for flag in flags_any):
+            self.report(ERROR, name, "flags_any 中的旗标没有任何事件能设置")
+
+    def _flag_source(self, flag):
+        """返回会设置该旗标的事件名；不存在时返回 None"""
+        if isinstance(flag, str) and flag.startswith(SEEN_FLAG_PREFIX):
+            source = flag[len(SEEN_FLAG_PREFIX):]
+            if source in self.library:
+                return source
+        return None
+
+    # ---- 死内容 ----
+    def check_reachability(self):
+        """找出永远无法被抽中的事件（含经由旗标链传递的不可达）"""
+        library = self.library
+        reachable = set()
+        pending_all = {}  # {事件: 尚未可达的 flags_all 来源数}
+        needs_any = {}  # {事件: flags_any 来源集合}
+        waiting = {}  # {来源事件: [依赖它的事件]}
+        queue = []
+        for name, event in library.items():
+            if not isinstance(event, dict) or not self._selectable(name, event):
+                continue
+            requires = event.get('requires') or {}
+            if not isinstance(requires, dict):
+                continue
+            flags_all = _string_list(requires.get('flags_all'))
+            flags_any = _string_list(requires.get('flags_any'))
+            if flags_all is None or flags_any is None:
+                continue  # 已在 check_requires 中报错
+            sources_all = {self._flag_source(f) for f in flags_all}
+            sources_any = {self._flag_source(f) for f in flags_any}
+            if None in sources_all or (sources_any and sources_any == {None}):
+                continue  # 已在 check_requires 中报错
+            sources_any.discard(None)
+            # 旗标在事件触发后才写入，依赖自身的条件在首次抽取前不可能满足
+            if name in sources_all or (sources_any and sources_any == {name}):
+                self.report(WARNING, name, "requires 依赖自身的 见过_ 旗标，事件永远不会出现")
+                continue
+            sources_any.discard(name)
+            pending_all[name] = len(sources_all)
+            if sources_any:
+                needs_any[name] = sources_any
+            for source in sources_all | sources_any:
+                waiting.setdefault(source, []).append(name)
+            if not sources_all and not sources_any:
+                queue.append(name)
+
+        # 从无旗标依赖的事件出发，沿“旗标来源 -> 依赖者”传播可达性
+        while queue:
+            source = queue.pop()
+            if source in reachable:
+                continue
+            reachable.add(source)
+            for name in waiting.get(source, ()):
+                if name in reachable:
+                    continue
+                if source in needs_any.get(name, ()):
+                    needs_any.pop(name)
+                    if pending_all[name] == 0:
+                        queue.append(name)
+                else:
+                    pending_all[name] -= 1
+                    if pending_all[name] == 0 and name not in needs_any:
+                        queue.append(name)
+
+        for name in pending_all:
+            if name not in reachable:
+                self.report(WARNING, name, "前置旗标依赖链无法满足，事件永远不会出现")
+
+    def _selectable(self, name, event):
+        if name not in self.negative_events and 'choices' not in event:
+            return False
+        min_level, max_level = event.get('min_level', 1), event.get('max_level', 999)
+        if _is_int(min_level) and _is_int(max_level) and min_level > max_level:
+            return False
+        tags = event.get('tags', [])
+        if isinstance(tags, list):
+            stages = [t[len('stage='):] for t in tags if isinstance(t, str) and t.startswith('stage=')]
+            if stages and not any(stage in self.stage_names for stage in stages):
+                return False
+        return True
+
+    def run(self):
+        for name, event in self.library.items():
+            self.check_event(name, event)
+        for name in sorted(self.negative_events - set(self.library)):
+            self.report(WARNING, name, "负面事件列表中的事件在事件库中不存在")
+        self.check_reachability()
+        return self.issues
+
+
+def lint_library(library, stage_names=None, negative_events=NEGATIVE_EVENTS, attribute_names=ATTRIBUTE_NAMES):
+    """检查已解析的事件库，返回 Issue 列表"""
+    if stage_names is None:
+        stage_names = [stage['name'] for stage in STAGES]
+    if not isinstance(library, dict):
+        return [Issue(ERROR, None, "事件库顶层必须是对象")]
+    return _Linter(library, stage_names, negative_events, attribute_names).run()
+
+
+def lint_file(events_file):
+    """检查事件文件，返回 Issue 列表（JSON 语法错误也作为 Issue 返回）"""
+    try:
+        with open(events_file, 'rb') as f:
+            library = json.loads(f.read().decode('utf-8'))
+    except (OSError, UnicodeDecodeError, json.JSONDecodeError) as e:
+        return [Issue(ERROR, None, f"无法读取：{e}")]
+    return lint_library(library)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='game.py lint', description='静态检查事件库内容')
+    parser.add_argument('files', nargs='*', default=[DEFAULT_EVENTS_FILE])
+    parser.add_argument('--strict', action='store_true', help='警告也视为失败')
+    args = parser.parse_args(argv)
+
+    failed = False
+    for events_file in args.files:
+        issues = lint_file(events_file)
+        errors = sum(1 for issue in issues if issue.severity == ERROR)
+        warnings = len(issues) - errors
+        for issue in issues:
+            where = f"事件「{issue.event}」" if issue.event is not None else "文件"
+            level = "错误" if issue.severity == ERROR else "警告"
+            print(f"{events_file}: {level}: {where}: {issue.message}")
+        print(f"{events_file}: {errors} 个错误，{warnings} 个警告")
+        if errors or (args.strict and warnings):
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
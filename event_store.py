@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""按需解码的只读事件库。
+
+事件正文（描述、选项、效果）按事件分别 marshal，连续存放在 events.json.bundle
+的正文区；内存中只保留 名称 -> 序号 与偏移数组。事件被抽中时才从 mmap 中
+解码，最近用过的正文放在一个小的 LRU 里。常驻内存取决于事件数量而不是正文大小。
+"""
+import marshal
+from array import array
+from collections import OrderedDict
+from collections.abc import Mapping
+
+# 解码后正文的 LRU 容量
+EVENT_CACHE_SIZE = 128
+
+
+class LazyEventLibrary(Mapping):
+    """与 event_library 字典接口一致（只读），正文按需解码"""
+
+    def __init__(self, buffer, names, offsets, base, cache_size=EVENT_CACHE_SIZE):
+        """buffer：mmap 或 bytes；offsets：长度 len(names)+1 的相对偏移；base：正文区起点"""
+        self._buffer = buffer
+        self._slots = {name: i for i, name in enumerate(names)}
+        self._offsets = offsets if isinstance(offsets, array) else array('Q', offsets)
+        self._base = base
+        self._cache = OrderedDict()
+        self.cache_size = cache_size
+
+    def __getitem__(self, name):
+        cache = self._cache
+        body = cache.get(name)
+        if body is not None:
+            cache.move_to_end(name)
+            return body
+        i = self._slots[name]
+        start = self._base + self._offsets[i]
+        body = marshal.loads(self._buffer[start:self._base + self._offsets[i + 1]])
+        cache[name] = body
+        if len(cache) > self.cache_size:
+            cache.popitem(last=False)
+        return body
+
+    def __contains__(self, name):
+        return name in self._slots
+
+    def __iter__(self):
+        return iter(self._slots)
+
+    def __len__(self):
+        return len(self._slots)
+
+    def close(self):
+        close = getattr(self._buffer, 'close', None)
+        if close is not None:
+            close()
+
+
+def pack_bodies(library):
+    """把事件正文逐个 marshal，返回 (names, offsets, 正文区 bytes)"""
+    names = list(library)
+    offsets = array('Q', [0])
+    blobs = []
+    pos = 0
+    for name in names:
+        blob = marshal.dumps(library[name])
+        blobs.append(blob)
+        pos += len(blob)
+        offsets.append(pos)
+    return names, offsets, b''.join(blobs)
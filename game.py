@@ -1,168 +1,199 @@
 # -*- coding: utf-8 -*-
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import messagebox
 import sys
-import ast
-import random
-import json
 import os
-from boss_battle import BossBattleUI
+import time
+from button_bar import ButtonBar
+from render import RenderScheduler, append_text, replace_text
+from save_journal import DEFAULT_SAVE_FILE, SaveJournal, load_save
+import event_bundle
+from game_state import ATTRIBUTE_NAMES, EFFECT_KEY_MAP, GameState, preload_event_library
+import profiling
+from rng_streams import split_seed_arg
+from scenes import SceneManager, parse_attributes
+from ui_dispatch import UiDispatcher
+from ui_log import LogSink
 
-# 事件效果键名映射（向后兼容中文键）
-EFFECT_KEY_MAP = {
-    "经验": "experience",
-    "生命值": "health",
-    "魔法值": "magic",
-}
+# 事件文件热更新的轮询间隔（毫秒）
+EVENTS_POLL_MS = 1000
+
+# 属性面板的绑定分组：状态变化只标记受影响的标签
+ATTRIBUTE_VIEW_KEYS = tuple(('attr', name) for name in ATTRIBUTE_NAMES)
+PROGRESS_VIEW_KEYS = ('exp', 'level', 'next_exp')
+STAGE_VIEW_KEYS = ('choices', 'boss_health', 'stage', 'title')
+# Boss 战结算：经验、属性奖励、阶段推进与 Boss 血量
+BATTLE_END_VIEW_KEYS = ATTRIBUTE_VIEW_KEYS + ('exp',) + STAGE_VIEW_KEYS
 
 class GameMain:
-    def __init__(self, root):
+    """人生游戏主界面：GameState 的视图层，只负责展示与输入。
+
+    作为场景挂在 SceneManager 中：组件建在 frame 里，enter() 时开始游戏。
+    """
+    TITLE = "🎮 游戏主界面"
+    GEOMETRY = "1000x700"
+    BG = '#2c3e50'
+
+    def __init__(self, root, frame=None, seed=None):
         self.root = root
-        self.root.title("🎮 游戏主界面")
-        self.root.geometry("1000x700")
-        self.root.configure(bg='#2c3e50')
-        
-        # 角色属性
-        self.attributes = {
-            '体质': 0,
-            '智力': 0,
-            '情商': 0,
-            '幸运': 0
-        }
+        self.frame = frame if frame is not None else root
         
-        # 游戏状态
-        self.level = 1
-        self.experience = 0
-        self.health = 100
-        self.max_health = 100
-        self.magic = 50
-        self.max_magic = 50
-        self.choice_count = 0  # 选择计数器（当前阶段内）
-        self.event_count = 0  # 事件计数器
-        self.choice_event_count = 0  # 选择事件计数器
-        self.last_negative_event = 0  # 上次负面事件的事件计数
-        
-        # 事件元数据与状态
-        self.event_meta = {}  # {name: {weight,cooldown,once,min_level,max_level,requires,excludes,tags}}
-        self.event_trigger_count = {}  # {name: count}
-        self.event_last_seen = {}  # {name: last_event_index}
-        self.flags = set()  # 如：见过_事件名
-        self.current_event_name = None
         self.debug_show_event_meta = False  # 调试: 是否在描述中展示元信息
         
-        # 负面事件列表
-        self.negative_events = [
-            "拖延症发作", "懒惰成性", "社交恐惧症", "学习倦怠", 
-            "身体健康问题", "网络成瘾", "人际关系破裂", "经济困难", "自我怀疑"
-        ]
-        
-        # 阶段配置与Boss状态
-        self.stages = [
-            {"name": "幼儿园", "event_limit": 10, "boss_hp": 80,  "reward": {"体质": 1, "智力": 1, "情商": 1, "幸运": 1}},
-            {"name": "小学",   "event_limit": 15, "boss_hp": 120, "reward": {"体质": 1, "智力": 1, "情商": 1, "幸运": 1}},
-            {"name": "中学",   "event_limit": 20, "boss_hp": 160, "reward": {"体质": 2, "智力": 1, "情商": 1, "幸运": 1}},
-            {"name": "高中",   "event_limit": 20, "boss_hp": 200, "reward": {"体质": 1, "智力": 2, "情商": 1, "幸运": 1}},
-            {"name": "大学",   "event_limit": 30, "boss_hp": 260, "reward": {"体质": 1, "智力": 2, "情商": 2, "幸运": 1}},
-            {"name": "工作",   "event_limit": 10, "boss_hp": 300, "reward": {"体质": 2, "智力": 2, "情商": 2, "幸运": 2}},
-        ]
-        self.current_stage_index = 0
-        self.boss_max_health = self.stages[self.current_stage_index]["boss_hp"]
-        self.boss_current_health = self.boss_max_health
-        
-        # 当前事件
-        self.current_event = None
-        self.current_choices = []
-        
-        # 初始化事件库
-        self.init_event_library()
+        # 游戏逻辑核心（日志通过回调写入界面）
+        # 事件库在首帧之后才取用（后台预载通常已经完成）
+        self.state = GameState(on_log=self.add_log, seed=seed, load_events=False)
+        self.seed = seed
+        
+        # 界面刷新：状态变化只标脏，空闲时只推送变化的值
+        self.render = RenderScheduler(self.root)
+        # 后台任务（如事件库重新编译）在工作线程执行，结果回到主线程应用
+        self.dispatcher = UiDispatcher(self.root)
+        
+        # 计时数据按人生阶段分组；F12 开启/关闭计时
+        profiling.set_tag_source(lambda: self.state.current_stage()['name'])
+        self.root.bind('<F12>', lambda e: self.toggle_profiling())
         
         # 创建界面
         self.create_widgets()
+        self._bind_attribute_views()
+        
+        # 存档：每个决定追加到日志，由后台线程写盘
+        self.journal = SaveJournal(DEFAULT_SAVE_FILE, self.state.snapshot)
+        self.started = None
+    
+    def enter(self, attributes=None, started=None):
+        """显示场景：第一次进入时开始游戏，之后返回时继续当前进度。
+
+        attributes：掷骰界面生成的角色属性字典
+        started：玩家点击“进入游戏”的 perf_counter 时刻，用于报告启动耗时
+        """
+        if self.started is not None:
+            return
+        # 先让窗口完成首次绘制，再读存档、抽第一个事件
+        self.started = started if started is not None else time.perf_counter()
+        replace_text(self.event_text, "⏳ 正在准备你的人生旅程...")
+        self.root.after_idle(lambda: self.root.after(0, lambda: self._start_game(attributes)))
+    
+    def _start_game(self, attributes):
+        """首帧之后：载入事件库，恢复存档或开始新游戏，并开始监视事件文件"""
+        self.state.load_event_library()
+        if not self.offer_resume():
+            # 新游戏：按指定种子（未指定则随机）播种随机数流
+            self.state.rng.seed(self.seed)
+            self.add_log(f"🎲 随机种子：{self.state.rng.master_seed}")
+            # 加载掷骰界面（或命令行）传入的角色属性
+            if attributes is not None:
+                self.load_character_attributes(attributes)
+            self.journal.begin(self.state.snapshot())
+            self.state.start_recording(self.journal.append)
+            # 显示初始事件
+            self.show_random_event()
         
-        # 如果有命令行参数，加载角色属性
-        if len(sys.argv) > 1:
-            self.load_character_attributes(sys.argv[1])
+        # 监视事件文件，修改后无需重启即可生效
+        self._events_mtime = self._events_file_mtime()
+        self.root.after(EVENTS_POLL_MS, self._watch_events_file)
+        # 第一个事件绘制完成即可操作：报告从进入游戏到此刻的耗时
+        self.root.after_idle(self._report_startup_time)
+    
+    def _report_startup_time(self):
+        elapsed_ms = (time.perf_counter() - self.started) * 1000
+        print(f"启动耗时：{elapsed_ms:.0f} ms（进入游戏 → 第一个可操作事件）", file=sys.stderr)
+        self.add_log(f"⏱️ 启动耗时 {elapsed_ms:.0f} ms")
+    
+    def _events_file_mtime(self):
+        try:
+            return os.stat(self.state.events_file).st_mtime_ns
+        except OSError:
+            return None
+    
+    def _watch_events_file(self):
+        """轮询事件文件的修改时间，变化时热更新"""
+        mtime = self._events_file_mtime()
+        if mtime is not None and mtime != self._events_mtime:
+            self._events_mtime = mtime
+            self.hot_reload_events()
+        self.root.after(EVENTS_POLL_MS, self._watch_events_file)
+    
+    def hot_reload_events(self):
+        """把事件文件的改动合并进当前游戏（保留进度、旗标与触发记录）。
+
+        文件的解析与编译在后台线程进行；连续保存时只应用最后一次。
+        """
+        self.dispatcher.submit(event_bundle.load_event_library, self.state.events_file,
+                               on_done=self._apply_reloaded_events,
+                               on_error=self._report_reload_error, key='reload')
     
-    def init_event_library(self):
-        """从JSON文件初始化事件库"""
+    def _apply_reloaded_events(self, loaded):
         try:
-            # 获取当前脚本所在目录
-            script_dir = os.path.dirname(os.path.abspath(__file__))
-            events_file = os.path.join(script_dir, 'events.json')
-            
-            # 读取JSON文件
-            with open(events_file, 'r', encoding='utf-8') as f:
-                self.event_library = json.load(f)
-            
-            # 将JSON中的列表格式转换为元组格式（为了兼容现有代码）
-            for event_name, event_data in self.event_library.items():
-                # 处理有choices字段的事件
-                if 'choices' in event_data:
-                    for choice in event_data['choices']:
-                        for effect_name, effect_value in choice['effects'].items():
-                            if isinstance(effect_value, list) and len(effect_value) == 2:
-                                choice['effects'][effect_name] = tuple(effect_value)
-                
-                # 处理auto_roll事件
-                if 'auto_roll' in event_data:
-                    auto_roll = event_data['auto_roll']
-                    # 转换success_effects
-                    for effect_name, effect_value in auto_roll.get('success_effects', {}).items():
-                        if isinstance(effect_value, list) and len(effect_value) == 2:
-                            auto_roll['success_effects'][effect_name] = tuple(effect_value)
-                    # 转换failure_effects
-                    for effect_name, effect_value in auto_roll.get('failure_effects', {}).items():
-                        if isinstance(effect_value, list) and len(effect_value) == 2:
-                            auto_roll['failure_effects'][effect_name] = tuple(effect_value)
-            
-            # 解析扩展元数据（向后兼容默认值）
-            for event_name, event_data in self.event_library.items():
-                meta = {
-                    'tags': event_data.get('tags', []),
-                    'weight': int(event_data.get('weight', 1) or 1),
-                    'cooldown': int(event_data.get('cooldown', 0) or 0),
-                    'once': bool(event_data.get('once', False)),
-                    'min_level': int(event_data.get('min_level', 1) or 1),
-                    'max_level': int(event_data.get('max_level', 999) or 999),
-                    'requires': event_data.get('requires', {}),
-                    'excludes': event_data.get('excludes', []),
-                }
-                self.event_meta[event_name] = meta
-                self.event_trigger_count.setdefault(event_name, 0)
-                self.event_last_seen.setdefault(event_name, -10**9)
-            
-            print("事件库加载成功！")
-            
-        except FileNotFoundError:
-            print("错误：找不到 events.json 文件！")
-            # 如果文件不存在，使用默认事件库
-            self.event_library = self.get_default_events()
-        except json.JSONDecodeError as e:
-            print(f"错误：JSON文件格式错误 - {str(e)}")
-            self.event_library = self.get_default_events()
+            added, changed, removed = self.state.reload_event_library(loaded)
         except Exception as e:
-            print(f"错误：加载事件库失败 - {str(e)}")
-            self.event_library = self.get_default_events()
-    
-    def get_default_events(self):
-        """获取默认事件库（作为备用）"""
-        return {
-            "默认事件": {
-                "description": "🎮 这是一个默认事件，请检查 events.json 文件。",
-                "choices": [
-                    {"text": "🔧 修复问题", "effects": {"智力": (1, 2)}, "description": "你尝试修复了问题"},
-                    {"text": "🏃 离开这里", "effects": {"幸运": (1, 1)}, "description": "你离开了这里"},
-                    {"text": "🗣️ 寻求帮助", "effects": {"情商": (1, 1)}, "description": "你寻求了帮助"},
-                    {"text": "⏰ 等待", "effects": {"体质": (1, 1)}, "description": "你耐心等待"}
-                ]
-            }
-        }
+            self._report_reload_error(e)
+            return
+        if added or changed or removed:
+            self.add_log(f"🔄 事件库已热更新：新增{len(added)}，修改{len(changed)}，删除{len(removed)}")
+    
+    def offer_resume(self):
+        """存在未完成的存档时询问是否继续，继续则恢复局面并返回 True"""
+        saved = load_save(self.journal.path)
+        if saved is None:
+            return False
+        snap, records, valid_end = saved
+        # 快照 + 日志尾部回放
+        self.state.restore(snap)
+        self.state.replay(records)
+        if self.state.finished or not messagebox.askyesno(
+                "继续游戏", f"发现未完成的存档（{self.state.current_stage()['name']}阶段，"
+                          f"第{self.state.event_count}次事件），是否继续？"):
+            self.state.reset()
+            return False
+        
+        self.journal.resume(valid_end)
+        self.state.recorder = self.journal.append
+        # 回放不推进随机数流：按 (种子, 事件序号) 重新派生，续玩同样可复现
+        self.state.reseed_streams(self.state.event_count)
+        self.add_log(f"📂 已恢复存档：{self.state.current_stage()['name']}阶段，第{self.state.event_count}次事件")
+        self.update_attributes_display()
+        
+        phase = self.state.phase
+        if phase is None:
+            self.show_random_event()
+        elif phase == 'choice':
+            self.show_current_event()
+        elif phase == 'battle':
+            self.start_boss_battle(resume=True)
+        else:
+            replace_text(self.event_text, "📂 已恢复存档\n\n继续你的人生旅程吧！")
+            self.show_continue_button()
+        return True
+    
+    def toggle_profiling(self):
+        """开启或关闭热点路径计时；关闭时写出统计与 trace 文件"""
+        profiler = profiling.disable()
+        if profiler is None:
+            profiling.enable(profiled_methods())
+            self.add_log("⏱️ 已开启性能计时（再按 F12 停止并保存）")
+            return
+        try:
+            profiler.dump(profiling.DEFAULT_PROFILE_FILE, profiling.DEFAULT_TRACE_FILE)
+            self.add_log(f"⏱️ 性能计时已保存到 {profiling.DEFAULT_PROFILE_FILE}")
+        except OSError as e:
+            self.add_log(f"⚠️ 保存性能计时失败：{e}")
+    
+    def _report_reload_error(self, error):
+        # 编辑中途保存的半成品文件：保留旧事件库，等下次保存
+        self.add_log(f"⚠️ 事件库热更新失败：{error}")
+    
+    def on_close(self):
+        """关闭窗口前把存档写完（根窗口由 SceneManager 销毁）"""
+        self.dispatcher.shutdown()
+        self.journal.close()
     
     def create_widgets(self):
         # 主标题
         self.title_label = tk.Label(
-            self.root,
-            text=f"🗺️ 当前阶段: {self.stages[self.current_stage_index]['name']}",
+            self.frame,
+            text=f"🗺️ 当前阶段: {self.state.current_stage()['name']}",
             font=("Arial", 24, "bold"),
             bg='#2c3e50',
             fg='#ecf0f1'
@@ -170,7 +201,7 @@ class GameMain:
         self.title_label.pack(pady=20)
         
         # 主框架
-        main_frame = tk.Frame(self.root, bg='#2c3e50')
+        main_frame = tk.Frame(self.frame, bg='#2c3e50')
         main_frame.pack(expand=True, fill='both', padx=20, pady=20)
         
         # 左侧 - 事件和选择区域
@@ -202,9 +233,6 @@ class GameMain:
         
         # 游戏日志区域
         self.create_game_log(right_frame)
-        
-        # 所有组件创建完成后，显示初始事件
-        self.show_random_event()
     
     def create_event_display(self, parent):
         """创建事件显示"""
@@ -226,479 +254,173 @@ class GameMain:
         """创建选择按钮"""
         self.choice_frame = tk.Frame(parent, bg='#34495e')
         self.choice_frame.pack(fill='x', padx=20, pady=10)
+        self.choice_bar = ButtonBar(self.choice_frame)
     
     def show_random_event(self):
         """显示随机事件（加入权重/冷却/前置/互斥提示/节律）"""
-        # 增加事件计数
-        self.event_count += 1
-        
-        event_name, is_negative = self._select_next_event_name()
-        if is_negative:
-            self.last_negative_event = self.event_count
-            self.add_log(f"触发第{self.event_count}次事件 - 负面roll点事件: {event_name}")
-        else:
-            self.add_log(f"触发第{self.event_count}次事件 - 选择事件: {event_name}")
-        
-        # 记录旗标与触发历史
-        self.flags.add(f"见过_{event_name}")
-        self.event_trigger_count[event_name] = self.event_trigger_count.get(event_name, 0) + 1
-        self.event_last_seen[event_name] = self.event_count
-        
-        self.current_event_name = event_name
-        self.current_event = self.event_library[event_name]
+        self.state.next_event()
+        self.show_current_event()
+    
+    def show_current_event(self):
+        """显示当前事件（描述与选择按钮；Roll点事件直接结算）"""
+        state = self.state
+        event_name = state.current_event_name
         
         # 显示事件描述
-        self.event_text.config(state='normal')
-        self.event_text.delete(1.0, 'end')
-        if 'choices' in self.current_event:
-            header = f"🎮 {event_name} (第{self.event_count}次事件, 第{self.choice_event_count}次选择事件)"
+        if 'choices' in state.current_event:
+            header = f"🎮 {event_name} (第{state.event_count}次事件, 第{state.choice_event_count}次选择事件)"
         else:
-            header = f"🎮 {event_name} (第{self.event_count}次事件, Roll点事件)"
+            header = f"🎮 {event_name} (第{state.event_count}次事件, Roll点事件)"
         if self.debug_show_event_meta:
-            meta = self.event_meta.get(event_name, {})
+            meta = state.event_meta.get(event_name, {})
             tags = "|".join(meta.get('tags', [])) if meta.get('tags') else ""
             extra = f" [权重{meta.get('weight',1)}|冷却{meta.get('cooldown',0)}{('|' + tags) if tags else ''}]"
             header += extra
-        self.event_text.insert('end', header + "\n\n")
-        self.event_text.insert('end', f"{self.current_event['description']}\n\n")
+        parts = [header, "\n\n", state.current_event['description'], "\n\n"]
         
         # 检查是否是自动roll点事件
-        if "auto_roll" in self.current_event:
+        if "auto_roll" in state.current_event:
+            replace_text(self.event_text, ''.join(parts))
             # 处理自动roll点事件
-            self.handle_auto_roll_event(self.current_event)
+            self.handle_auto_roll_event(state.current_event)
             return
         else:
             # 普通事件，显示选择
-            if "choices" in self.current_event:
-                self.current_choices = self.current_event["choices"]
-                self.event_text.insert('end', "请选择你的行动...")
-                self.event_text.config(state='disabled')
+            if state.current_choices:
+                parts.append("请选择你的行动...")
+                replace_text(self.event_text, ''.join(parts))
                 self.update_dynamic_choices()
             else:
                 # 没有choices字段的事件，显示提示
-                self.current_choices = []
-                self.event_text.insert('end', "\n\n按任意键继续...")
-                self.event_text.config(state='disabled')
-
-    def _select_next_event_name(self):
-        """选择下一个事件名，返回 (event_name, is_negative)"""
-        # 是否考虑负面事件
-        consider_negative = False
-        if self.choice_event_count >= 5:
-            consider_negative = (random.random() < 0.15 and (self.event_count - self.last_negative_event) >= 3)
-        
-        level = self._get_progress_level()
-        
-        def event_available(name):
-            meta = self.event_meta.get(name, {})
-            # 一次性
-            if meta.get('once') and self.event_trigger_count.get(name, 0) > 0:
-                return False
-            # 冷却
-            if self.event_count - self.event_last_seen.get(name, -10**9) < meta.get('cooldown', 0):
-                return False
-            # 等级范围
-            if level < meta.get('min_level', 1) or level > meta.get('max_level', 999):
-                return False
-            # 前置
-            if not self._check_requires(meta.get('requires', {})):
-                return False
-            # 阶段筛选：若设置了 stage= 标签，则必须匹配当前阶段
-            tags = meta.get('tags', []) or []
-            current_stage_name = self.stages[self.current_stage_index]['name'] if hasattr(self, 'stages') else None
-            stage_tags = [t for t in tags if isinstance(t, str) and t.startswith('stage=')]
-            if stage_tags and current_stage_name:
-                if f"stage={current_stage_name}" not in stage_tags:
-                    return False
-            return True
-        
-        positive_candidates = [n for n in self.event_library.keys() if n not in self.negative_events and 'choices' in self.event_library[n] and event_available(n)]
-        negative_candidates = [n for n in self.negative_events if n in self.event_library and event_available(n)]
-        
-        if self.choice_event_count < 5:
-            consider_negative = False
-        
-        def weighted_choice(names):
-            if not names:
-                return None
-            weights = [max(1, int(self.event_meta.get(n, {}).get('weight', 1))) for n in names]
-            total = sum(weights)
-            r = random.randint(1, total)
-            cum = 0
-            for n, w in zip(names, weights):
-                cum += w
-                if r <= cum:
-                    return n
-            return names[-1]
-        
-        if consider_negative and negative_candidates:
-            name = weighted_choice(negative_candidates)
-            if name:
-                return name, True
-        
-        if positive_candidates:
-            name = weighted_choice(positive_candidates)
-            if name:
-                return name, False
-        
-        any_name = random.choice(list(self.event_library.keys()))
-        return any_name, (any_name in self.negative_events)
-
-    def _get_progress_level(self):
-        """简单的进度等级（以选择次数近似）"""
-        return max(1, self.choice_event_count)
-
-    def _check_requires(self, requires):
-        if not requires:
-            return True
-        attr_reqs = requires.get('attributes', {}) or {}
-        for attr_name, expr in attr_reqs.items():
-            if not self._eval_attr_condition(attr_name, expr):
-                return False
-        flags_all = requires.get('flags_all', []) or []
-        for flag in flags_all:
-            if flag not in self.flags:
-                return False
-        flags_any = requires.get('flags_any', []) or []
-        if flags_any and not any(flag in self.flags for flag in flags_any):
-            return False
-        return True
-
-    def _eval_attr_condition(self, attr_name, expr):
-        try:
-            value = self.attributes.get(attr_name, 0)
-            expr = str(expr).strip()
-            if expr.startswith('>='):
-                return value >= int(expr[2:])
-            if expr.startswith('>'):
-                return value > int(expr[1:])
-            if expr.startswith('<='):
-                return value <= int(expr[2:])
-            if expr.startswith('<'):
-                return value < int(expr[1:])
-            if expr.startswith('=='):
-                return value == int(expr[2:])
-            return value == int(expr)
-        except:
-            return True
+                parts.append("\n\n按任意键继续...")
+                replace_text(self.event_text, ''.join(parts))
     
     def show_dynamic_choices(self):
         """显示动态选择按钮"""
         self.update_dynamic_choices()
     
     def update_dynamic_choices(self):
-        """更新动态选择按钮"""
-        # 清除现有按钮
-        for widget in self.choice_frame.winfo_children():
-            widget.destroy()
-        
-        if not self.current_choices:
+        """更新动态选择按钮（复用已有按钮）"""
+        if not self.state.current_choices:
+            self.choice_bar.clear()
             return
         
         # 互斥提醒（不透露具体对象）
-        meta = self.event_meta.get(self.current_event_name or '', {})
+        meta = self.state.event_meta.get(self.state.current_event_name or '', {})
         excludes = meta.get('excludes', []) if meta else []
-        if excludes:
-            warning_label = tk.Label(
-                self.choice_frame,
-                text="⚠️ 该选择可能限制后续路线，慎重选择",
-                font=("Arial", 10, "bold"),
-                bg='#34495e',
-                fg='#f39c12'
-            )
-            warning_label.pack(fill='x', pady=(0, 8))
+        warning = "⚠️ 该选择可能限制后续路线，慎重选择" if excludes else None
         
-        # 创建4个选择按钮
+        # 最多4个选择按钮
         colors = ['#3498db', '#e74c3c', '#f39c12', '#27ae60']
         
-        for i, choice in enumerate(self.current_choices):
-            button = tk.Button(
-                self.choice_frame,
-                text=choice["text"],
-                font=("Arial", 12, "bold"),
-                bg=colors[i % len(colors)],
-                fg='white',
-                relief='raised',
-                bd=3,
-                command=lambda c=choice: self.make_choice(c),
-                height=2
-            )
-            button.pack(fill='x', pady=5)
+        self.choice_bar.show([
+            {
+                'text': choice["text"],
+                'bg': colors[i % len(colors)],
+                'command': lambda c=choice: self.make_choice(c),
+            }
+            for i, choice in enumerate(self.state.current_choices)
+        ], warning=warning)
     
     def make_choice(self, choice):
         """处理选择"""
-        # 记录选择
-        self.add_log(f"选择了：{choice['text']}")
-        
-        # 增加选择计数
-        self.choice_count += 1
-        # 增加选择事件计数
-        self.choice_event_count += 1
-        
-        # 应用效果并获取修改信息
-        changes = self.apply_effects(choice["effects"])
+        level = self.state.level
+        changes = self.state.make_choice(choice)
+        self.update_attributes_display(*self._effect_view_keys(choice['effects'], level), 'choices')
         
         # 显示结果界面
         self.show_choice_result(choice, changes)
     
     def handle_auto_roll_event(self, event_data):
         """处理自动roll点事件"""
-        auto_roll = event_data.get("auto_roll")
-        if not auto_roll:
+        level = self.state.level
+        result = self.state.resolve_auto_roll(event_data)
+        if result is None:
             return False
-        
-        # 增加选择计数
-        self.choice_count += 1
-        
-        # 解析成功概率公式
-        success_prob = self.calculate_success_probability(auto_roll["success_probability"])
-        
-        # 进行roll点
-        roll_result = random.randint(1, 100)
-        success = roll_result <= success_prob
-        
-        if success:
-            # 成功效果
-            changes = self.apply_effects(auto_roll["success_effects"])
-            description = auto_roll["success_description"]
-            self.add_log(f"🎯 Roll点成功！({roll_result}/{success_prob})")
-        else:
-            # 失败效果
-            changes = self.apply_effects(auto_roll["failure_effects"])
-            description = auto_roll["failure_description"]
-            self.add_log(f"❌ Roll点失败！({roll_result}/{success_prob})")
+        description, changes = result
+        auto_roll = event_data['auto_roll']
+        effects = list(auto_roll.get('success_effects', {})) + list(auto_roll.get('failure_effects', {}))
+        self.update_attributes_display(*self._effect_view_keys(effects, level), 'choices')
         
         # 显示结果
         self.show_auto_roll_result(description, changes)
         return True
     
-    def calculate_success_probability(self, formula):
-        """计算成功概率"""
-        try:
-            # 替换公式中的属性名称为实际值
-            formula_str = formula
-            for attr_name, attr_value in self.attributes.items():
-                formula_str = formula_str.replace(attr_name, str(attr_value))
-            
-            # 计算概率（限制在1-100之间）
-            probability = eval(formula_str)
-            return max(1, min(100, int(probability)))
-        except:
-            # 如果计算出错，返回默认概率
-            return 50
-    
-    def required_exp_for_next_level(self):
-        """计算下一等级所需经验。规则：0->1 需100点；随等级递增，每级增加100。"""
-        return (self.level + 1) * 100
-
-    def check_and_apply_level_ups(self):
-        """检查并处理升级：经验达阈值则升级，所有属性+3，可连跳多级。"""
-        leveled = False
-        while self.experience >= self.required_exp_for_next_level():
-            need = self.required_exp_for_next_level()
-            self.experience -= need
-            self.level += 1
-            # 所有基础属性+3
-            for key in list(self.attributes.keys()):
-                self.attributes[key] += 3
-            leveled = True
-            self.add_log(f"🎉 升级！当前等级 {self.level}，所有属性 +3")
-        if leveled:
-            # 同步属性显示由调用方统一触发
-            pass
-
-    def apply_effects(self, effects):
-        """应用选择效果，返回修改信息"""
-        changes = []  # 存储所有修改信息
-        
-        for effect, value in effects.items():
-            # 中文键名兼容
-            effect_internal = EFFECT_KEY_MAP.get(effect, effect)
-            if effect in self.attributes:
-                # 属性效果
-                if isinstance(value, tuple):
-                    change = random.randint(value[0], value[1])
-                else:
-                    change = value
-                self.attributes[effect] += change
-                changes.append(f"{effect} {change:+d} (当前: {self.attributes[effect]})")
-                self.add_log(f"{effect} {change:+d} (当前: {self.attributes[effect]})")
-            elif effect_internal == "health":
-                # 生命值效果
-                if isinstance(value, tuple):
-                    change = random.randint(value[0], value[1])
-                else:
-                    change = value
-                self.health = min(self.max_health, self.health + change)
-                changes.append(f"生命值 {change:+d} (当前: {self.health})")
-                self.add_log(f"生命值 {change:+d} (当前: {self.health})")
-            elif effect_internal == "magic":
-                # 魔法值效果
-                if isinstance(value, tuple):
-                    change = random.randint(value[0], value[1])
-                else:
-                    change = value
-                self.magic = min(self.max_magic, self.magic + change)
-                changes.append(f"魔法值 {change:+d} (当前: {self.magic})")
-                self.add_log(f"魔法值 {change:+d} (当前: {self.magic})")
-            elif effect_internal == "experience":
-                # 经验值效果
-                if isinstance(value, tuple):
-                    change = random.randint(value[0], value[1])
-                else:
-                    change = value
-                self.experience += change
-                changes.append(f"经验值 {change:+d} (当前: {self.experience})")
-                self.add_log(f"经验值 {change:+d} (当前: {self.experience})")
-        
-        # 升级检查与显示更新
-        self.check_and_apply_level_ups()
-        self.update_attributes_display()
-        
-        return changes
-    
     def show_choice_result(self, choice, changes):
         """显示选择结果"""
-        self.event_text.config(state='normal')
-        self.event_text.delete(1.0, 'end')
-        self.event_text.insert('end', f"✅ 选择结果\n\n")
-        self.event_text.insert('end', f"{choice['description']}\n\n")
-        
-        # 显示属性修改
-        if changes:
-            self.event_text.insert('end', "📊 属性变化：\n")
-            for change in changes:
-                self.event_text.insert('end', f"• {change}\n")
-            self.event_text.insert('end', "\n")
-        
-        self.event_text.config(state='disabled')
+        replace_text(self.event_text, "✅ 选择结果\n\n" + f"{choice['description']}\n\n" + self._changes_text(changes))
         
         # 更新选择按钮为继续按钮
         self.show_continue_button()
     
     def show_auto_roll_result(self, description, changes):
         """显示自动roll点结果"""
-        self.event_text.config(state='normal')
         # 不清空现有内容，在现有内容基础上添加结果
-        self.event_text.insert('end', f"\n🎲 自动Roll点结果\n\n")
-        self.event_text.insert('end', f"{description}\n\n")
-        
-        # 显示属性修改
-        if changes:
-            self.event_text.insert('end', "📊 属性变化：\n")
-            for change in changes:
-                self.event_text.insert('end', f"• {change}\n")
-            self.event_text.insert('end', "\n")
-        
-        self.event_text.config(state='disabled')
+        append_text(self.event_text, "\n🎲 自动Roll点结果\n\n" + f"{description}\n\n" + self._changes_text(changes))
         
         # 显示继续按钮
         self.show_continue_button()
     
+    @staticmethod
+    def _changes_text(changes):
+        """属性修改列表的显示文本"""
+        if not changes:
+            return ""
+        return "📊 属性变化：\n" + "".join(f"• {change}\n" for change in changes) + "\n"
+    
     def show_continue_button(self):
         """显示继续按钮"""
-        # 清除现有按钮
-        for widget in self.choice_frame.winfo_children():
-            widget.destroy()
-        
-        # 创建继续按钮
-        continue_button = tk.Button(
-            self.choice_frame,
-            text="🚀 继续冒险",
-            font=("Arial", 14, "bold"),
-            bg='#27ae60',
-            fg='white',
-            relief='raised',
-            bd=3,
-            command=self.continue_adventure,
-            height=3
-        )
-        continue_button.pack(fill='x', pady=10)
+        self.choice_bar.show([{
+            'text': "🚀 继续冒险",
+            'font': ("Arial", 14, "bold"),
+            'bg': '#27ae60',
+            'command': self.continue_adventure,
+            'height': 3,
+            'pady': 10,
+        }])
     
     def continue_adventure(self):
         """继续冒险，显示下一个随机事件"""
         self.add_log("继续冒险...")
         
         # 按阶段检查是否需要触发boss战斗
-        stage = self.stages[self.current_stage_index]
-        if self.choice_count >= stage['event_limit']:
-            self.add_log(f"⚠️ {stage['name']}阶段的Boss正在靠近...")
+        if self.state.is_boss_due():
+            self.add_log(f"⚠️ {self.state.current_stage()['name']}阶段的Boss正在靠近...")
             self.start_boss_battle()
         else:
             self.show_random_event()
     
     def calculate_battle_stats(self):
         """计算战斗属性"""
-        # 血量 = 体质 * 5
-        battle_health = self.attributes['体质'] * 5
-        # 魔法上限 = 智力 * 5
-        battle_magic = self.attributes['智力'] * 5
-        # 攻击力 = 情商 * 1
-        battle_attack = self.attributes['情商']
-        # 闪避概率 = 幸运 * 2%
-        battle_dodge = self.attributes['幸运'] * 2
-        
-        return {
-            'health': battle_health,
-            'magic': battle_magic,
-            'attack': battle_attack,
-            'dodge': battle_dodge
-        }
+        return self.state.calculate_battle_stats()
     
-    def start_boss_battle(self):
-        """开始boss战斗（委托至独立模块）"""
-        # 锁定当前阶段Boss血量并准备战斗（每阶段只战一次）
-        stage = self.stages[self.current_stage_index]
-        self.boss_max_health = stage['boss_hp']
-        self.boss_current_health = self.boss_max_health
+    def start_boss_battle(self, resume=False):
+        """开始boss战斗（委托至独立模块）；resume 为 True 时从存档中的血量继续"""
+        # 战斗模块在第一次 Boss 战时才导入
+        from boss_battle import BossBattleUI
+        if not resume:
+            self.state.prepare_boss_battle()
 
         callbacks = {
             'on_log': self.add_log,
             'on_battle_end': self._on_boss_battle_end,
-            'get_player_stats': self.calculate_battle_stats,
-            'get_boss_persistent': self._get_boss_persistent,
-            'set_boss_persistent': self._set_boss_persistent,
-            'update_main_attributes': self.update_attributes_display,
+            'get_player_stats': self.state.calculate_battle_stats,
+            'get_boss_persistent': self.state.get_boss_persistent,
+            'set_boss_persistent': self.state.set_boss_persistent,
+            'update_main_attributes': lambda: self.update_attributes_display(*BATTLE_END_VIEW_KEYS),
             'on_continue_game': self.show_random_event,
+            'get_battle_progress': lambda: self.state.battle_progress,
+            'on_battle_action': self.state.record_battle_action,
+            'rng': self.state.rng.combat,
         }
 
         # 实例化 Boss 战 UI（独立窗口）
         self.boss_battle_ui = BossBattleUI(self.root, callbacks)
 
-    def _get_boss_persistent(self):
-        return self.boss_current_health, self.boss_max_health
-
-    def _set_boss_persistent(self, new_health):
-        self.boss_current_health = max(0, min(self.boss_max_health, new_health))
-
     def _on_boss_battle_end(self, victory, boss_remaining_health, exp_delta):
-        # 由 Boss 模块回调：同步经验
-        self.experience += exp_delta
-
-        # 结算与阶段推进
-        stage = self.stages[self.current_stage_index]
-        if victory:
-            reward = stage.get('reward', {})
-            if reward:
-                for attr_name, delta in reward.items():
-                    if attr_name in self.attributes:
-                        self.attributes[attr_name] += int(delta)
-                self.add_log(f"🎁 击败{stage['name']}Boss，获得属性奖励：" + ", ".join([f"{k}+{v}" for k, v in reward.items()]))
-        else:
-            self.add_log(f"💡 未能击败{stage['name']}Boss，但你从战斗中学到了很多。")
-
-        # 不论胜负，进入下一阶段；重置阶段计数
-        self.choice_count = 0
-        if self.current_stage_index < len(self.stages) - 1:
-            self.current_stage_index += 1
-            next_stage = self.stages[self.current_stage_index]
-            self.boss_max_health = next_stage['boss_hp']
-            self.boss_current_health = self.boss_max_health
-            self.add_log(f"➡️ 进入下一阶段：{next_stage['name']}")
-        else:
-            self.add_log("🏁 你已完成所有阶段的人生挑战！")
-
-        self.update_attributes_display()
+        # 由 Boss 模块回调：结算与阶段推进
+        self.state.on_boss_battle_end(victory, boss_remaining_health, exp_delta)
+        self.update_attributes_display(*BATTLE_END_VIEW_KEYS)
     
     
     def create_attributes_display(self, parent):
@@ -719,10 +441,10 @@ class GameMain:
         
         # 创建属性标签
         self.attr_labels = {}
-        for attr_name in self.attributes:
+        for attr_name in self.state.attributes:
             label = tk.Label(
                 self.attr_frame,
-                text=f"{attr_name}: {self.attributes[attr_name]}",
+                text=f"{attr_name}: {self.state.attributes[attr_name]}",
                 font=("Arial", 12),
                 bg='#34495e',
                 fg='#ecf0f1'
@@ -733,7 +455,7 @@ class GameMain:
         # 生命值和魔法值显示
         self.health_label = tk.Label(
             self.attr_frame,
-            text=f"❤️ 生命值: {self.health}/{self.max_health}",
+            text=f"❤️ 生命值: {self.state.health}/{self.state.max_health}",
             font=("Arial", 12),
             bg='#34495e',
             fg='#e74c3c'
@@ -742,7 +464,7 @@ class GameMain:
         
         self.magic_label = tk.Label(
             self.attr_frame,
-            text=f"🔮 魔法值: {self.magic}/{self.max_magic}",
+            text=f"🔮 魔法值: {self.state.magic}/{self.state.max_magic}",
             font=("Arial", 12),
             bg='#34495e',
             fg='#9b59b6'
@@ -751,7 +473,7 @@ class GameMain:
         
         self.exp_label = tk.Label(
             self.attr_frame,
-            text=f"⭐ 经验值: {self.experience}",
+            text=f"⭐ 经验值: {self.state.experience}",
             font=("Arial", 12),
             bg='#34495e',
             fg='#f39c12'
@@ -759,7 +481,7 @@ class GameMain:
         self.exp_label.pack(anchor='w', pady=2)
         self.level_label = tk.Label(
             self.attr_frame,
-            text=f"🏅 等级: {self.level}",
+            text=f"🏅 等级: {self.state.level}",
             font=("Arial", 12),
             bg='#34495e',
             fg='#ecf0f1'
@@ -767,7 +489,7 @@ class GameMain:
         self.level_label.pack(anchor='w', pady=2)
         self.next_exp_label = tk.Label(
             self.attr_frame,
-            text=f"⬆️ 下一级需求: {self.required_exp_for_next_level()} 经验",
+            text=f"⬆️ 下一级需求: {self.state.required_exp_for_next_level()} 经验",
             font=("Arial", 12),
             bg='#34495e',
             fg='#ecf0f1'
@@ -786,7 +508,7 @@ class GameMain:
         # Boss血量显示
         self.boss_health_display_label = tk.Label(
             self.attr_frame,
-            text=f"👹 Boss血量: {self.boss_current_health}/{self.boss_max_health}",
+            text=f"👹 Boss血量: {self.state.boss_current_health}/{self.state.boss_max_health}",
             font=("Arial", 12),
             bg='#34495e',
             fg='#e74c3c'
@@ -796,35 +518,53 @@ class GameMain:
         # 阶段显示
         self.stage_label = tk.Label(
             self.attr_frame,
-            text=f"🗺️ 当前阶段: {self.stages[self.current_stage_index]['name']}",
+            text=f"🗺️ 当前阶段: {self.state.current_stage()['name']}",
             font=("Arial", 12),
             bg='#34495e',
             fg='#ecf0f1'
         )
         self.stage_label.pack(anchor='w', pady=2)
     
-    def update_attributes_display(self):
-        """更新属性显示"""
-        for attr_name, value in self.attributes.items():
-            self.attr_labels[attr_name].config(text=f"{attr_name}: {value}")
-        
-        self.health_label.config(text=f"❤️ 生命值: {self.health}/{self.max_health}")
-        self.magic_label.config(text=f"🔮 魔法值: {self.magic}/{self.max_magic}")
-        self.exp_label.config(text=f"⭐ 经验值: {self.experience}")
-        if hasattr(self, 'level_label'):
-            self.level_label.config(text=f"🏅 等级: {self.level}")
-        if hasattr(self, 'next_exp_label'):
-            self.next_exp_label.config(text=f"⬆️ 下一级需求: {self.required_exp_for_next_level()} 经验")
-        self.choice_count_label.config(text=self._choice_progress_text())
-        self.boss_health_display_label.config(text=f"👹 Boss血量: {self.boss_current_health}/{self.boss_max_health}")
-        if hasattr(self, 'stage_label'):
-            self.stage_label.config(text=f"🗺️ 当前阶段: {self.stages[self.current_stage_index]['name']}")
-        if hasattr(self, 'title_label'):
-            self.title_label.config(text=f"🗺️ 当前阶段: {self.stages[self.current_stage_index]['name']}")
+    def _bind_attribute_views(self):
+        """登记属性面板各标签的取值函数"""
+        state = self.state
+        render = self.render
+        for attr_name, label in self.attr_labels.items():
+            render.bind_label(('attr', attr_name), label, lambda n=attr_name: f"{n}: {state.attributes[n]}")
+        render.bind_label('health', self.health_label, lambda: f"❤️ 生命值: {state.health}/{state.max_health}")
+        render.bind_label('magic', self.magic_label, lambda: f"🔮 魔法值: {state.magic}/{state.max_magic}")
+        render.bind_label('exp', self.exp_label, lambda: f"⭐ 经验值: {state.experience}")
+        render.bind_label('level', self.level_label, lambda: f"🏅 等级: {state.level}")
+        render.bind_label('next_exp', self.next_exp_label,
+                          lambda: f"⬆️ 下一级需求: {state.required_exp_for_next_level()} 经验")
+        render.bind_label('choices', self.choice_count_label, self._choice_progress_text)
+        render.bind_label('boss_health', self.boss_health_display_label,
+                          lambda: f"👹 Boss血量: {state.boss_current_health}/{state.boss_max_health}")
+        render.bind_label('stage', self.stage_label, lambda: f"🗺️ 当前阶段: {state.current_stage()['name']}")
+        render.bind_label('title', self.title_label, lambda: f"🗺️ 当前阶段: {state.current_stage()['name']}")
+    
+    def update_attributes_display(self, *keys):
+        """标记 keys 对应的标签待刷新（不传表示全部，用于载入属性、读档等整体变化）"""
+        self.render.mark(*keys)
+
+    def _effect_view_keys(self, effects, level_before):
+        """效果键（选项或 Roll 点的 effects）会改动的标签；升级时所有属性也会变"""
+        keys = []
+        for effect in effects:
+            internal = EFFECT_KEY_MAP.get(effect, effect)
+            if effect in self.state.attributes:
+                keys.append(('attr', effect))
+            elif internal in ('health', 'magic'):
+                keys.append(internal)
+            elif internal == 'experience':
+                keys.append('exp')
+        if self.state.level != level_before:
+            keys.extend(ATTRIBUTE_VIEW_KEYS + PROGRESS_VIEW_KEYS)
+        return keys
 
     def _choice_progress_text(self):
-        stage = self.stages[self.current_stage_index]
-        return f"🎯 选择次数: {self.choice_count}/{stage['event_limit']}"
+        stage = self.state.current_stage()
+        return f"🎯 选择次数: {self.state.choice_count}/{stage['event_limit']}"
     
     def create_game_log(self, parent):
         """创建游戏日志"""
@@ -850,6 +590,8 @@ class GameMain:
             state='disabled'
         )
         self.log_text.pack(padx=20, pady=10)
+        # 批量刷新、限制行数的日志
+        self.log = LogSink(self.log_text)
         
         # 滚动条
         scrollbar = tk.Scrollbar(parent, orient='vertical', command=self.log_text.yview)
@@ -860,39 +602,77 @@ class GameMain:
         self.add_log("欢迎来到游戏世界！")
         self.add_log("您的冒险即将开始...")
     
-    def load_character_attributes(self, attr_string):
-        """加载角色属性"""
+    def load_character_attributes(self, attributes):
+        """加载角色属性（字典）"""
         try:
-            # 首先尝试JSON解析
-            attr_dict = json.loads(attr_string)
-            self.attributes.update(attr_dict)
-            self.add_log(f"角色属性已加载：{attr_dict}")
+            self.state.load_character_attributes(attributes)
+            self.add_log(f"角色属性已加载：{attributes}")
             # 更新属性显示
             self.update_attributes_display()
-        except json.JSONDecodeError:
-            # 如果JSON解析失败，尝试使用ast.literal_eval（向后兼容）
-            try:
-                attr_dict = ast.literal_eval(attr_string)
-                self.attributes.update(attr_dict)
-                self.add_log(f"角色属性已加载（兼容模式）：{attr_dict}")
-                self.update_attributes_display()
-            except Exception as e:
-                self.add_log(f"加载角色属性失败：{str(e)}")
         except Exception as e:
             self.add_log(f"加载角色属性失败：{str(e)}")
     
     
     def add_log(self, message):
-        """添加日志消息"""
-        self.log_text.config(state='normal')
-        self.log_text.insert('end', f"{message}\n")
-        self.log_text.see('end')
-        self.log_text.config(state='disabled')
+        """添加日志消息（空闲时批量写入界面）"""
+        self.log.write(message)
     
 
-def main():
+# 无界面子命令：python game.py <命令> [参数...]
+COMMANDS = {
+    'simulate': 'simulate',
+    'battle': 'battle_vectorized',
+    'compile': 'event_bundle',
+    'lint': 'event_lint',
+    'replay': 'replay',
+    'golden': 'golden',
+    'bench': 'bench',
+    'solve': 'adventure_solver',
+    'adventure': 'adventure_sim',
+}
+
+
+def profiled_methods():
+    """计时的热点路径（GAME_PROFILE 环境变量或 F12 开启）"""
+    from boss_battle import BossBattleUI
+    return [
+        (GameMain, ['show_random_event', 'make_choice', 'continue_adventure', 'start_boss_battle']),
+        (GameState, ['_select_next_event_name', 'make_choice', 'apply_effects']),
+        (BossBattleUI, ['player_attack', 'player_defend', 'boss_turn']),
+    ]
+
+
+def create_scene(root, frame, seed=None):
+    """创建人生游戏场景（供 SceneManager 注册；掷骰界面进入游戏时才调用）"""
+    # 事件库在后台载入，与创建组件同时进行（掷骰界面已预载时直接取用）
+    preload_event_library()
+    if os.environ.get(profiling.ENV_VAR) or os.environ.get(profiling.TRACE_ENV_VAR):
+        profiling.install_from_env(profiled_methods())
+    return GameMain(root, frame, seed)
+
+
+def main(started=None):
+    """started：玩家点击“进入游戏”的 perf_counter 时刻，用于报告启动耗时"""
+    if started is None:
+        started = time.perf_counter()
+    if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+        module = __import__(COMMANDS[sys.argv[1]])
+        sys.exit(module.main(sys.argv[2:]))
+    
+    # 界面启动参数：[角色属性JSON] [--seed 种子]
+    args, seed = split_seed_arg(sys.argv[1:])
+    attributes = None
+    if args:
+        try:
+            attributes = parse_attributes(args[0])
+        except ValueError as e:
+            print(f"加载角色属性失败：{e}")
+    # 事件库在后台载入，与创建窗口同时进行
+    preload_event_library()
     root = tk.Tk()
-    app = GameMain(root)
+    scenes = SceneManager(root)
+    scenes.register('life', lambda frame: create_scene(root, frame, seed))
+    scenes.show('life', attributes=attributes, started=started)
     root.mainloop()
 
 if __name__ == "__main__":
@@ -0,0 +1,672 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import sys
+import threading
+from event_index import EventIndex, POOL_POSITIVE, POOL_NEGATIVE
+from event_expr import compile_expression
+import battle_rules
+import event_bundle
+from rng_streams import RngStreams
+
+# 事件效果键名映射（向后兼容中文键）
+EFFECT_KEY_MAP = {
+    "经验": "experience",
+    "生命值": "health",
+    "魔法值": "magic",
+}
+
+# 基础属性名（表达式中可引用的名称）
+ATTRIBUTE_NAMES = ('体质', '智力', '情商', '幸运')
+
+# 负面事件列表
+NEGATIVE_EVENTS = (
+    "拖延症发作", "懒惰成性", "社交恐惧症", "学习倦怠",
+    "身体健康问题", "网络成瘾", "人际关系破裂", "经济困难", "自我怀疑",
+)
+
+# 阶段配置
+STAGES = [
+    {"name": "幼儿园", "event_limit": 10, "boss_hp": 80,  "reward": {"体质": 1, "智力": 1, "情商": 1, "幸运": 1}},
+    {"name": "小学",   "event_limit": 15, "boss_hp": 120, "reward": {"体质": 1, "智力": 1, "情商": 1, "幸运": 1}},
+    {"name": "中学",   "event_limit": 20, "boss_hp": 160, "reward": {"体质": 2, "智力": 1, "情商": 1, "幸运": 1}},
+    {"name": "高中",   "event_limit": 20, "boss_hp": 200, "reward": {"体质": 1, "智力": 2, "情商": 1, "幸运": 1}},
+    {"name": "大学",   "event_limit": 30, "boss_hp": 260, "reward": {"体质": 1, "智力": 2, "情商": 2, "幸运": 1}},
+    {"name": "工作",   "event_limit": 10, "boss_hp": 300, "reward": {"体质": 2, "智力": 2, "情商": 2, "幸运": 2}},
+]
+
+# 默认事件库文件（与本模块同目录）
+DEFAULT_EVENTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'events.json')
+
+
+# 后台预载：{事件文件: (线程, 结果槽)}
+_preloads = {}
+
+
+def preload_event_library(events_file=None):
+    """在后台线程中载入并编译事件库（如掷骰界面显示期间），之后创建的 GameState 直接取用"""
+    events_file = events_file or DEFAULT_EVENTS_FILE
+    if events_file in _preloads:
+        return
+    slot = {}
+
+    def run():
+        try:
+            key = event_bundle.source_version(events_file)
+            library, event_meta = event_bundle.load_event_library(events_file)
+            slot['result'] = key, library, event_bundle.compile_meta(event_meta, ATTRIBUTE_NAMES)
+        except Exception:
+            # 出错时交给同步载入，由它报告具体错误
+            pass
+
+    thread = threading.Thread(target=run, name='event-preload', daemon=True)
+    _preloads[events_file] = (thread, slot)
+    thread.start()
+
+
+def _take_preloaded(events_file):
+    """取走预载结果 (library, 已编译的 meta)；没有预载、失败或文件已被修改时返回 None"""
+    entry = _preloads.pop(events_file, None)
+    if entry is None:
+        return None
+    thread, slot = entry
+    thread.join()
+    result = slot.get('result')
+    if result is None:
+        return None
+    key, library, event_meta = result
+    try:
+        if event_bundle.source_version(events_file) != key:
+            return None
+    except OSError:
+        return None
+    return library, event_meta
+
+
+class GameState:
+    """人生模拟的纯逻辑核心，不依赖 tkinter。
+
+    负责属性、阶段、旗标、事件选择、效果结算、升级与 Boss 交接。
+    界面（GameMain）只负责展示，通过 on_log(message) 回调接收日志。
+    """
+
+    def __init__(self, on_log=None, events_file=None, seed=None, load_events=True):
+        self.on_log = on_log
+        # 各子系统独立的随机数流；seed 为 None 时随机生成（可从 rng.master_seed 读回）
+        self.rng = RngStreams(seed)
+        # 存档记录回调 recorder(record)：每个已结算的决定产生一条紧凑记录（见 replay）
+        self.recorder = None
+        self.events_file = events_file or DEFAULT_EVENTS_FILE
+
+        # 负面事件列表
+        self.negative_events = list(NEGATIVE_EVENTS)
+
+        # 阶段配置
+        self.stages = STAGES
+
+        # 事件元数据
+        self.event_meta = {}  # {name: {weight,cooldown,once,min_level,max_level,requires,excludes,tags}}
+
+        # 初始化事件库（load_events 为 False 时先以空事件库开局，稍后调用 load_event_library）
+        self.event_library = {}
+        if load_events:
+            self.init_event_library(events_file)
+        self.event_index = None
+
+        self.reset()
+
+    def load_event_library(self):
+        """延迟载入事件库并重置为新一局（配合 load_events=False，界面先完成首帧）"""
+        self.init_event_library()
+        self.event_index = None
+        self.reset()
+
+    def reset(self):
+        """重置为新一局（保留已加载的事件库）"""
+        # 角色属性
+        self.attributes = {name: 0 for name in ATTRIBUTE_NAMES}
+
+        # 游戏状态
+        self.level = 1
+        self.experience = 0
+        self.health = 100
+        self.max_health = 100
+        self.magic = 50
+        self.max_magic = 50
+        self.choice_count = 0  # 选择计数器（当前阶段内）
+        self.event_count = 0  # 事件计数器
+        self.choice_event_count = 0  # 选择事件计数器
+        self.last_negative_event = 0  # 上次负面事件的事件计数
+
+        # 事件触发状态
+        self.event_trigger_count = {name: 0 for name in self.event_library}  # {name: count}
+        self.event_last_seen = {name: -10**9 for name in self.event_library}  # {name: last_event_index}
+        self.flags = set()  # 如：见过_事件名
+        self.current_event_name = None
+
+        # Boss状态
+        self.current_stage_index = 0
+        self.boss_max_health = self.stages[self.current_stage_index]["boss_hp"]
+        self.boss_current_health = self.boss_max_health
+        self.finished = False  # 是否已完成全部阶段
+
+        # 当前事件
+        self.current_event = None
+        self.current_choices = []
+        # 界面所处环节：event / choice（等待选择）/ result（等待继续）/ battle
+        self.phase = None
+        self.battle_progress = None  # 进行中的 Boss 战 (玩家血量, Boss血量)
+
+        # 事件可用性索引（静态分区只随事件库重建）
+        if self.event_index is None:
+            self.event_index = EventIndex(self)
+        else:
+            self.event_index.rebuild()
+
+    def add_log(self, message):
+        """转发日志到宿主（无宿主时丢弃）"""
+        if self.on_log:
+            self.on_log(message)
+
+    def _record(self, *record):
+        if self.recorder is not None:
+            self.recorder(record)
+
+    def start_recording(self, recorder):
+        """开始向 recorder 输出记录；首条记录含主种子与初始属性，足以重新执行整局"""
+        self.recorder = recorder
+        self._record('start', self.rng.master_seed, dict(self.attributes))
+
+    def reseed_streams(self, salt):
+        """以 (主种子, salt) 重新派生随机数流并记录（读档续玩时使用）"""
+        self.rng.seed(self.rng.master_seed, salt)
+        self._record('reseed', salt)
+
+    # ---- 事件库 ----
+    def init_event_library(self, events_file=None):
+        """从JSON文件初始化事件库（优先使用预编译缓存 events.json.bundle）。
+
+        加载提示写到 stderr，无界面子命令（simulate --json 等）的 stdout 只有结果
+        """
+        try:
+            events_file = events_file or self.events_file
+            preloaded = _take_preloaded(events_file)
+            if preloaded is not None:
+                library, compiled_meta = preloaded
+            else:
+                library, event_meta = event_bundle.load_event_library(events_file)
+                # 载入时编译前置条件与成功率公式，错误带上事件名
+                compiled_meta = event_bundle.compile_meta(event_meta, ATTRIBUTE_NAMES)
+            self.event_meta.update(compiled_meta)
+            self.event_library = library
+
+            print("事件库加载成功！", file=sys.stderr)
+
+        except FileNotFoundError:
+            print("错误：找不到 events.json 文件！", file=sys.stderr)
+            # 如果文件不存在，使用默认事件库
+            self.event_library = self.get_default_events()
+        except json.JSONDecodeError as e:
+            print(f"错误：JSON文件格式错误 - {str(e)}", file=sys.stderr)
+            self.event_library = self.get_default_events()
+        except Exception as e:
+            print(f"错误：加载事件库失败 - {str(e)}", file=sys.stderr)
+            self.event_library = self.get_default_events()
+
+    def reload_event_library(self, loaded=None):
+        """热更新：重新读取事件文件，只替换内容有变化的事件。
+
+        保留触发次数、冷却记录、旗标与当前阶段；返回 (新增, 修改, 删除) 事件名列表。
+        文件有误时抛出异常，当前事件库保持不变。
+        loaded：已在后台线程中读好的 event_bundle.load_event_library 结果
+        """
+        if loaded is None:
+            loaded = event_bundle.load_event_library(self.events_file)
+        library, event_meta = loaded
+
+        # 按内容摘要比较，不必解码事件正文
+        old_digests = {n: self.event_meta.get(n, {}).get('digest') for n in self.event_library}
+        added = [n for n in library if n not in old_digests]
+        changed = [n for n in library if n in old_digests and event_meta[n]['digest'] != old_digests[n]]
+        removed = [n for n in old_digests if n not in library]
+
+        # 先编译全部变化，确认无误后再修改状态
+        patch_meta = event_bundle.compile_meta({n: event_meta[n] for n in added + changed}, ATTRIBUTE_NAMES)
+
+        old_meta = {n: self.event_meta.get(n, {}) for n in changed + removed}
+        old_meta.update({n: {} for n in added})
+        old_library = self.event_library
+        self.event_library = library
+        for name in removed:
+            self.event_meta.pop(name, None)
+        for name in added + changed:
+            self.event_meta[name] = patch_meta[name]
+            self.event_trigger_count.setdefault(name, 0)
+            self.event_last_seen.setdefault(name, -10**9)
+
+        if old_meta:
+            self.event_index.update_events(old_meta)
+        # 旧事件库不再被引用：释放其 mmap（LazyEventLibrary）
+        if old_library is not library:
+            close = getattr(old_library, 'close', None)
+            if close is not None:
+                close()
+        return added, changed, removed
+
+    def get_default_events(self):
+        """获取默认事件库（作为备用）"""
+        return {
+            "默认事件": {
+                "description": "🎮 这是一个默认事件，请检查 events.json 文件。",
+                "choices": [
+                    {"text": "🔧 修复问题", "effects": {"智力": (1, 2)}, "description": "你尝试修复了问题"},
+                    {"text": "🏃 离开这里", "effects": {"幸运": (1, 1)}, "description": "你离开了这里"},
+                    {"text": "🗣️ 寻求帮助", "effects": {"情商": (1, 1)}, "description": "你寻求了帮助"},
+                    {"text": "⏰ 等待", "effects": {"体质": (1, 1)}, "description": "你耐心等待"}
+                ]
+            }
+        }
+
+    def load_character_attributes(self, attr_dict):
+        """载入角色属性（dict）"""
+        self.attributes.update(attr_dict)
+        self._record('attributes', dict(attr_dict))
+
+    # ---- 事件选择 ----
+    def current_stage(self):
+        return self.stages[self.current_stage_index]
+
+    def next_event(self):
+        """抽取并进入下一个事件，返回 (event_name, is_negative)"""
+        # 增加事件计数
+        self.event_count += 1
+
+        event_name, is_negative = self._select_next_event_name()
+        self._enter_event(event_name, is_negative)
+        # 记录写在状态变化之后：存档快照紧跟记录生成，必须已包含这次变化
+        self._record('event', event_name, is_negative)
+        return event_name, is_negative
+
+    def _enter_event(self, event_name, is_negative):
+        """进入已选定的事件（不消耗随机数，回放存档时直接调用）"""
+        if is_negative:
+            self.last_negative_event = self.event_count
+            self.add_log(f"触发第{self.event_count}次事件 - 负面roll点事件: {event_name}")
+        else:
+            self.add_log(f"触发第{self.event_count}次事件 - 选择事件: {event_name}")
+
+        # 记录旗标与触发历史
+        self.flags.add(f"见过_{event_name}")
+        self.event_trigger_count[event_name] = self.event_trigger_count.get(event_name, 0) + 1
+        self.event_last_seen[event_name] = self.event_count
+        self.event_index.record_trigger(event_name)
+
+        self.current_event_name = event_name
+        self.current_event = self.event_library[event_name]
+        if "auto_roll" not in self.current_event and "choices" in self.current_event:
+            self.current_choices = self.current_event["choices"]
+        else:
+            self.current_choices = []
+        self.phase = 'choice' if self.current_choices else 'event'
+
+    def _select_next_event_name(self):
+        """选择下一个事件名，返回 (event_name, is_negative)"""
+        # 是否考虑负面事件
+        consider_negative = False
+        if self.choice_event_count >= 5:
+            consider_negative = (self.rng.selection.random() < 0.15 and (self.event_count - self.last_negative_event) >= 3)
+
+        # 候选池由索引增量维护（阶段/等级/冷却/once/前置）
+        index = self.event_index
+        index.sync()
+
+        if self.choice_event_count < 5:
+            consider_negative = False
+
+        if consider_negative:
+            name = index.sample(POOL_NEGATIVE, self.rng.selection)
+            if name:
+                return name, True
+
+        name = index.sample(POOL_POSITIVE, self.rng.selection)
+        if name:
+            return name, False
+
+        any_name = self.rng.selection.choice(self.event_index.all_names)
+        return any_name, (any_name in self.negative_events)
+
+    def _get_progress_level(self):
+        """简单的进度等级（以选择次数近似）"""
+        return max(1, self.choice_event_count)
+
+    def _check_requires(self, event_name):
+        """检查事件前置条件（使用载入时编译好的检查函数）"""
+        check = self.event_meta.get(event_name, {}).get('requires_check')
+        if check is None:
+            return True
+        return check(self.attributes, self.flags)
+
+    # ---- 选择与Roll点 ----
+    def make_choice(self, choice, resolved=None):
+        """处理选择，返回属性变化描述列表。
+
+        resolved：回放时传入已结算的效果值，不再掷随机数
+        """
+        # 记录选择
+        self.add_log(f"选择了：{choice['text']}")
+
+        # 增加选择计数
+        self.choice_count += 1
+        # 增加选择事件计数
+        self.choice_event_count += 1
+        self.phase = 'result'
+
+        # 应用效果并获取修改信息
+        if resolved is not None:
+            return self.apply_effects(resolved)
+        resolved = {}
+        changes = self.apply_effects(choice["effects"], resolved)
+        index = next((i for i, c in enumerate(self.current_choices) if c is choice), None)
+        self._record('choice', index, resolved)
+        return changes
+
+    def resolve_auto_roll(self, event_data, outcome=None):
+        """结算自动roll点事件，返回 (description, changes)；非roll点事件返回 None
+
+        outcome：回放时传入已记录的 (roll_result, success_prob, resolved)
+        """
+        auto_roll = event_data.get("auto_roll")
+        if not auto_roll:
+            return None
+
+        # 增加选择计数
+        self.choice_count += 1
+        self.phase = 'result'
+
+        if outcome is not None:
+            roll_result, success_prob, resolved = outcome
+        else:
+            # 成功概率公式（优先使用载入时编译的版本）
+            formula = self.event_meta.get(self.current_event_name, {}).get('success_probability')
+            if formula is None or event_data is not self.current_event:
+                formula = auto_roll["success_probability"]
+            success_prob = self.calculate_success_probability(formula)
+
+            # 进行roll点
+            roll_result = self.rng.rolls.randint(1, 100)
+            resolved = None
+        success = roll_result <= success_prob
+
+        if resolved is None:
+            resolved = {}
+            effects = auto_roll["success_effects"] if success else auto_roll["failure_effects"]
+            changes = self.apply_effects(effects, resolved)
+            self._record('roll', roll_result, success_prob, resolved)
+        else:
+            changes = self.apply_effects(resolved)
+
+        if success:
+            # 成功效果
+            description = auto_roll["success_description"]
+            self.add_log(f"🎯 Roll点成功！({roll_result}/{success_prob})")
+        else:
+            # 失败效果
+            description = auto_roll["failure_description"]
+            self.add_log(f"❌ Roll点失败！({roll_result}/{success_prob})")
+
+        return description, changes
+
+    def calculate_success_probability(self, formula):
+        """计算成功概率（formula 为公式字符串或已编译的函数），限制在1-100之间"""
+        if isinstance(formula, str):
+            formula = compile_expression(formula, ATTRIBUTE_NAMES)
+        try:
+            probability = formula(self.attributes)
+        except ZeroDivisionError:
+            # 运行时除零（如 100/体质 且体质为0）沿用默认概率
+            return 50
+        return max(1, min(100, int(probability)))
+
+    # ---- 效果与升级 ----
+    def required_exp_for_next_level(self):
+        """计算下一等级所需经验。规则：0->1 需100点；随等级递增，每级增加100。"""
+        return (self.level + 1) * 100
+
+    def check_and_apply_level_ups(self):
+        """检查并处理升级：经验达阈值则升级，所有属性+3，可连跳多级。返回是否升级"""
+        leveled = False
+        while self.experience >= self.required_exp_for_next_level():
+            need = self.required_exp_for_next_level()
+            self.experience -= need
+            self.level += 1
+            # 所有基础属性+3
+            for key in list(self.attributes.keys()):
+                self.attributes[key] += 3
+            leveled = True
+            self.add_log(f"🎉 升级！当前等级 {self.level}，所有属性 +3")
+        return leveled
+
+    def apply_effects(self, effects, resolved=None):
+        """应用选择效果，返回修改信息；resolved 非空时写入每项实际结算的数值"""
+        changes = []  # 存储所有修改信息
+
+        for effect, value in effects.items():
+            # 中文键名兼容
+            effect_internal = EFFECT_KEY_MAP.get(effect, effect)
+            if effect in self.attributes:
+                # 属性效果
+                if isinstance(value, tuple):
+                    change = self.rng.effects.randint(value[0], value[1])
+                else:
+                    change = value
+                self.attributes[effect] += change
+                changes.append(f"{effect} {change:+d} (当前: {self.attributes[effect]})")
+            elif effect_internal == "health":
+                # 生命值效果
+                if isinstance(value, tuple):
+                    change = self.rng.effects.randint(value[0], value[1])
+                else:
+                    change = value
+                self.health = min(self.max_health, self.health + change)
+                changes.append(f"生命值 {change:+d} (当前: {self.health})")
+            elif effect_internal == "magic":
+                # 魔法值效果
+                if isinstance(value, tuple):
+                    change = self.rng.effects.randint(value[0], value[1])
+                else:
+                    change = value
+                self.magic = min(self.max_magic, self.magic + change)
+                changes.append(f"魔法值 {change:+d} (当前: {self.magic})")
+            elif effect_internal == "experience":
+                # 经验值效果
+                if isinstance(value, tuple):
+                    change = self.rng.effects.randint(value[0], value[1])
+                else:
+                    change = value
+                self.experience += change
+                changes.append(f"经验值 {change:+d} (当前: {self.experience})")
+            else:
+                continue
+            if resolved is not None:
+                resolved[effect] = change
+            self.add_log(changes[-1])
+
+        # 升级检查
+        self.check_and_apply_level_ups()
+
+        return changes
+
+    # ---- 阶段与Boss ----
+    def is_boss_due(self):
+        """当前阶段选择次数是否已达上限（需要Boss战）"""
+        return self.choice_count >= self.current_stage()['event_limit']
+
+    def calculate_battle_stats(self):
+        """计算战斗属性"""
+        # 血量 = 体质 * 5
+        battle_health = self.attributes['体质'] * 5
+        # 魔法上限 = 智力 * 5
+        battle_magic = self.attributes['智力'] * 5
+        # 攻击力 = 情商 * 1
+        battle_attack = self.attributes['情商']
+        # 闪避概率 = 幸运 * 2%
+        battle_dodge = self.attributes['幸运'] * 2
+
+        return {
+            'health': battle_health,
+            'magic': battle_magic,
+            'attack': battle_attack,
+            'dodge': battle_dodge
+        }
+
+    def prepare_boss_battle(self):
+        """锁定当前阶段Boss血量并准备战斗（每阶段只战一次）"""
+        stage = self.current_stage()
+        self.boss_max_health = stage['boss_hp']
+        self.boss_current_health = self.boss_max_health
+        self.phase = 'battle'
+        self.battle_progress = None
+        self._record('boss')
+
+    def get_boss_persistent(self):
+        return self.boss_current_health, self.boss_max_health
+
+    def settle_boss_battle(self, victory, boss_health):
+        """按 BossBattleUI.end_battle 的顺序结算战斗结果，返回获得的经验"""
+        self.set_boss_persistent(boss_health)
+        if victory and self.boss_current_health <= 0:
+            # Boss 被击败则重置血量
+            self.set_boss_persistent(self.boss_max_health)
+        exp_delta = battle_rules.VICTORY_EXP if victory else battle_rules.DEFEAT_EXP
+        self.on_boss_battle_end(victory, boss_health, exp_delta)
+        return exp_delta
+
+    def set_boss_persistent(self, new_health):
+        self.boss_current_health = max(0, min(self.boss_max_health, new_health))
+        self._record('boss_hp', self.boss_current_health)
+
+    def record_battle_action(self, action, player_health, boss_health):
+        """记录一次战斗行动后的双方血量（中途退出时可从此处继续战斗）"""
+        self.battle_progress = (player_health, boss_health)
+        self._record('battle', action, player_health, boss_health)
+
+    def on_boss_battle_end(self, victory, boss_remaining_health, exp_delta):
+        """Boss 战结算：同步经验并推进阶段"""
+        self.phase = 'result'
+        self.battle_progress = None
+        self.experience += exp_delta
+
+        # 结算与阶段推进
+        stage = self.current_stage()
+        if victory:
+            reward = stage.get('reward', {})
+            if reward:
+                for attr_name, delta in reward.items():
+                    if attr_name in self.attributes:
+                        self.attributes[attr_name] += int(delta)
+                self.add_log(f"🎁 击败{stage['name']}Boss，获得属性奖励：" + ", ".join([f"{k}+{v}" for k, v in reward.items()]))
+        else:
+            self.add_log(f"💡 未能击败{stage['name']}Boss，但你从战斗中学到了很多。")
+
+        # 不论胜负，进入下一阶段；重置阶段计数
+        self.choice_count = 0
+        if self.current_stage_index < len(self.stages) - 1:
+            self.current_stage_index += 1
+            next_stage = self.current_stage()
+            self.boss_max_health = next_stage['boss_hp']
+            self.boss_current_health = self.boss_max_health
+            self.add_log(f"➡️ 进入下一阶段：{next_stage['name']}")
+        else:
+            self.finished = True
+            self.add_log("🏁 你已完成所有阶段的人生挑战！")
+        self._record('battle_end', victory, boss_remaining_health, exp_delta)
+
+    # ---- 存档 ----
+    _SNAPSHOT_FIELDS = (
+        'level', 'experience', 'health', 'max_health', 'magic', 'max_magic',
+        'choice_count', 'event_count', 'choice_event_count', 'last_negative_event',
+        'current_event_name', 'current_stage_index', 'boss_max_health', 'boss_current_health',
+        'finished', 'phase', 'battle_progress',
+    )
+
+    def snapshot(self):
+        """当前局面的紧凑快照（只保存触发过的事件），可 marshal 序列化"""
+        snap = {field: getattr(self, field) for field in self._SNAPSHOT_FIELDS}
+        snap['attributes'] = dict(self.attributes)
+        snap['event_trigger_count'] = {n: c for n, c in self.event_trigger_count.items() if c}
+        snap['event_last_seen'] = {n: i for n, i in self.event_last_seen.items() if i > -10**9}
+        snap['flags'] = sorted(self.flags)
+        snap['rng'] = (self.rng.master_seed, self.rng.salt)
+        return snap
+
+    def restore(self, snap):
+        """从快照恢复局面（事件库中已删除的事件会被忽略）"""
+        self.reset()
+        for field in self._SNAPSHOT_FIELDS:
+            if field in snap:
+                setattr(self, field, snap[field])
+        self.attributes.update(snap.get('attributes', {}))
+        for name, count in snap.get('event_trigger_count', {}).items():
+            if name in self.event_library:
+                self.event_trigger_count[name] = count
+        for name, seen in snap.get('event_last_seen', {}).items():
+            if name in self.event_library:
+                self.event_last_seen[name] = seen
+        self.flags = set(snap.get('flags', ()))
+        if 'rng' in snap:
+            self.rng.seed(*snap['rng'])
+        if self.battle_progress is not None:
+            self.battle_progress = tuple(self.battle_progress)
+        self._restore_current_event()
+        self.event_index.rebuild()
+
+    def _restore_current_event(self):
+        name = self.current_event_name
+        if name is not None and name in self.event_library:
+            self.current_event = self.event_library[name]
+            self.current_choices = self.current_event.get("choices", []) if "auto_roll" not in self.current_event else []
+        else:
+            self.current_event_name = None
+            self.current_event = None
+            self.current_choices = []
+            if self.phase == 'choice':
+                self.phase = 'result'
+
+    def replay(self, records):
+        """按顺序回放存档记录（使用记录中的结算值，不掷随机数、不写日志、不再次记录）。
+
+        随机数流停留在快照时的位置；续玩前应调用 reseed_streams。
+        """
+        on_log, recorder = self.on_log, self.recorder
+        self.on_log = self.recorder = None
+        try:
+            for record in records:
+                kind = record[0]
+                if kind == 'event':
+                    self.event_count += 1
+                    if record[1] in self.event_library:
+                        self._enter_event(record[1], record[2])
+                    else:
+                        # 事件已从事件库删除：跳过它的后续记录
+                        self.current_event_name = None
+                        self._restore_current_event()
+                elif kind == 'choice':
+                    if record[1] is not None and record[1] < len(self.current_choices):
+                        self.make_choice(self.current_choices[record[1]], record[2])
+                elif kind == 'roll':
+                    if self.current_event is not None and 'auto_roll' in self.current_event:
+                        self.resolve_auto_roll(self.current_event, record[1:])
+                elif kind == 'attributes':
+                    self.load_character_attributes(record[1])
+                elif kind == 'boss':
+                    self.prepare_boss_battle()
+                elif kind == 'boss_hp':
+                    self.set_boss_persistent(record[1])
+                elif kind == 'battle':
+                    self.record_battle_action(*record[1:])
+                elif kind == 'battle_end':
+                    self.on_boss_battle_end(*record[1:])
+                elif kind == 'reseed':
+                    self.rng.seed(self.rng.master_seed, record[1])
+        finally:
+            self.on_log, self.recorder = on_log, recorder
@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+"""黄金重放回归：用当前规则重新执行一批录制好的对局，逐步核对。
+
+录制（record）时按 simulate 的选择策略跑 N 局，保存每局的种子、初始属性、
+决定列表，以及每个决定之后的检查点（该决定产生的存档记录 + 局面摘要
+的 CRC32）和最终局面哈希。核对（check）时在进程池中分片重新执行，
+报告每局第一处不一致的决定。apply_effects、升级规则、事件选择等逻辑
+的任何改动只要改变了结果，都会在这里暴露出来。
+
+用法：
+  python game.py golden record golden.corpus --runs 10000 --seed 1
+  python game.py golden check golden.corpus --jobs 8
+"""
+import argparse
+import marshal
+import os
+import random
+import sys
+import zlib
+from array import array
+from multiprocessing import Pool
+
+import replay
+from game_state import GameState
+from simulate import MAX_EVENTS_PER_RUN, POLICIES, roll_character_attributes
+
+CORPUS_FORMAT = 1
+# 报告中最多列出的不一致对局数
+MAX_REPORTED = 10
+
+
+def summary(state):
+    """检查点包含的局面摘要（存档记录之外会变化的数值）"""
+    return (state.level, state.experience, state.health, state.max_health,
+            state.magic, state.max_magic, tuple(state.attributes.values()),
+            state.event_count, state.choice_count, state.current_stage_index,
+            state.boss_current_health, state.phase)
+
+
+class Checkpointer:
+    """收集每个决定产生的存档记录，决定结束时折算为一个检查点"""
+
+    def __init__(self):
+        self.pending = []
+        self.steps = array('I')
+
+    def record(self, record):
+        self.pending.append(record)
+
+    def checkpoint(self, state):
+        # 版本 2 不写对象引用，相等的值总是编码为相同的字节
+        payload = marshal.dumps((self.pending, summary(state)), 2)
+        self.pending = []
+        self.steps.append(zlib.crc32(payload))
+        return self.steps[-1]
+
+
+def record_run(state, seed, policy, battle_policy):
+    """按选择策略跑一局，返回 (初始属性, 决定列表, 检查点, 最终哈希)"""
+    rng = random.Random(seed)
+    attributes = roll_character_attributes(rng)
+    checker = Checkpointer()
+    replay.start_run(state, seed, attributes, checker.record)
+    decisions = []
+    while not state.finished and state.event_count < MAX_EVENTS_PER_RUN:
+        if state.phase == 'choice':
+            choice = policy(state, rng)
+            index = next(i for i, c in enumerate(state.current_choices) if c is choice)
+            decision = ['choice', index]
+        elif state.phase == 'battle':
+            if battle_policy == 'random':
+                decision = ['battle', rng.choice(('attack', 'defend'))]
+            else:
+                decision = ['battle', battle_policy]
+        else:
+            decision = ['next']
+        replay.execute(state, [decision])
+        checker.checkpoint(state)
+        decisions.append(decision)
+    return attributes, decisions, checker.steps.tobytes(), replay.state_hash(state)
+
+
+def check_run(state, run):
+    """重新执行一局，返回 None（一致）或第一处不一致的说明"""
+    seed, attributes, decisions, steps, final = run
+    expected = array('I')
+    expected.frombytes(steps)
+    checker = Checkpointer()
+    replay.start_run(state, seed, attributes, checker.record)
+    for step, decision in enumerate(decisions):
+        try:
+            replay.execute(state, [decision])
+        except (IndexError, KeyError, TypeError, ValueError) as e:
+            return step, decision, f"决定无法执行：{e}"
+        if checker.checkpoint(state) != expected[step]:
+            return step, decision, f"检查点不同（当前事件：{state.current_event_name}）"
+    if replay.state_hash(state) != final:
+        return len(decisions), None, "最终局面哈希不同"
+    return None
+
+
+# ---- 工作进程 ----
+_worker_state = None
+
+
+def _init_worker(events_file):
+    global _worker_state
+    _worker_state = GameState(events_file=events_file)
+
+
+def _record_chunk(args):
+    start, count, seed, policy_name, battle_policy = args
+    policy = POLICIES[policy_name]
+    runs = []
+    for run_index in range(start, start + count):
+        run_seed = seed * 1000003 + run_index
+        runs.append((run_seed,) + record_run(_worker_state, run_seed, policy, battle_policy))
+    return start, runs
+
+
+def _check_chunk(args):
+    start, runs = args
+    failures = []
+    for offset, run in enumerate(runs):
+        result = check_run(_worker_state, run)
+        if result is not None:
+            failures.append((start + offset,) + result)
+    return len(runs), failures
+
+
+def _map(func, tasks, jobs, events_file):
+    """jobs 为 1 时在本进程执行，否则分片到进程池（结果顺序不定）"""
+    if jobs == 1:
+        _init_worker(events_file)
+        yield from map(func, tasks)
+        return
+    with Pool(jobs, initializer=_init_worker, initargs=(events_file,)) as pool:
+        yield from pool.imap_unordered(func, tasks)
+
+
+def _chunks(total, jobs):
+    size = max(1, min(500, total // (jobs * 8) or 1))
+    return [(start, min(size, total - start)) for start in range(0, total, size)]
+
+
+def record_corpus(runs, seed, policy='random', battle_policy='attack', jobs=1, events_file=None):
+    tasks = [(start, count, seed, policy, battle_policy) for start, count in _chunks(runs, jobs)]
+    recorded = [None] * runs
+    for start, chunk in _map(_record_chunk, tasks, jobs, events_file):
+        recorded[start:start + len(chunk)] = chunk
+    return {
+        'format': CORPUS_FORMAT,
+        'seed': seed,
+        'policy': policy,
+        'battle_policy': battle_policy,
+        'events_file': events_file,
+        'runs': recorded,
+    }
+
+
+def check_corpus(corpus, jobs=1, events_file=None, on_progress=None):
+    """核对全部对局，返回按对局序号排序的不一致列表 [(序号, 步, 决定, 说明)]"""
+    runs = corpus['runs']
+    tasks = [(start, runs[start:start + count]) for start, count in _chunks(len(runs), jobs)]
+    events_file = events_file or corpus.get('events_file')
+    failures = []
+    done = 0
+    for count, chunk_failures in _map(_check_chunk, tasks, jobs, events_file):
+        done += count
+        failures.extend(chunk_failures)
+        if on_progress:
+            on_progress(done, len(runs))
+    return sorted(failures)
+
+
+def save_corpus(corpus, path):
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        marshal.dump(corpus, f)
+    os.replace(tmp, path)
+
+
+def load_corpus(path):
+    with open(path, 'rb') as f:
+        corpus = marshal.load(f)
+    if corpus.get('format') != CORPUS_FORMAT:
+        raise ValueError(f"不支持的语料格式：{corpus.get('format')}")
+    return corpus
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='game.py golden', description='黄金重放回归测试')
+    sub = parser.add_subparsers(dest='command', required=True)
+    rec = sub.add_parser('record', help='录制对局语料')
+    rec.add_argument('corpus')
+    rec.add_argument('--runs', type=int, default=10000)
+    rec.add_argument('--seed', type=int, default=1)
+    rec.add_argument('--policy', choices=sorted(POLICIES), default='random')
+    rec.add_argument('--battle-policy', choices=['attack', 'defend', 'random'], default='random')
+    rec.add_argument('--events', default=None, help='事件库文件（默认 events.json）')
+    rec.add_argument('--jobs', type=int, default=os.cpu_count())
+    chk = sub.add_parser('check', help='用当前规则核对语料')
+    chk.add_argument('corpus')
+    chk.add_argument('--events', default=None, help='事件库文件（默认使用录制时的文件）')
+    chk.add_argument('--jobs', type=int, default=os.cpu_count())
+    args = parser.parse_args(argv)
+
+    if args.command == 'record':
+        corpus = record_corpus(args.runs, args.seed, args.policy, args.battle_policy,
+                               args.jobs or 1, args.events)
+        save_corpus(corpus, args.corpus)
+        steps = sum(len(run[2]) for run in corpus['runs'])
+        print(f"已录制 {args.runs} 局（{steps} 个决定）到 {args.corpus}")
+        return 0
+
+    try:
+        corpus = load_corpus(args.corpus)
+    except (OSError, ValueError, EOFError, TypeError) as e:
+        print(f"无法读取语料 {args.corpus}：{e}")
+        return 1
+
+    def progress(done, total):
+        print(f"\r进度 {done}/{total}", end='', file=sys.stderr, flush=True)
+
+    failures = check_corpus(corpus, args.jobs or 1, args.events, on_progress=progress)
+    print(file=sys.stderr)
+    total = len(corpus['runs'])
+    if not failures:
+        print(f"✅ {total} 局全部一致")
+        return 0
+    print(f"❌ {len(failures)}/{total} 局不一致")
+    for run_index, step, decision, message in failures[:MAX_REPORTED]:
+        seed = corpus['runs'][run_index][0]
+        print(f"  第{run_index}局（种子 {seed}）第{step + 1}个决定 {decision!r}：{message}")
+    if len(failures) > MAX_REPORTED:
+        print(f"  ……另有 {len(failures) - MAX_REPORTED} 局")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
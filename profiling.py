@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""可选的热点路径计时：调用次数、总耗时、最大耗时与延迟直方图。
+
+默认不启用，也不包装任何函数（零开销）。开启方式：
+- 环境变量：GAME_PROFILE=profile.json（统计）、GAME_PROFILE_TRACE=trace.json（Chrome trace，可选），
+  退出时写出
+- 游戏中按 F12 开启 / 关闭，关闭时写出到 DEFAULT_PROFILE_FILE / DEFAULT_TRACE_FILE
+
+统计按（函数, 标签）分组，标签由 set_tag_source 提供（如当前人生阶段），
+可以直接看出“大学阶段卡顿”落在哪个函数上。trace 文件可用 chrome://tracing
+或 Perfetto 打开。
+"""
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+ENV_VAR = 'GAME_PROFILE'
+TRACE_ENV_VAR = 'GAME_PROFILE_TRACE'
+_HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PROFILE_FILE = os.path.join(_HERE, 'profile.json')
+DEFAULT_TRACE_FILE = os.path.join(_HERE, 'profile.trace.json')
+# trace 只保留最近这么多次调用
+TRACE_LIMIT = 100000
+# 直方图第 i 格统计耗时在 [2^(i-1), 2^i) 纳秒之间的调用
+HIST_BUCKETS = 40
+
+_active = None
+_tag_source = None
+
+
+class Profiler:
+    """包装类方法并累计每次调用的耗时"""
+
+    def __init__(self, trace_limit=TRACE_LIMIT):
+        self.stats = {}  # {(函数名, 标签): [次数, 总纳秒, 最大纳秒, 直方图]}
+        self.trace = deque(maxlen=trace_limit)  # (函数名, 开始纳秒, 耗时纳秒, 线程, 标签)
+        self.origin = time.perf_counter_ns()
+        self._patched = []  # (类, 属性名, 原函数)
+
+    def patch(self, cls, methods):
+        """把 cls 的 methods 换成计时包装（对已创建的实例同样生效）"""
+        for method in methods:
+            original = cls.__dict__[method]
+            setattr(cls, method, self._wrap(f"{cls.__name__}.{method}", original))
+            self._patched.append((cls, method, original))
+
+    def unpatch(self):
+        for cls, method, original in reversed(self._patched):
+            setattr(cls, method, original)
+        self._patched = []
+
+    def _wrap(self, name, func):
+        clock = time.perf_counter_ns
+        add = self._add
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                add(name, start, clock() - start)
+        return wrapper
+
+    def _add(self, name, start, duration):
+        tag = None
+        if _tag_source is not None:
+            try:
+                tag = _tag_source()
+            except Exception:
+                tag = None
+        entry = self.stats.get((name, tag))
+        if entry is None:
+            entry = self.stats[(name, tag)] = [0, 0, 0, [0] * HIST_BUCKETS]
+        entry[0] += 1
+        entry[1] += duration
+        if duration > entry[2]:
+            entry[2] = duration
+        entry[3][min(duration.bit_length(), HIST_BUCKETS - 1)] += 1
+        self.trace.append((name, start, duration, threading.get_ident(), tag))
+
+    # ---- 导出 ----
+    @staticmethod
+    def _describe(count, total, longest, hist):
+        return {
+            'count': count,
+            'total_ms': total / 1e6,
+            'mean_us': total / count / 1e3 if count else 0.0,
+            'max_ms': longest / 1e6,
+            # 键为该格耗时上限（微秒）
+            'histogram_us': {f"<{2 ** i / 1000:g}": n for i, n in enumerate(hist) if n},
+        }
+
+    def report(self):
+        """统计结果：总体（functions）与按标签分组（by_tag）"""
+        functions = {}
+        by_tag = {}
+        for (name, tag), (count, total, longest, hist) in self.stats.items():
+            merged = functions.setdefault(name, [0, 0, 0, [0] * HIST_BUCKETS])
+            merged[0] += count
+            merged[1] += total
+            merged[2] = max(merged[2], longest)
+            merged[3] = [a + b for a, b in zip(merged[3], hist)]
+            if tag is not None:
+                by_tag.setdefault(str(tag), {})[name] = self._describe(count, total, longest, hist)
+        ordered = sorted(functions.items(), key=lambda item: -item[1][1])
+        return {
+            'functions': {name: self._describe(*entry) for name, entry in ordered},
+            'by_tag': by_tag,
+        }
+
+    def chrome_trace(self):
+        """Chrome trace event 格式（完整事件 ph=X，时间单位微秒）"""
+        pid = os.getpid()
+        events = []
+        for name, start, duration, tid, tag in self.trace:
+            event = {
+                'name': name, 'ph': 'X', 'pid': pid, 'tid': tid,
+                'ts': (start - self.origin) / 1e3, 'dur': duration / 1e3,
+            }
+            if tag is not None:
+                event['args'] = {'tag': str(tag)}
+            events.append(event)
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def dump(self, path=None, trace_path=None):
+        if path:
+            _write_json(path, self.report())
+        if trace_path:
+            _write_json(trace_path, self.chrome_trace())
+
+
+def _write_json(path, data):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+
+
+def set_tag_source(fn):
+    """fn() 的返回值作为之后每次调用的标签（如当前阶段名）；None 表示不分组"""
+    global _tag_source
+    _tag_source = fn
+
+
+def active():
+    return _active
+
+
+def enable(targets):
+    """开始计时；targets 为 [(类, [方法名...]), ...]。已开启时直接返回当前 Profiler"""
+    global _active
+    if _active is None:
+        _active = Profiler()
+        for cls, methods in targets:
+            _active.patch(cls, methods)
+    return _active
+
+
+def disable():
+    """停止计时并还原被包装的方法，返回停止前的 Profiler（未开启时为 None）"""
+    global _active
+    profiler, _active = _active, None
+    if profiler is not None:
+        profiler.unpatch()
+    return profiler
+
+
+def install_from_env(targets):
+    """设置了 GAME_PROFILE 时开启计时，并在退出时写出结果"""
+    path = os.environ.get(ENV_VAR)
+    trace_path = os.environ.get(TRACE_ENV_VAR)
+    if not path and not trace_path:
+        return None
+    profiler = enable(targets)
+    atexit.register(profiler.dump, path, trace_path)
+    return profiler
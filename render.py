@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""脏标记渲染调度：状态变化只做标记，空闲时统一把变化的值推到界面。
+
+每个绑定是 key -> (组件, 取值函数)。mark() 标记脏绑定并安排一次 after_idle；
+flush() 只对脏绑定求值，与上次推送的内容相同就不碰组件。Text 组件的内容
+整体替换，一次 delete + 一次 insert。
+"""
+import tkinter as tk
+
+
+def replace_text(widget, content):
+    """用一次插入替换只读 Text 组件的全部内容"""
+    widget.config(state='normal')
+    widget.delete('1.0', 'end')
+    widget.insert('end', content)
+    widget.config(state='disabled')
+
+
+def append_text(widget, content):
+    """用一次插入向只读 Text 组件末尾追加内容"""
+    widget.config(state='normal')
+    widget.insert('end', content)
+    widget.config(state='disabled')
+
+
+class RenderScheduler:
+    """标签 / Text 组件的脏标记渲染"""
+
+    def __init__(self, root):
+        self.root = root
+        self._bindings = {}  # {key: (widget, fn, is_text)}
+        self._last = {}  # {key: 上次推送的内容}
+        self._dirty = {}  # 有序集合
+        self._flush_id = None
+
+    def bind_label(self, key, label, text_fn):
+        """label 的文字由 text_fn() 决定"""
+        self._bindings[key] = (label, text_fn, False)
+        self._last[key] = label.cget('text')
+
+    def bind_text(self, key, text_widget, text_fn):
+        """只读 Text 组件的全部内容由 text_fn() 决定"""
+        self._bindings[key] = (text_widget, text_fn, True)
+        self._last.pop(key, None)
+
+    def mark(self, *keys):
+        """标记绑定为脏（不传参数表示全部），空闲时刷新"""
+        for key in keys or self._bindings:
+            self._dirty[key] = None
+        if self._dirty and self._flush_id is None:
+            self._flush_id = self.root.after_idle(self.flush)
+
+    def flush(self):
+        """立即刷新全部脏绑定，只修改内容变化的组件"""
+        self._flush_id = None
+        dirty, self._dirty = self._dirty, {}
+        for key in dirty:
+            binding = self._bindings.get(key)
+            if binding is None:
+                continue
+            widget, fn, is_text = binding
+            value = fn()
+            if self._last.get(key) == value:
+                continue
+            self._last[key] = value
+            try:
+                if is_text:
+                    replace_text(widget, value)
+                else:
+                    widget.config(text=value)
+            except tk.TclError:
+                # 组件已销毁
+                self._bindings.pop(key, None)
+                self._last.pop(key, None)
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""决定列表的无界面重放。
+
+一局游戏由 主种子 + 初始属性 + 玩家的决定序列 完全确定。决定依次为：
+  ['next']                         继续：抽下一个事件（阶段 Boss 到来时进入战斗）
+  ['choice', 索引]                 选择当前事件的第几个选项
+  ['battle', 'attack' | 'defend']  战斗中的一个回合
+  ['attributes', {...}]            重新加载角色属性
+  ['reseed', salt]                 读档续玩时重新派生随机数流
+重放不经过界面，按序重新执行这些决定（重新掷随机数、结算效果），
+结束时输出最终局面的哈希；同一决定列表总是得到同一哈希。
+
+用法：
+  python game.py replay save.journal                 # 从存档日志提取决定，重放并逐条核对
+  python game.py replay run.json --expect <哈希>
+  python game.py replay save.journal --export run.json
+"""
+import argparse
+import hashlib
+import json
+import marshal
+import sys
+
+import battle_rules
+from game_state import GameState
+from save_journal import read_records
+
+DECISIONS_FORMAT = 1
+
+
+def state_hash(state):
+    """局面（含各随机数流的内部状态）的 SHA-256"""
+    # 版本 2 不写对象引用，相等的局面总是编码为相同的字节
+    payload = marshal.dumps((state.snapshot(), state.rng.getstate()), 2)
+    return hashlib.sha256(payload).hexdigest()
+
+
+def decisions_from_records(records):
+    """从存档日志记录提取 (种子, 初始属性, 决定列表)"""
+    if not records or records[0][0] != 'start':
+        raise ValueError("存档日志缺少起始记录，无法重放（旧版本存档）")
+    _, seed, attributes = records[0]
+    decisions = []
+    for record in records[1:]:
+        kind = record[0]
+        if kind in ('event', 'boss'):
+            decisions.append(['next'])
+        elif kind in ('choice', 'battle', 'attributes', 'reseed'):
+            decisions.append([kind, record[1]])
+    return seed, attributes, decisions
+
+
+def new_run(seed, attributes, events_file=None, recorder=None):
+    """按种子与初始属性开始一局（与界面开局的顺序一致）"""
+    return start_run(GameState(events_file=events_file), seed, attributes, recorder)
+
+
+def start_run(state, seed, attributes, recorder=None):
+    """在已有的 state 上重新开始一局（批量重放时复用同一个 GameState）"""
+    state.recorder = None
+    state.reset()
+    state.rng.seed(seed)
+    state.load_character_attributes(attributes)
+    if recorder is not None:
+        state.start_recording(recorder)
+    return state
+
+
+def execute(state, decisions):
+    """在 state 上按序重新执行决定"""
+    for step, decision in enumerate(decisions):
+        kind = decision[0]
+        if kind == 'next':
+            # 与 GameMain.continue_adventure 相同：先检查 Boss，再抽事件
+            if state.is_boss_due():
+                state.prepare_boss_battle()
+            else:
+                state.next_event()
+                state.resolve_auto_roll(state.current_event)
+        elif kind == 'choice':
+            state.make_choice(state.current_choices[decision[1]])
+        elif kind == 'battle':
+            _battle_turn(state, decision[1])
+        elif kind == 'attributes':
+            state.load_character_attributes(decision[1])
+        elif kind == 'reseed':
+            state.reseed_streams(decision[1])
+        else:
+            raise ValueError(f"第{step + 1}个决定无法识别：{decision!r}")
+    return state
+
+
+def _battle_turn(state, action):
+    """按 BossBattleUI 的规则结算一个回合，战斗结束时一并结算"""
+    stats = state.calculate_battle_stats()
+    if state.battle_progress is None:
+        player_health, boss_health = stats['health'], state.boss_current_health
+    else:
+        player_health, boss_health = state.battle_progress
+    victory, _, player_health, boss_health = battle_rules.simulate_boss_fight(
+        dict(stats, health=player_health), boss_health, policy=action,
+        rng=state.rng.combat, max_turns=1)
+    state.record_battle_action(action, player_health, boss_health)
+    if victory or player_health <= 0:
+        state.settle_boss_battle(victory, boss_health)
+
+
+def first_divergence(expected, actual):
+    """返回两组记录第一处不同的下标；完全一致时返回 None"""
+    for i, (a, b) in enumerate(zip(expected, actual)):
+        if a != b:
+            return i
+    if len(expected) != len(actual):
+        return min(len(expected), len(actual))
+    return None
+
+
+def load_source(path):
+    """读取存档日志或决定列表 JSON，返回 (种子, 初始属性, 决定列表, 存档记录或 None)"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data.lstrip()[:1] == b'{':
+        doc = json.loads(data.decode('utf-8'))
+        return doc['seed'], doc['attributes'], doc['decisions'], None
+    records, _ = read_records(data)
+    seed, attributes, decisions = decisions_from_records(records)
+    return seed, attributes, decisions, records
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='game.py replay', description='无界面重放一局游戏的决定列表')
+    parser.add_argument('source', help='存档日志（save.journal）或决定列表 JSON')
+    parser.add_argument('--events', default=None, help='事件文件（默认 events.json）')
+    parser.add_argument('--expect', default=None, help='期望的最终局面哈希，不一致时返回 1')
+    parser.add_argument('--export', default=None, help='把决定列表写成 JSON')
+    args = parser.parse_args(argv)
+
+    try:
+        seed, attributes, decisions, records = load_source(args.source)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"无法读取 {args.source}：{e}")
+        return 1
+
+    if args.export:
+        doc = {'format': DECISIONS_FORMAT, 'seed': seed, 'attributes': attributes, 'decisions': decisions}
+        with open(args.export, 'w', encoding='utf-8') as f:
+            json.dump(doc, f, ensure_ascii=False)
+        print(f"已导出 {len(decisions)} 个决定到 {args.export}")
+
+    replayed = []
+    state = new_run(seed, attributes, args.events, replayed.append)
+    failed = False
+    try:
+        execute(state, decisions)
+    except (IndexError, KeyError, TypeError, ValueError) as e:
+        print(f"重放失败：{e}")
+        failed = True
+
+    if records is not None:
+        diverged = first_divergence(records, replayed)
+        if diverged is None:
+            print(f"与存档逐条一致（{len(records)} 条记录）")
+        else:
+            expected = records[diverged] if diverged < len(records) else None
+            actual = replayed[diverged] if diverged < len(replayed) else None
+            print(f"第{diverged + 1}条记录不一致：存档 {expected!r}，重放 {actual!r}")
+            failed = True
+
+    digest = state_hash(state)
+    print(f"种子 {seed}，{len(decisions)} 个决定，{state.event_count} 次事件")
+    print(f"最终局面哈希：{digest}")
+    if args.expect is not None and args.expect != digest:
+        print(f"与期望哈希不一致：{args.expect}")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
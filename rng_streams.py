@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""按子系统划分的可播种随机数流。
+
+事件选择、效果区间、Roll点、战斗闪避与市场价格各用一条独立的
+random.Random，都由同一个主种子派生（种子 + 流名经 SHA-512 展开）。
+某个子系统多抽或少抽一次随机数，不会让其它子系统的序列错位。
+"""
+import random
+
+STREAM_NAMES = ('selection', 'effects', 'rolls', 'combat', 'market')
+
+
+def split_seed_arg(args):
+    """从启动参数中取出 --seed N / --seed=N，返回 (其余参数, 种子或 None)"""
+    rest, seed = [], None
+    args = list(args)
+    while args:
+        arg = args.pop(0)
+        if arg == '--seed' and args:
+            seed = int(args.pop(0))
+        elif arg.startswith('--seed='):
+            seed = int(arg.split('=', 1)[1])
+        else:
+            rest.append(arg)
+    return rest, seed
+
+
+def new_seed():
+    """生成一个随机主种子（未指定种子时使用，便于事后复现）"""
+    return random.SystemRandom().randrange(2**63)
+
+
+class RngStreams:
+    """具名随机数流：selection / effects / rolls / combat / market"""
+
+    def __init__(self, seed=None, salt=None):
+        for name in STREAM_NAMES:
+            setattr(self, name, random.Random())
+        self.seed(seed, salt)
+
+    def seed(self, seed=None, salt=None):
+        """重新播种全部流（就地播种，已取得的流对象引用仍然有效）。
+
+        salt：从同一主种子派生另一组序列（如读档续玩时的事件序号）
+        """
+        if seed is None:
+            seed = new_seed()
+        self.master_seed = seed
+        self.salt = salt
+        base = str(seed) if salt is None else f"{seed}@{salt}"
+        for name in STREAM_NAMES:
+            getattr(self, name).seed(f"{base}/{name}")
+
+    def getstate(self):
+        return tuple(getattr(self, name).getstate() for name in STREAM_NAMES)
+
+    def setstate(self, state):
+        for name, stream_state in zip(STREAM_NAMES, state):
+            getattr(self, name).setstate(stream_state)
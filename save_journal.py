@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""事件溯源存档：只追加的决定日志 + 定期快照。
+
+- 日志（save.journal）：GameState 每结算一个决定（抽到的事件、选择及其实际
+  效果值、Roll点结果、战斗行动、阶段推进）就追加一条 marshal 记录，
+  每条带长度与 CRC，写到一半断电的尾部会被识别并丢弃。
+- 快照（save.journal.snapshot）：每 SNAPSHOT_EVERY 条记录保存一次完整局面
+  及其对应的日志偏移，原子替换。
+- 恢复：读最新快照，只回放快照之后的日志尾部。
+
+写盘在后台线程中进行，积攒的记录一次写入、一次 fsync，Tk 主循环不等磁盘。
+"""
+import marshal
+import os
+import queue
+import struct
+import threading
+import zlib
+
+# 默认存档文件（与本模块同目录）
+DEFAULT_SAVE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'save.journal')
+SNAPSHOT_SUFFIX = '.snapshot'
+# 每多少条记录写一次快照
+SNAPSHOT_EVERY = 50
+
+SNAPSHOT_MAGIC = b'SNP1'
+_RECORD_HEADER = struct.Struct('<II')  # 长度, crc32
+_SNAPSHOT_HEADER = struct.Struct('<QI')  # 日志偏移, crc32
+
+
+def snapshot_path(path):
+    return path + SNAPSHOT_SUFFIX
+
+
+def encode_record(record):
+    payload = marshal.dumps(record)
+    return _RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def read_records(data):
+    """解析日志字节，返回 (记录列表, 最后一条完整记录的结束位置)"""
+    records = []
+    pos = 0
+    size = len(data)
+    while pos + _RECORD_HEADER.size <= size:
+        length, crc = _RECORD_HEADER.unpack_from(data, pos)
+        start = pos + _RECORD_HEADER.size
+        payload = data[start:start + length]
+        if len(payload) != length or zlib.crc32(payload) != crc:
+            break
+        try:
+            records.append(marshal.loads(payload))
+        except (ValueError, EOFError, TypeError):
+            break
+        pos = start + length
+    return records, pos
+
+
+def load_save(path=DEFAULT_SAVE_FILE):
+    """读取存档，返回 (快照, 快照之后的记录, 日志有效长度)；没有存档时返回 None"""
+    try:
+        with open(snapshot_path(path), 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    if data[:4] != SNAPSHOT_MAGIC or len(data) < 4 + _SNAPSHOT_HEADER.size:
+        return None
+    offset, crc = _SNAPSHOT_HEADER.unpack_from(data, 4)
+    payload = data[4 + _SNAPSHOT_HEADER.size:]
+    if zlib.crc32(payload) != crc:
+        return None
+    try:
+        snap = marshal.loads(payload)
+    except (ValueError, EOFError, TypeError):
+        return None
+
+    try:
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            tail = f.read()
+    except OSError:
+        tail = b''
+    records, valid = read_records(tail)
+    return snap, records, offset + valid
+
+
+class SaveJournal:
+    """后台线程写盘的存档日志。
+
+    snapshot_fn()：返回当前局面快照（在调用 append 的线程中执行）
+    """
+
+    def __init__(self, path=DEFAULT_SAVE_FILE, snapshot_fn=None, snapshot_every=SNAPSHOT_EVERY):
+        self.path = path
+        self.snapshot_fn = snapshot_fn
+        self.snapshot_every = snapshot_every
+        self._since_snapshot = 0
+        self._queue = queue.Queue()
+        self._thread = None
+        self.error = None  # 后台线程最近一次写盘错误
+
+    # ---- 主线程接口 ----
+    def begin(self, snap):
+        """开始新存档：清空日志并以 snap 作为起点"""
+        self._since_snapshot = 0
+        self._put(('begin', marshal.dumps(snap)))
+
+    def resume(self, valid_end):
+        """接着已有存档写：先截掉日志中不完整的尾部"""
+        self._since_snapshot = 0
+        self._put(('resume', valid_end))
+
+    def append(self, record):
+        """追加一条记录；每 snapshot_every 条附带一次快照"""
+        self._put(('record', encode_record(record)))
+        self._since_snapshot += 1
+        if self.snapshot_fn is not None and self._since_snapshot >= self.snapshot_every:
+            self._since_snapshot = 0
+            self._put(('snapshot', marshal.dumps(self.snapshot_fn())))
+
+    def close(self):
+        """写完并同步全部记录后停止后台线程"""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def _put(self, item):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='save-journal', daemon=True)
+            self._thread.start()
+        self._queue.put(item)
+
+    # ---- 后台线程 ----
+    def _run(self):
+        journal = None
+        stop = False
+        batch = []
+        try:
+            while not stop:
+                # 一次取走已积攒的全部条目，写完后只 fsync 一次
+                batch = [self._queue.get()]
+                while True:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                for item in batch:
+                    if item is None:
+                        stop = True
+                        break
+                    journal = self._handle(journal, item)
+                if journal is not None:
+                    journal.flush()
+                    os.fsync(journal.fileno())
+        except OSError as e:
+            # 磁盘错误不影响游戏本身；丢弃后续写入直到 close()
+            self.error = e
+            stop = any(item is None for item in batch)
+            while not stop:
+                stop = self._queue.get() is None
+        finally:
+            if journal is not None:
+                journal.close()
+
+    def _handle(self, journal, item):
+        kind, value = item
+        if kind == 'record':
+            if journal is None:
+                journal = open(self.path, 'ab')
+            journal.write(value)
+        elif kind == 'begin':
+            if journal is not None:
+                journal.close()
+            journal = open(self.path, 'wb')
+            self._write_snapshot(0, value)
+        elif kind == 'resume':
+            if journal is not None:
+                journal.close()
+            journal = open(self.path, 'ab')
+            journal.truncate(value)
+            journal.seek(value)
+        elif kind == 'snapshot':
+            if journal is None:
+                journal = open(self.path, 'ab')
+            # 快照指向的日志内容必须先落盘
+            journal.flush()
+            os.fsync(journal.fileno())
+            self._write_snapshot(journal.tell(), value)
+        return journal
+
+    def _write_snapshot(self, offset, payload):
+        target = snapshot_path(self.path)
+        tmp = target + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(SNAPSHOT_MAGIC + _SNAPSHOT_HEADER.pack(offset, zlib.crc32(payload)) + payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, target)
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""单一 Tk 根窗口上的场景切换。
+
+掷骰界面、人生游戏与跑团冒险原先各自创建（并销毁）一个 Tk 解释器，
+角色属性经 sys.argv 的 JSON 字符串传递。SceneManager 只保留一个根窗口，
+每个场景是其中的一个 Frame：
+- register(name, factory)：factory(frame) 在 frame 中创建场景对象，首次显示时才调用
+- show(name, **context)：隐藏当前场景、显示目标场景并调用其 enter(**context)；
+  已创建的场景直接复用，来回切换不会重建组件
+- 角色属性以字典直接作为 context 传给下一个场景
+
+场景对象可提供的属性与方法（均为可选）：
+TITLE、GEOMETRY、BG、enter(**context)、leave()、on_close()
+"""
+import ast
+import json
+import tkinter as tk
+
+
+class SceneManager:
+    """在一个根窗口中切换场景 Frame"""
+
+    def __init__(self, root):
+        self.root = root
+        self._factories = {}
+        self._scenes = {}  # {名称: 场景对象}，按创建顺序
+        self._frames = {}  # {名称: Frame}
+        self.current = None
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
+
+    def register(self, name, factory):
+        self._factories[name] = factory
+
+    def has(self, name):
+        return name in self._factories
+
+    def scene(self, name):
+        """已创建的场景对象（未创建时为 None）"""
+        return self._scenes.get(name)
+
+    def show(self, name, **context):
+        """切换到场景 name（首次显示时创建），返回场景对象"""
+        scene = self._scenes.get(name)
+        if scene is None:
+            frame = tk.Frame(self.root)
+            self._frames[name] = frame
+            scene = self._scenes[name] = self._factories[name](frame)
+        if self.current is not None and self.current != name:
+            previous = self._scenes[self.current]
+            leave = getattr(previous, 'leave', None)
+            if leave is not None:
+                leave()
+            self._frames[self.current].pack_forget()
+
+        bg = getattr(scene, 'BG', None)
+        if bg is not None:
+            self.root.configure(bg=bg)
+            self._frames[name].configure(bg=bg)
+        if getattr(scene, 'TITLE', None):
+            self.root.title(scene.TITLE)
+        if getattr(scene, 'GEOMETRY', None):
+            self.root.geometry(scene.GEOMETRY)
+        self._frames[name].pack(expand=True, fill='both')
+        self.current = name
+
+        enter = getattr(scene, 'enter', None)
+        if enter is not None:
+            enter(**context)
+        return scene
+
+    def close(self):
+        """关闭窗口：依次让已创建的场景收尾（如写完存档），再销毁根窗口"""
+        for name, scene in self._scenes.items():
+            on_close = getattr(scene, 'on_close', None)
+            if on_close is None:
+                continue
+            try:
+                on_close()
+            except Exception as e:
+                print(f"场景 {name} 关闭时出错：{e!r}")
+        self.root.destroy()
+
+
+def parse_attributes(text):
+    """解析命令行传入的角色属性（JSON，兼容 Python 字典字面量）；无法解析时抛出 ValueError"""
+    try:
+        attributes = json.loads(text)
+    except json.JSONDecodeError:
+        try:
+            attributes = ast.literal_eval(text)
+        except (ValueError, SyntaxError) as e:
+            raise ValueError(f"无法解析角色属性：{text}") from e
+    if not isinstance(attributes, dict):
+        raise ValueError(f"角色属性应为字典：{text}")
+    return attributes
@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+"""人生模拟的无界面蒙特卡洛批量运行器。
+
+用法：python game.py simulate --runs 1000000 --jobs 16 --seed 42 --policy greedy
+
+每个工作进程反复重置同一个 GameState 跑完整的六个阶段，只把可合并的
+统计聚合（直方图/计数）流式返回主进程，内存占用与局数无关。
+"""
+import argparse
+import json
+import math
+import os
+import random
+import sys
+from collections import Counter
+from multiprocessing import Pool
+
+import battle_rules
+from game_state import GameState, EFFECT_KEY_MAP, ATTRIBUTE_NAMES
+
+# 单局事件数上限（防御异常内容导致无法结束）
+MAX_EVENTS_PER_RUN = 10000
+
+
+# ---- 选择策略 ----
+def _expected_value(value):
+    if isinstance(value, tuple):
+        return (value[0] + value[1]) / 2
+    return value
+
+
+def random_policy(state, rng):
+    """等概率随机选择"""
+    return rng.choice(state.current_choices)
+
+
+def greedy_policy(state, rng):
+    """选择期望属性收益最高的选项（经验按 100 点折合 1 点属性）"""
+    best, best_score = None, None
+    for choice in state.current_choices:
+        score = 0
+        for effect, value in choice['effects'].items():
+            if effect in state.attributes:
+                score += _expected_value(value)
+            elif EFFECT_KEY_MAP.get(effect, effect) == 'experience':
+                score += _expected_value(value) / 100
+        if best_score is None or score > best_score:
+            best, best_score = choice, score
+    return best
+
+
+POLICIES = {
+    'random': random_policy,
+    'greedy': greedy_policy,
+}
+
+
+def roll_character_attributes(rng):
+    """按 start.py 的规则掷骰：每项属性为两个 0-5 骰子之和"""
+    return {name: rng.randint(0, 5) + rng.randint(0, 5) for name in ATTRIBUTE_NAMES}
+
+
+def play_life(state, policy, rng, battle_policy='attack'):
+    """在已重置的 state 上跑完一整局，返回每个阶段的 Boss 胜负列表"""
+    state.load_character_attributes(roll_character_attributes(rng))
+    boss_results = []
+    while not state.finished and state.event_count < MAX_EVENTS_PER_RUN:
+        state.next_event()
+        if state.current_choices:
+            state.make_choice(policy(state, rng))
+        else:
+            state.resolve_auto_roll(state.current_event)
+
+        if state.is_boss_due():
+            state.prepare_boss_battle()
+            boss_current, _ = state.get_boss_persistent()
+            victory, _, _, boss_left = battle_rules.simulate_boss_fight(
+                state.calculate_battle_stats(), boss_current, policy=battle_policy,
+                rng=state.rng.combat, policy_rng=rng)
+            boss_results.append(victory)
+            state.settle_boss_battle(victory, boss_left)
+    return boss_results
+
+
+# ---- 统计聚合 ----
+class RunStats:
+    """可合并的统计聚合：只保存直方图与计数"""
+
+    def __init__(self):
+        self.runs = 0
+        self.attributes = {name: Counter() for name in ATTRIBUTE_NAMES}
+        self.levels = Counter()
+        self.boss_wins = Counter()  # {stage_name: wins}
+        self.boss_fights = Counter()  # {stage_name: fights}
+        self.event_fires = Counter()  # {event_name: count}
+
+    def record(self, state, boss_results):
+        self.runs += 1
+        for name in ATTRIBUTE_NAMES:
+            self.attributes[name][state.attributes[name]] += 1
+        self.levels[state.level] += 1
+        for stage, victory in zip(state.stages, boss_results):
+            self.boss_fights[stage['name']] += 1
+            if victory:
+                self.boss_wins[stage['name']] += 1
+        for name, count in state.event_trigger_count.items():
+            if count:
+                self.event_fires[name] += count
+
+    def merge(self, other):
+        self.runs += other.runs
+        for name in ATTRIBUTE_NAMES:
+            self.attributes[name].update(other.attributes[name])
+        self.levels.update(other.levels)
+        self.boss_wins.update(other.boss_wins)
+        self.boss_fights.update(other.boss_fights)
+        self.event_fires.update(other.event_fires)
+
+    def to_dict(self):
+        return {
+            'runs': self.runs,
+            'attributes': {name: _describe(hist) for name, hist in self.attributes.items()},
+            'level': _describe(self.levels),
+            'boss_win_rate': {
+                stage: self.boss_wins[stage] / fights
+                for stage, fights in self.boss_fights.items()
+            },
+            'event_fires_per_run': {
+                name: count / self.runs
+                for name, count in self.event_fires.most_common()
+            } if self.runs else {},
+        }
+
+
+def _describe(hist):
+    """从整数直方图计算均值/标准差/分位数"""
+    total = sum(hist.values())
+    if not total:
+        return {}
+    mean = sum(v * c for v, c in hist.items()) / total
+    var = sum(c * (v - mean) ** 2 for v, c in hist.items()) / total
+    values = sorted(hist)
+    quantiles = {}
+    targets = [('p10', 0.1), ('p50', 0.5), ('p90', 0.9)]
+    cum = 0
+    for v in values:
+        cum += hist[v]
+        while targets and cum >= targets[0][1] * total:
+            quantiles[targets.pop(0)[0]] = v
+    return {'mean': mean, 'std': math.sqrt(var), 'min': values[0], 'max': values[-1], **quantiles}
+
+
+# ---- 工作进程 ----
+_worker_state = None
+
+
+def _init_worker(events_file):
+    global _worker_state
+    _worker_state = GameState(events_file=events_file)
+
+
+def _run_chunk(args):
+    """运行 [start, start+count) 这段局数，返回部分聚合"""
+    start, count, seed, policy_name, battle_policy = args
+    state = _worker_state
+    policy = POLICIES[policy_name]
+    stats = RunStats()
+    rng = random.Random()
+    for run_index in range(start, start + count):
+        # 每局独立播种：同一 seed 下结果与进程数、分块方式无关
+        run_seed = seed * 1000003 + run_index
+        rng.seed(run_seed)  # 掷骰与选择策略
+        state.rng.seed(run_seed)  # 游戏内各子系统的随机数流
+        state.reset()
+        boss_results = play_life(state, policy, rng, battle_policy)
+        stats.record(state, boss_results)
+    return stats
+
+
+def run_simulation(runs, jobs=None, seed=None, policy='random', battle_policy='attack',
+                   events_file=None, chunk_size=None, on_progress=None):
+    """并行运行 runs 局，返回合并后的 RunStats"""
+    if seed is None:
+        seed = random.SystemRandom().randrange(2**32)
+    jobs = jobs or os.cpu_count() or 1
+    if chunk_size is None:
+        chunk_size = max(1, min(10000, runs // (jobs * 8) or 1))
+    tasks = [
+        (start, min(chunk_size, runs - start), seed, policy, battle_policy)
+        for start in range(0, runs, chunk_size)
+    ]
+
+    total = RunStats()
+    if jobs == 1:
+        _init_worker(events_file)
+        results = map(_run_chunk, tasks)
+        for partial in results:
+            total.merge(partial)
+            if on_progress:
+                on_progress(total.runs, runs)
+        return total
+
+    with Pool(jobs, initializer=_init_worker, initargs=(events_file,)) as pool:
+        for partial in pool.imap_unordered(_run_chunk, tasks):
+            total.merge(partial)
+            if on_progress:
+                on_progress(total.runs, runs)
+    return total
+
+
+def format_report(report):
+    lines = [f"📊 模拟局数：{report['runs']}"]
+    lines.append("— 最终属性 —")
+    for name, d in report['attributes'].items():
+        lines.append(f"  {name}: 均值{d['mean']:.1f} 标准差{d['std']:.1f} "
+                     f"[{d['min']}, p10={d['p10']}, p50={d['p50']}, p90={d['p90']}, {d['max']}]")
+    d = report['level']
+    lines.append(f"— 等级 — 均值{d['mean']:.2f} [{d['min']}, p50={d['p50']}, {d['max']}]")
+    lines.append("— Boss 胜率 —")
+    for stage, rate in report['boss_win_rate'].items():
+        lines.append(f"  {stage}: {rate:.2%}")
+    lines.append("— 事件平均触发次数/局 —")
+    for name, rate in report['event_fires_per_run'].items():
+        lines.append(f"  {name}: {rate:.3f}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='game.py simulate', description='无界面批量模拟完整人生')
+    parser.add_argument('--runs', type=int, default=10000)
+    parser.add_argument('--jobs', type=int, default=os.cpu_count())
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--policy', choices=sorted(POLICIES), default='random')
+    parser.add_argument('--battle-policy', choices=['attack', 'defend', 'random'], default='attack')
+    parser.add_argument('--events', default=None, help='事件库文件（默认 events.json）')
+    parser.add_argument('--json', action='store_true', help='以 JSON 输出报告')
+    args = parser.parse_args(argv)
+
+    def progress(done, total):
+        print(f"\r进度 {done}/{total}", end='', file=sys.stderr, flush=True)
+
+    stats = run_simulation(args.runs, args.jobs, args.seed, args.policy, args.battle_policy,
+                           events_file=args.events, on_progress=progress)
+    print(file=sys.stderr)
+    report = stats.to_dict()
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print(format_report(report))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,14 +3,27 @@ import random
 import time
 import tkinter as tk
 from tkinter import ttk, messagebox
-import threading
+from scenes import SceneManager
+from ui_dispatch import UiDispatcher
+from ui_timeline import Timeline, Sequence, Repeat, Call
+
+# 骰子动画：翻面次数与每次间隔（毫秒）
+DICE_ANIMATION_FRAMES = 2
+DICE_ANIMATION_MS = 100
 
 class DiceGameGUI:
-    def __init__(self, root):
+    """掷骰生成角色属性的场景；生成后把属性字典交给游戏场景"""
+    TITLE = "🎲 角色属性生成器"
+    GEOMETRY = "800x600"
+    BG = '#f0f0f0'
+
+    def __init__(self, root, frame=None, seed=None, scenes=None):
         self.root = root
-        self.root.title("🎲 角色属性生成器")
-        self.root.geometry("800x600")
-        self.root.configure(bg='#f0f0f0')
+        self.frame = frame if frame is not None else root
+        self.scenes = scenes
+        # 指定种子时掷骰结果可复现，并把种子传给游戏
+        self.seed = seed
+        self.dice_rng = random.Random(None if seed is None else f"{seed}/dice")
         
         # 属性数据
         self.attributes = {
@@ -21,13 +34,31 @@ class DiceGameGUI:
         }
         self.roll_history = []
         
+        # 骰子动画按帧推进；Esc 跳过正在播放的动画
+        self.timeline = Timeline(self.root)
+        self.root.bind('<Escape>', lambda event: self.timeline.finish_all())
+        
+        # 后台任务只在工作线程中计算，界面更新都回到主线程
+        self.dispatcher = UiDispatcher(self.root)
+        
         # 创建界面
         self.create_widgets()
         
+        # 玩家掷骰期间在后台导入游戏模块并编译事件库
+        self.dispatcher.submit(self.preload_game, key='preload')
+    
+    def preload_game(self):
+        """后台预载：导入 game 模块并载入事件库（失败时进入游戏再同步载入）"""
+        try:
+            import game
+            game.preload_event_library()
+        except Exception:
+            pass
+        
     def create_widgets(self):
         # 标题
         title_label = tk.Label(
-            self.root, 
+            self.frame, 
             text="🎮 角色属性生成器", 
             font=("Arial", 24, "bold"),
             bg='#f0f0f0',
@@ -37,7 +68,7 @@ class DiceGameGUI:
         
         # 说明文字
         desc_label = tk.Label(
-            self.root,
+            self.frame,
             text="掷骰子确定角色的基础属性（3个6面骰子，去掉最低值）",
             font=("Arial", 12),
             bg='#f0f0f0',
@@ -46,7 +77,7 @@ class DiceGameGUI:
         desc_label.pack(pady=10)
         
         # 主框架
-        main_frame = tk.Frame(self.root, bg='#f0f0f0')
+        main_frame = tk.Frame(self.frame, bg='#f0f0f0')
         main_frame.pack(expand=True, fill='both', padx=20, pady=20)
         
         # 左侧 - 属性显示区域
@@ -129,6 +160,19 @@ class DiceGameGUI:
         # 初始状态隐藏
         self.enter_game_button.pack_forget()
         
+        # 进入跑团冒险按钮（初始隐藏）
+        self.enter_adventure_button = tk.Button(
+            button_frame,
+            text="🗺️ 跑团冒险",
+            font=("Arial", 12, "bold"),
+            bg='#8e44ad',
+            fg='white',
+            relief='raised',
+            bd=3,
+            command=self.enter_adventure,
+            height=2
+        )
+        
         # 游戏状态标记
         self.game_ready = False
         
@@ -205,7 +249,7 @@ class DiceGameGUI:
     
     def roll_dice(self, sides=5, count=2):
         """掷骰子"""
-        return [random.randint(0, sides) for _ in range(count)]
+        return [self.dice_rng.randint(0, sides) for _ in range(count)]
     
     def calculate_attribute(self, rolls):
         """计算属性值"""
@@ -213,22 +257,18 @@ class DiceGameGUI:
         return sum(rolls)
     
     def animate_dice(self, rolls, callback):
-        """骰子动画"""
-        def animate():
-            for _ in range(2):  # 动画次数
-                for i, dice_label in enumerate(self.dice_labels):
-                    random_face = random.randint(0, 5)
-                    dice_label.config(text=self.get_dice_face(random_face))
-                self.root.update()
-                time.sleep(0.1)
-            
-            # 显示最终结果
+        """骰子动画：翻面几次后停在结果上（新的动画会让未播完的旧动画直接跳到结尾）"""
+        def flip(_):
+            for dice_label in self.dice_labels:
+                dice_label.config(text=self.get_dice_face(random.randint(0, 5)))
+        
+        def show_result():
             for i, dice_label in enumerate(self.dice_labels):
                 dice_label.config(text=self.get_dice_face(rolls[i]))
-            
-            callback()
         
-        threading.Thread(target=animate, daemon=True).start()
+        self.timeline.play(
+            Sequence(Repeat(DICE_ANIMATION_FRAMES, DICE_ANIMATION_MS, flip), Call(show_result)),
+            key='dice', on_done=callback)
     
     def get_dice_face(self, number):
         """获取骰子面"""
@@ -239,40 +279,32 @@ class DiceGameGUI:
         return faces.get(number, "⚀")
     
     def roll_all_attributes(self):
-        """掷所有属性"""
+        """掷所有属性（在主线程按固定顺序掷骰，保证同一种子结果可复现；只有动画交给 timeline）"""
         #self.roll_button.config(state='disabled')
         
-
-        
-        def roll_attributes():
-            for attr_name in self.attributes.keys():
-                rolls = self.roll_dice(5, 2)
-                attribute_value = self.calculate_attribute(rolls)
-                
-                self.attributes[attr_name] = attribute_value
-                self.roll_history.append({
-                    'attribute': attr_name,
-                    'rolls': rolls,
-                    'value': attribute_value
-                })
-                
-                # 更新骰子显示
-                self.root.after(0, lambda r=rolls: self.animate_dice(r, lambda: None))
-                
-                # 更新属性显示
-                self.root.after(0, self.update_attribute_display)
-                
-                #time.sleep(1)  # 每个属性之间的延迟
-            
-            # 掷骰子完成后显示"进入游戏"按钮
-            self.root.after(0, self.show_enter_game_button)
-        
-        threading.Thread(target=roll_attributes, daemon=True).start()
+        self.apply_rolls([(attr_name, self.roll_dice(5, 2)) for attr_name in self.attributes])
+    
+    def apply_rolls(self, results):
+        """写入掷骰结果并刷新显示"""
+        for attr_name, rolls in results:
+            attribute_value = self.calculate_attribute(rolls)
+            self.attributes[attr_name] = attribute_value
+            self.roll_history.append({
+                'attribute': attr_name,
+                'rolls': rolls,
+                'value': attribute_value
+            })
+        
+        # 骰子停在最后一项属性的点数上，然后显示"进入游戏"按钮
+        self.update_attribute_display()
+        self.animate_dice(results[-1][1], self.show_enter_game_button)
     
     def show_enter_game_button(self):
         """显示进入游戏按钮"""
         if not self.game_ready:
             self.enter_game_button.pack(fill='x', pady=10)
+            if self.scenes is not None and self.scenes.has('adventure'):
+                self.enter_adventure_button.pack(fill='x', pady=10)
             self.game_ready = True
             # 显示完成提示
             #messagebox.showinfo("属性生成完成", "角色属性已生成完成！\n点击'进入游戏'开始您的冒险！")
@@ -295,40 +327,29 @@ class DiceGameGUI:
         self.launch_game()
     
     def launch_game(self):
-        """启动游戏主程序"""
+        """切换到人生游戏场景（同一窗口，角色属性直接以字典传递）"""
+        # started 用于报告从进入游戏到第一个可操作事件的耗时
+        started = time.perf_counter()
         try:
-            import sys
-            import os
-            
-            # 传递角色属性数据
-            attr_data = {
-                '体质': self.attributes['体质'],
-                '智力': self.attributes['智力'],
-                '情商': self.attributes['情商'],
-                '幸运': self.attributes['幸运']
-            }
-            
-            # 将属性数据转换为JSON字符串以确保正确传递
-            import json
-            attr_json = json.dumps(attr_data, ensure_ascii=False)
-            
-            # 关闭当前窗口
-            self.close_start()
-            
-            # 直接导入并启动游戏
-            import game
-            # 设置命令行参数
-            sys.argv = [sys.argv[0], attr_json]
-            # 启动游戏
-            game.main()
-            
+            self.scenes.show('life', attributes=dict(self.attributes), started=started)
         except Exception as e:
             messagebox.showerror("错误", f"启动游戏失败：{str(e)}")
     
-    def close_start(self):
-        """关闭start.py界面"""
-        self.root.quit()
-        self.root.destroy()
+    def enter_adventure(self):
+        """切换到跑团冒险场景（每次进入都以当前属性重新开始）"""
+        try:
+            self.scenes.show('adventure', attributes=dict(self.attributes))
+        except Exception as e:
+            messagebox.showerror("错误", f"启动跑团冒险失败：{str(e)}")
+    
+    def leave(self):
+        """切换到其他场景：未播完的骰子动画直接跳到结尾"""
+        self.timeline.finish_all()
+    
+    def on_close(self):
+        """关闭窗口前取消后台任务与动画"""
+        self.dispatcher.shutdown()
+        self.timeline.cancel_all()
     
     def show_detailed_attributes(self):
         """显示详细属性"""
@@ -380,25 +401,40 @@ class DiceGameGUI:
         
 
         
-        def roll():
-            rolls = self.roll_dice(5, 2)
-            new_value = self.calculate_attribute(rolls)
-            old_value = self.attributes[attribute_name]
-            
-            self.attributes[attribute_name] = new_value
-            
-            # 更新历史记录
-           
-            
-
-        
-        threading.Thread(target=roll, daemon=True).start()
+        rolls = self.roll_dice(5, 2)
+        self.attributes[attribute_name] = self.calculate_attribute(rolls)
+        # 更新历史记录
+        self.roll_history.append({
+            'attribute': attribute_name,
+            'rolls': rolls,
+            'value': self.attributes[attribute_name]
+        })
+        self.update_attribute_display()
+        self.animate_dice(rolls, lambda: None)
     
     
 
+def create_life_scene(root, frame, seed):
+    import game
+    return game.create_scene(root, frame, seed)
+
+
+def create_adventure_scene(root, frame, seed, scenes):
+    from adventure_game import AdventureGame
+    return AdventureGame(root, frame, seed, scenes)
+
+
 def main():
+    import sys
+    from rng_streams import split_seed_arg
+    _, seed = split_seed_arg(sys.argv[1:])
+    # 整个流程只有一个 Tk 根窗口，各界面是其中的场景
     root = tk.Tk()
-    app = DiceGameGUI(root)
+    scenes = SceneManager(root)
+    scenes.register('dice', lambda frame: DiceGameGUI(root, frame, seed, scenes))
+    scenes.register('life', lambda frame: create_life_scene(root, frame, seed))
+    scenes.register('adventure', lambda frame: create_adventure_scene(root, frame, seed, scenes))
+    scenes.show('dice')
     root.mainloop()
 
 if __name__ == "__main__":
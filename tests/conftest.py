@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+@pytest.fixture
+def events_file(tmp_path):
+    """把事件字典写成临时 events.json，返回其路径"""
+    def write(library):
+        path = tmp_path / 'events.json'
+        path.write_text(json.dumps(library, ensure_ascii=False), encoding='utf-8')
+        return str(path)
+    return write
+
+
+def choice_event(**extra):
+    """一个只有单个选项的最小选择事件"""
+    event = {
+        'description': '测试事件',
+        'choices': [{'text': '好', 'effects': {'经验': 1}, 'description': '完成'}],
+    }
+    event.update(extra)
+    return event
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+import random
+
+import pytest
+
+import adventure_market
+import adventure_sim
+from adventure_engine import AdventureRun
+
+
+@pytest.mark.parametrize('market', ['static', 'dynamic'])
+@pytest.mark.parametrize('policy', sorted(set(adventure_sim.POLICIES) - {'optimal'}))
+def test_policies_finish_runs_on_both_markets(policy, market):
+    run = AdventureRun({'体质': 3, '智力': 3, '情商': 3, '幸运': 10}, seed=1,
+                       dynamic_market=market == 'dynamic')
+    rng = random.Random(1)
+    for _ in range(20):
+        run.reset()
+        adventure_sim.play_adventure(run, adventure_sim.make_policy(policy), rng)
+        assert run.outcome in ('win', 'over', 'stuck')
+
+
+@pytest.mark.parametrize('luck', range(11))
+def test_sell_price_is_below_buy_price_for_every_luck(luck):
+    paths = adventure_market.price_paths(7, 20, 10)
+    attributes = {'幸运': luck}
+    for path in paths:
+        market = adventure_market.Market(path, attributes)
+        for day in range(1, 11):
+            for item in market.items:
+                assert 0 <= market.sell_price(day, item) < market.buy_price(day, item)
+            market.sold(market.items[day % len(market.items)])
+            market.next_day()
+
+
+def test_luck_does_not_let_the_trader_win():
+    """价差调校的结果：任何幸运值下转手策略几乎都赢不了（调校前幸运 10 胜率过半）"""
+    vectors = [(3, 3, 3, luck) for luck in range(11)]
+    results = adventure_sim.run_grid(vectors, 500, jobs=1, seed=7, policy='trader')
+    for values, stats in zip(vectors, results):
+        assert stats.outcomes['win'] / stats.runs <= 0.01, values
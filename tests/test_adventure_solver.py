@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""小规模实例上的求解结果必须与逐一枚举的动态规划、以及实际对局一致"""
+import functools
+import random
+
+import pytest
+
+import adventure_engine
+import adventure_solver
+from adventure_engine import AdventureRun
+
+TARGET = 300
+DAYS = 3
+VECTORS = [
+    {'体质': 3, '智力': 5, '情商': 2, '幸运': 4},
+    {'体质': 0, '智力': 0, '情商': 0, '幸运': 0},
+    {'体质': 10, '智力': 0, '情商': 7, '幸运': 8},
+]
+
+
+def _brute_force(attributes, rules):
+    """逐一枚举每天的地点、购买、奖励与收入，返回 (胜率, 期望最终金钱, 最高可达金钱)"""
+    prices = {item: adventure_engine.adjusted_price(price, attributes) for item, price in rules['prices'].items()}
+    bonus = adventure_engine.special_bonus_distribution(attributes)
+    low, high = rules['income']
+    incomes = range(low, high + 1)
+    total_weight = sum(weight for _, weight, _ in rules['shops'])
+
+    @functools.lru_cache(maxsize=None)
+    def settled(day, money):
+        if money >= rules['target'] or day == rules['days']:
+            return float(money >= rules['target']), float(money), money
+        outcomes = [start_of_day(day + 1, money + income) for income in incomes]
+        return (sum(o[0] for o in outcomes) / len(incomes), sum(o[1] for o in outcomes) / len(incomes),
+                max(o[2] for o in outcomes))
+
+    @functools.lru_cache(maxsize=None)
+    def start_of_day(day, money):
+        win = cash = 0.0
+        best = None
+        for _, weight, items in rules['shops']:
+            candidates = []
+            for item in items:
+                if prices[item] <= money:
+                    results = [(p, settled(day, money - prices[item] + b)) for b, p in bonus.items()]
+                    candidates.append((sum(p * r[0] for p, r in results), sum(p * r[1] for p, r in results),
+                                       max(r[2] for p, r in results if p > 0)))
+            if candidates:
+                top = max(c[0] for c in candidates)
+                chosen = max((c for c in candidates if c[0] >= top - adventure_solver.TIE_EPSILON),
+                             key=lambda c: c[1])
+            else:
+                # 买不起任何商品：游戏停在这里
+                candidates = [(0.0, float(money), money)]
+                chosen = candidates[0]
+            reachable = max(c[2] for c in candidates)
+            best = reachable if best is None else max(best, reachable)
+            win += weight / total_weight * chosen[0]
+            cash += weight / total_weight * chosen[1]
+        return win, cash, best
+
+    return start_of_day(1, rules['start'])
+
+
+@pytest.mark.parametrize('attributes', VECTORS)
+def test_exact_solution_matches_brute_force(attributes):
+    rules = adventure_solver.default_rules(target=TARGET, max_days=DAYS)
+    solution = adventure_solver.solve(attributes, rules)
+    win, cash, best = _brute_force(attributes, rules)
+    assert solution['win_probability'] == pytest.approx(win, abs=1e-9)
+    assert solution['expected_money'] == pytest.approx(cash, abs=1e-6)
+    assert solution['max_money'] == best
+
+
+def test_bucketed_solution_is_a_lower_bound():
+    rules = adventure_solver.default_rules(target=TARGET, max_days=DAYS)
+    exact = adventure_solver.solve(VECTORS[0], rules)
+    coarse = adventure_solver.solve(VECTORS[0], rules, bucket=5)
+    assert 0.0 <= coarse['win_probability'] <= exact['win_probability'] + 1e-12
+
+
+def test_following_the_policy_wins_at_the_solved_rate():
+    attributes = VECTORS[0]
+    rules = adventure_solver.default_rules(target=TARGET, max_days=DAYS)
+    solution = adventure_solver.solve(attributes, rules)
+    tables = adventure_solver.policy_tables(solution)
+    run = AdventureRun(attributes, seed=3)
+    run.target_money, run.max_days = TARGET, DAYS
+    runs, wins = 4000, 0
+    for _ in range(runs):
+        run.reset()
+        while not run.finished:
+            run.start_day()
+            item = adventure_solver.best_purchase(solution, run.day, run.shop_index, run.money, rules, tables)
+            if item is None:
+                run.give_up()
+            else:
+                run.buy(item)
+        wins += run.outcome == 'win'
+    p = solution['win_probability']
+    assert 0 < p < 1
+    # 4000 局的标准差约 0.007，取 5 倍
+    assert abs(wins / runs - p) < 5 * (p * (1 - p) / runs) ** 0.5 + 1e-3
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""NumPy 批量战斗的统计结果必须与逐场结算的 battle_rules.simulate_boss_fight 一致"""
+import json
+import random
+
+import numpy as np
+import pytest
+
+import battle_rules
+import battle_vectorized
+
+FIGHTS = 20000
+
+
+def _scalar(stats, boss_hp, policy, seed):
+    rng = random.Random(seed)
+    results = [battle_rules.simulate_boss_fight(stats, boss_hp, policy=policy, rng=rng) for _ in range(FIGHTS)]
+    victory, turns, player_health, _ = (np.array(column) for column in zip(*results))
+    return victory, turns, player_health
+
+
+@pytest.mark.parametrize('policy', ['attack', 'defend'])
+@pytest.mark.parametrize('health, attack, dodge, boss_hp', [(60, 15, 20, 120), (100, 12, 30, 160)])
+def test_batch_matches_scalar_fights(policy, health, attack, dodge, boss_hp):
+    batch = battle_vectorized.simulate_boss_fights(health, attack, dodge, np.full(FIGHTS, boss_hp),
+                                                   policy=policy, seed=1)
+    victory, turns, player_health = _scalar({'health': health, 'attack': attack, 'dodge': dodge},
+                                            boss_hp, policy, seed=1)
+    # 两边随机数不同，按两个独立样本的标准误比较（取 5 倍）
+    p = (batch['victory'].mean() + victory.mean()) / 2
+    assert abs(batch['victory'].mean() - victory.mean()) <= 5 * (2 * p * (1 - p) / FIGHTS) ** 0.5 + 1e-9
+    for ours, theirs in ((batch['turns'], turns), (batch['player_health'], player_health)):
+        se = ((ours.var() + theirs.var()) / FIGHTS) ** 0.5
+        assert abs(ours.mean() - theirs.mean()) <= 5 * se + 1e-9
+    if policy == 'defend':
+        assert not batch['victory'].any()
+
+
+def test_json_report_contains_histograms(capsys):
+    battle_vectorized.main(['--fights', '500', '--health', '60', '--attack', '15', '--dodge', '20',
+                            '--boss-hp', '120', '--seed', '3', '--json'])
+    summary = json.loads(capsys.readouterr().out)['120']
+    assert sum(summary['turns_histogram']) == 500
+    assert sum(summary['player_health_remaining']['histogram']) + \
+        sum(summary['boss_health_remaining']['histogram']) == 500
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""编译后的表达式必须与原 str.replace + eval 的求值结果一致，且拒绝未知名称"""
+import itertools
+
+import pytest
+
+from event_expr import ExpressionError, _clamp, compile_expression, compile_requires
+from game_state import ATTRIBUTE_NAMES
+
+FORMULAS = [
+    '智力 * 0.1 + 0.2',
+    '(体质 + 幸运) / 20',
+    '-智力 + 10 // 3',
+    '情商 % 3 - -1',
+    'min(1, 智力 * 0.15)',
+    'max(0.05, 幸运 / 10, 体质 * 0.02)',
+    'clamp(智力 - 情商, 0, 5) / 5',
+    'abs(体质 - 5) * 0.1',
+    '智力 >= 5',
+    '体质 + 1 < 情商 * 2',
+]
+
+
+def _eval(formula, attributes):
+    return eval(formula, {'__builtins__': {}, 'min': min, 'max': max, 'abs': abs, 'clamp': _clamp},
+                dict(attributes))
+
+
+@pytest.mark.parametrize('formula', FORMULAS)
+def test_compiled_formula_matches_eval(formula):
+    fn = compile_expression(formula, ATTRIBUTE_NAMES)
+    for values in itertools.product((0, 3, 7, 10), repeat=len(ATTRIBUTE_NAMES)):
+        attributes = dict(zip(ATTRIBUTE_NAMES, values))
+        assert fn(attributes) == pytest.approx(_eval(formula, attributes))
+
+
+@pytest.mark.parametrize('formula', [
+    '魅力 * 0.1',              # 未知属性
+    '__import__("os")',        # 未知函数 / 非法字符
+    'open(智力)',
+    'clamp(智力, 1)',          # 参数个数错误
+    '1 < 智力 < 5',            # 比较不能连写
+    '智力 *',
+    '(智力 + 1',
+    '1 / 0',
+    '',
+])
+def test_invalid_formula_raises_expression_error(formula):
+    with pytest.raises(ExpressionError):
+        compile_expression(formula, ATTRIBUTE_NAMES)
+
+
+def test_compile_requires_checks_attributes_and_flags():
+    check = compile_requires({
+        'attributes': {'智力': '>=3', '情商': '<智力+1', '幸运': '2'},
+        'flags_all': ['会游泳'],
+        'flags_any': ['有船', '有桥'],
+    }, ATTRIBUTE_NAMES)
+    attributes = {'体质': 0, '智力': 4, '情商': 4, '幸运': 2}
+    assert check(attributes, {'会游泳', '有船'})
+    assert not check(attributes, {'有船'})
+    assert not check(attributes, {'会游泳'})
+    assert not check(dict(attributes, 智力=2), {'会游泳', '有桥'})
+    assert not check(dict(attributes, 情商=5), {'会游泳', '有桥'})
+    assert not check(dict(attributes, 幸运=3), {'会游泳', '有桥'})
+    assert compile_requires({}) is None
+    with pytest.raises(ExpressionError):
+        compile_requires({'attributes': {'魅力': '>1'}}, ATTRIBUTE_NAMES)
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""EventIndex 的候选池必须始终与 GameState._check_requires 一致"""
+import random
+
+import replay
+from conftest import choice_event
+from event_index import POOL_NEGATIVE, POOL_POSITIVE, EventIndex
+from game_state import GameState, ATTRIBUTE_NAMES
+
+
+def _gain(**effects):
+    return [{'text': '好', 'effects': effects, 'description': '完成'}]
+
+
+def _assert_consistent(state):
+    state.event_index.sync()
+    candidates = set(state.event_index.candidates(POOL_POSITIVE))
+    for name in state.event_library:
+        if name in candidates:
+            assert state._check_requires(name), name
+
+
+def test_rhs_attribute_reference_is_a_dependency(events_file):
+    state = GameState(events_file=events_file({
+        '比智力强': choice_event(requires={'attributes': {'体质': '>=智力'}}),
+        '普通': choice_event(),
+    }), seed=1)
+    state.load_character_attributes({'体质': 5, '智力': 3})
+    state.event_index.sync()
+    assert '比智力强' in state.event_index.candidates(POOL_POSITIVE)
+
+    # 只改变右侧引用的属性
+    state.attributes['智力'] = 8
+    state.event_index.sync()
+    assert not state._check_requires('比智力强')
+    assert '比智力强' not in state.event_index.candidates(POOL_POSITIVE)
+
+    state.attributes['智力'] = 2
+    state.event_index.sync()
+    assert '比智力强' in state.event_index.candidates(POOL_POSITIVE)
+
+
+def test_index_matches_check_requires_under_random_changes(events_file):
+    state = GameState(events_file=events_file({
+        '高体质': choice_event(requires={'attributes': {'体质': '>=5'}}),
+        '体质胜智力': choice_event(requires={'attributes': {'体质': '>智力'}}),
+        '均衡': choice_event(requires={'attributes': {'情商': '<=max(智力, 幸运)+1'}}),
+        '旗标': choice_event(requires={'flags_all': ['见过_高体质']}),
+        '普通': choice_event(),
+    }), seed=2)
+    rng = random.Random(3)
+    for _ in range(300):
+        name = rng.choice(ATTRIBUTE_NAMES)
+        state.attributes[name] = rng.randint(0, 10)
+        if rng.random() < 0.05:
+            state.flags.add('见过_高体质')
+        _assert_consistent(state)
+
+
+
+def test_incremental_index_matches_a_full_rebuild_during_play(events_file):
+    """逐步游玩：增量同步的候选池必须与按当前局面全量重建的索引一致"""
+    state = GameState(events_file=events_file({
+        '冷却': choice_event(cooldown=3, choices=_gain(经验=30)),
+        '一次性': choice_event(once=True),
+        '高等级': choice_event(min_level=2),
+        '低等级': choice_event(max_level=1),
+        '小学专属': choice_event(tags=['stage=小学']),
+        '练脑': choice_event(choices=_gain(智力=1)),
+        '锻炼': choice_event(choices=_gain(体质=2)),
+        '聪明': choice_event(requires={'attributes': {'智力': '>=6'}}),
+        '体质胜智力': choice_event(requires={'attributes': {'体质': '>智力+2'}}),
+        '见过一次性': choice_event(requires={'flags_all': ['见过_一次性']}),
+        '普通': choice_event(),
+    }), seed=4)
+    rng = random.Random(4)
+    replay.start_run(state, 4, {name: 3 for name in ATTRIBUTE_NAMES})
+    steps = 0
+    while not state.finished and steps < 400:
+        state.event_index.sync()
+        fresh = EventIndex(state)
+        for pool in (POOL_POSITIVE, POOL_NEGATIVE):
+            assert state.event_index.candidates(pool) == fresh.candidates(pool), (steps, pool)
+        if state.phase == 'choice':
+            decision = ['choice', rng.randrange(len(state.current_choices))]
+        elif state.phase == 'battle':
+            decision = ['battle', 'attack']
+        else:
+            decision = ['next']
+        replay.execute(state, [decision])
+        steps += 1
+    assert state.current_stage_index > 0
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from conftest import choice_event
+from event_lint import ERROR, lint_library
+
+
+def _errors(library):
+    return [issue for issue in lint_library(library) if issue.severity == ERROR]
+
+
+@pytest.mark.parametrize('event', [
+    choice_event(requires={'attributes': ['体质', '>=3']}),
+    choice_event(requires={'attributes': '体质>=3'}),
+    choice_event(requires={'flags_all': [['见过_甲']]}),
+    choice_event(requires={'flags_all': 3}),
+    choice_event(requires={'flags_any': [{'a': 1}]}),
+    choice_event(excludes=[['甲']]),
+    choice_event(excludes=[{'name': '甲'}]),
+    choice_event(excludes='甲'),
+])
+def test_malformed_fields_are_reported_not_raised(event):
+    errors = _errors({'甲': choice_event(), '坏': event})
+    assert errors
+    assert all(issue.event == '坏' for issue in errors)
+
+
+def test_valid_library_has_no_errors():
+    assert _errors({
+        '甲': choice_event(),
+        '乙': choice_event(requires={'attributes': {'体质': '>=智力'}, 'flags_all': ['见过_甲']},
+                           excludes=['甲']),
+    }) == []
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+import json
+
+from conftest import choice_event
+from game_state import GameState
+
+
+def test_reload_closes_previous_library(events_file):
+    path = events_file({'甲': choice_event(), '乙': choice_event()})
+    state = GameState(events_file=path, seed=1)
+    # 第二次载入走预编译缓存，得到 mmap 支撑的 LazyEventLibrary
+    state.init_event_library()
+    old = state.event_library
+    closed = []
+    old.close = lambda: closed.append(True)
+
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'甲': choice_event(weight=3), '丙': choice_event()}, f, ensure_ascii=False)
+    added, changed, removed = state.reload_event_library()
+
+    assert (added, changed, removed) == (['丙'], ['甲'], ['乙'])
+    assert closed == [True]
+    assert state.event_library is not old
+    assert state.event_library['丙']['description'] == '测试事件'
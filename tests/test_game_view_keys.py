@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""选择与 Roll 点结算后，GameMain 必须把受影响的标签都标记为待刷新（不需要显示器）"""
+import pytest
+
+import replay
+from conftest import choice_event
+from game import ATTRIBUTE_VIEW_KEYS, PROGRESS_VIEW_KEYS, GameMain
+from game_state import GameState
+
+
+class RenderStub:
+    """只记录 mark() 收到的键的 RenderScheduler 替身"""
+
+    def __init__(self):
+        self.marked = set()
+
+    def mark(self, *keys):
+        self.marked.update(keys)
+
+
+def _game(events_file, library):
+    """不创建任何 Tk 组件的 GameMain，只保留 state 与 render"""
+    game = GameMain.__new__(GameMain)
+    game.state = GameState(events_file=events_file(library), seed=1)
+    game.render = RenderStub()
+    game.show_choice_result = lambda choice, changes: None
+    game.show_auto_roll_result = lambda description, changes: None
+    replay.start_run(game.state, 1, {'体质': 3, '智力': 3, '情商': 3, '幸运': 3})
+    game.state.next_event()
+    game.render.marked.clear()
+    return game
+
+
+def _choose(events_file, effects):
+    game = _game(events_file, {'测试': choice_event(choices=[{'text': '好', 'effects': effects, 'description': '完成'}])})
+    game.make_choice(game.state.current_choices[0])
+    return game.render.marked
+
+
+def test_choice_marks_exactly_the_touched_labels(events_file):
+    marked = _choose(events_file, {'智力': 1, '生命值': -5, '魔法值': 3, '经验': 10})
+    assert marked == {('attr', '智力'), 'health', 'magic', 'exp', 'choices'}
+
+
+@pytest.mark.parametrize('effects', [{'经验': 250}, {'经验': 250, '情商': 1}])
+def test_level_up_marks_every_attribute_and_progress_label(events_file, effects):
+    marked = _choose(events_file, effects)
+    assert set(ATTRIBUTE_VIEW_KEYS) | set(PROGRESS_VIEW_KEYS) | {'choices'} <= marked
+
+
+def test_auto_roll_marks_both_outcomes(events_file):
+    game = _game(events_file, {'掷骰': {
+        'description': '测试 Roll 点',
+        'auto_roll': {
+            'success_probability': '50',
+            'success_effects': {'幸运': 1, '经验': 5},
+            'success_description': '成功',
+            'failure_effects': {'生命值': -3},
+            'failure_description': '失败',
+        },
+    }})
+    assert game.handle_auto_roll_event(game.state.current_event)
+    assert {('attr', '幸运'), 'exp', 'health', 'choices'} <= game.render.marked
+    assert ('attr', '体质') not in game.render.marked
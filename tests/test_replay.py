@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""同一种子与决定列表总是重放出同一局面哈希与同一组存档记录"""
+import json
+import random
+
+import pytest
+
+import replay
+from game_state import GameState
+from simulate import greedy_policy, roll_character_attributes
+
+
+def _record_live_run(seed):
+    """像界面一样开局并随机做决定，返回 (存档记录, 最终哈希)"""
+    rng = random.Random(seed)
+    records = []
+    state = replay.new_run(seed, roll_character_attributes(rng), recorder=records.append)
+    while not state.finished:
+        if state.phase == 'choice':
+            choice = greedy_policy(state, rng)
+            decision = ['choice', state.current_choices.index(choice)]
+        elif state.phase == 'battle':
+            decision = ['battle', rng.choice(('attack', 'defend'))]
+        else:
+            decision = ['next']
+        replay.execute(state, [decision])
+    return records, replay.state_hash(state)
+
+
+@pytest.mark.parametrize('seed', [4, 17])
+def test_replaying_decisions_reproduces_hash_and_records(seed):
+    records, live_hash = _record_live_run(seed)
+    run_seed, attributes, decisions = replay.decisions_from_records(records)
+    # 与 --export 相同：决定列表经 JSON 往返后仍可重放
+    decisions = json.loads(json.dumps(decisions))
+
+    for _ in range(2):
+        replayed = []
+        state = replay.new_run(run_seed, attributes, recorder=replayed.append)
+        replay.execute(state, decisions)
+        assert replay.state_hash(state) == live_hash
+        assert replay.first_divergence(records, replayed) is None
+
+
+def test_different_decisions_change_the_hash():
+    records, live_hash = _record_live_run(4)
+    run_seed, attributes, decisions = replay.decisions_from_records(records)
+    state = replay.new_run(run_seed, attributes)
+    replay.execute(state, decisions[:len(decisions) // 2])
+    assert replay.state_hash(state) != live_hash
+
+
+def test_reused_state_replays_like_a_fresh_one():
+    other = replay.decisions_from_records(_record_live_run(8)[0])
+    records, live_hash = _record_live_run(9)
+    run_seed, attributes, decisions = replay.decisions_from_records(records)
+    state = GameState()
+    replay.execute(replay.start_run(state, other[0], other[1]), other[2])
+    replay.execute(replay.start_run(state, run_seed, attributes), decisions)
+    assert replay.state_hash(state) == live_hash
+
+
+def test_records_without_start_are_rejected():
+    with pytest.raises(ValueError):
+        replay.decisions_from_records([('event', 'x')])
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""快照 + 日志尾部回放必须恢复出与实时局面完全相同的状态"""
+import random
+
+import pytest
+
+import replay
+from game_state import GameState
+from save_journal import SaveJournal, load_save
+from simulate import greedy_policy, roll_character_attributes
+
+
+@pytest.fixture(scope='module')
+def resumed():
+    """用于恢复存档的 GameState（restore 会先 reset，可反复使用）"""
+    return GameState(seed=0)
+
+
+def _next_decision(state, rng):
+    if state.phase == 'choice':
+        choice = greedy_policy(state, rng)
+        return ['choice', next(i for i, c in enumerate(state.current_choices) if c is choice)]
+    if state.phase == 'battle':
+        return ['battle', rng.choice(('attack', 'defend'))]
+    return ['next']
+
+
+def _play(state, seed, recorder=None, max_decisions=None):
+    """按 GameMain 的开局顺序开始一局并做决定，直到结束或达到 max_decisions"""
+    rng = random.Random(seed)
+    replay.start_run(state, seed, roll_character_attributes(rng))
+    if recorder is not None:
+        recorder(state)
+    decisions = 0
+    while not state.finished and (max_decisions is None or decisions < max_decisions):
+        replay.execute(state, [_next_decision(state, rng)])
+        decisions += 1
+    return state
+
+
+def _view(state):
+    """比较用的局面（随机数流不参与：续玩前会按事件序号重新派生）"""
+    snap = state.snapshot()
+    snap.pop('rng')
+    return snap, [c['text'] for c in state.current_choices]
+
+
+@pytest.mark.parametrize('seed', [1, 2, 3])
+def test_resume_matches_live_state_at_every_snapshot_offset(seed, resumed):
+    records, snaps = [], []
+
+    def start(state):
+        def record(rec):
+            # 与 SaveJournal.append 相同：记录写入后立即同步取快照
+            records.append(rec)
+            snaps.append(state.snapshot())
+        state.start_recording(record)
+
+    live = _play(GameState(seed=0), seed, start)
+    assert live.finished
+    expected = _view(live)
+    kinds = {rec[0] for rec in records}
+    assert {'event', 'choice', 'battle', 'battle_end'} <= kinds
+
+    for offset, snap in enumerate(snaps):
+        resumed.restore(snap)
+        resumed.replay(records[offset + 1:])
+        assert _view(resumed) == expected, (offset, records[offset])
+
+
+@pytest.mark.parametrize('snapshot_every', [1, 2, 3, 50])
+@pytest.mark.parametrize('stop_after', [7, 40, 90])
+def test_journal_on_disk_resumes_to_live_state(tmp_path, snapshot_every, stop_after, resumed):
+    path = str(tmp_path / 'save.journal')
+    live = GameState(seed=0)
+    journal = SaveJournal(path, live.snapshot, snapshot_every)
+
+    def start(state):
+        journal.begin(state.snapshot())
+        state.start_recording(journal.append)
+
+    _play(live, 5, start, max_decisions=stop_after)
+    journal.close()
+    assert journal.error is None
+
+    snap, records, _ = load_save(path)
+    resumed.restore(snap)
+    resumed.replay(records)
+    assert _view(resumed) == _view(live)
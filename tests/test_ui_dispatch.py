@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""UiDispatcher 的取消、在途上限与队列满时的行为（用假的 root.after，不需要显示器）"""
+import threading
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+
+import pytest
+
+from ui_dispatch import UiDispatcher
+
+
+class FakeRoot:
+    """只记录 after 回调的 Tk root 替身，run_pending() 模拟一次事件循环"""
+
+    def __init__(self):
+        self.pending = {}
+        self._next_id = 0
+
+    def after(self, delay, fn):
+        self._next_id += 1
+        self.pending[self._next_id] = fn
+        return self._next_id
+
+    def after_cancel(self, after_id):
+        self.pending.pop(after_id, None)
+
+    def run_pending(self):
+        callbacks, self.pending = list(self.pending.values()), {}
+        for fn in callbacks:
+            fn()
+
+
+class InlineExecutor(Executor):
+    """在调用线程上立即执行任务：submit 返回时 future 已完成"""
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+@pytest.fixture
+def pool():
+    executor = ThreadPoolExecutor(max_workers=4)
+    yield executor
+    executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _drain(root, until, rounds=200):
+    for _ in range(rounds):
+        if until():
+            return
+        root.run_pending()
+        threading.Event().wait(0.005)
+    raise AssertionError("回调没有在主线程执行")
+
+
+def test_same_key_cancels_the_stale_task(pool):
+    root = FakeRoot()
+    dispatcher = UiDispatcher(root, executor=pool)
+    release = threading.Event()
+    results = []
+    first = dispatcher.submit(lambda: release.wait(5) and 'old', on_done=results.append, key='preview')
+    second = dispatcher.submit(lambda: 'new', on_done=results.append, key='preview')
+    assert first.cancelled and not second.cancelled
+    release.set()
+    _drain(root, lambda: first.done() and second.done() and not dispatcher._in_flight)
+    root.run_pending()
+    assert results == ['new']
+
+
+def test_max_in_flight_rejects_until_a_task_finishes(pool):
+    root = FakeRoot()
+    dispatcher = UiDispatcher(root, executor=pool, max_in_flight=2)
+    release = threading.Event()
+    done = []
+    tasks = [dispatcher.submit(release.wait, 5, on_done=done.append) for _ in range(2)]
+    assert all(tasks)
+    assert dispatcher.submit(lambda: None) is None
+    release.set()
+    _drain(root, lambda: len(done) == 2)
+    assert dispatcher.submit(lambda: 'again', on_done=done.append) is not None
+
+
+def test_full_queue_never_blocks_the_main_thread():
+    root = FakeRoot()
+    outcome = {}
+
+    def ui_thread():
+        # 创建调度器的线程就是“主线程”；任务在 submit 时已完成，完成回调在这里入队
+        dispatcher = UiDispatcher(root, executor=InlineExecutor(), queue_size=1, max_in_flight=100)
+        results = []
+        for i in range(5):
+            dispatcher.submit(lambda i=i: i, on_done=results.append)
+        assert dispatcher.post(results.append, 'posted')
+        for _ in range(10):  # 空闲时轮询会一直重新安排自己，跑几轮即可
+            root.run_pending()
+        outcome['results'] = results
+
+    thread = threading.Thread(target=ui_thread, daemon=True)
+    thread.start()
+    thread.join(5)
+    assert not thread.is_alive(), "主线程在满队列上阻塞"
+    assert sorted(outcome['results'], key=str) == [0, 1, 2, 3, 4, 'posted']
+
+
+def test_worker_post_times_out_on_a_full_queue(pool):
+    root = FakeRoot()
+    dispatcher = UiDispatcher(root, executor=pool, queue_size=1)
+    assert dispatcher.post(lambda: None)
+    assert pool.submit(dispatcher.post, lambda: None, timeout=0.05).result(5) is False
+    root.run_pending()
+    assert pool.submit(dispatcher.post, lambda: None, timeout=0.05).result(5) is True
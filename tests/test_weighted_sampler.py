@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""Fenwick 树抽样器必须与线性累加的 weighted_choice 语义逐值一致"""
+import random
+
+from weighted_sampler import WeightedSampler
+
+
+def _linear_find(keys, weights, r):
+    """原 weighted_choice：按插入顺序累加权重，返回第一个累计值 >= r 的键"""
+    cumulative = 0
+    for key in keys:
+        cumulative += weights[key]
+        if cumulative >= r:
+            return key
+    raise AssertionError("r 超出总权重")
+
+
+def _assert_matches(sampler, keys, weights):
+    total = sum(weights.values())
+    assert sampler.total == total
+    for key in keys:
+        assert sampler.weight(key) == weights[key]
+    for r in range(1, total + 1):
+        assert sampler.find(r) == _linear_find(keys, weights, r)
+
+
+def test_find_matches_linear_scan_under_random_updates():
+    rng = random.Random(5)
+    keys = [f'e{i}' for i in range(13)]
+    weights = {key: rng.randint(0, 4) for key in keys}
+    sampler = WeightedSampler(keys, [weights[key] for key in keys])
+    _assert_matches(sampler, keys, weights)
+    for step in range(200):
+        action = rng.random()
+        if action < 0.2:
+            key = f'e{len(keys)}'
+            keys.append(key)
+            weights[key] = rng.randint(0, 4)
+            sampler.add(key, weights[key])
+        elif action < 0.4:
+            key = rng.choice(keys)
+            weights[key] = 0
+            sampler.disable(key)
+        else:
+            key = rng.choice(keys)
+            weights[key] = rng.randint(0, 6)
+            sampler.set_weight(key, weights[key])
+        _assert_matches(sampler, keys, weights)
+
+
+def test_sample_draws_the_same_keys_as_weighted_choice():
+    keys = ['a', 'b', 'c', 'd']
+    weights = {'a': 3, 'b': 0, 'c': 1, 'd': 5}
+    sampler = WeightedSampler(keys, [weights[key] for key in keys])
+    ours, theirs = random.Random(11), random.Random(11)
+    for _ in range(500):
+        expected = _linear_find(keys, weights, theirs.randint(1, 9))
+        assert sampler.sample(ours) == expected
+    assert 'b' not in {sampler.sample(ours) for _ in range(200)}
+
+
+def test_sample_returns_none_when_every_key_is_disabled():
+    sampler = WeightedSampler(['a', 'b'])
+    sampler.disable('a')
+    sampler.disable('b')
+    assert sampler.total == 0
+    assert sampler.sample(random.Random(0)) is None
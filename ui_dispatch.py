@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""后台任务与 Tk 主线程之间的调度队列。
+
+Tk 组件只能在主线程中访问。后台任务在线程池（或调用方传入的进程池）中
+执行，结果与进度回调放进队列，由主线程上的 after 轮询按批取出执行：
+- submit(fn, ..., on_done=, on_error=, key=)：提交后台任务，回调在主线程执行
+- post(fn, ...)：后台线程请求在主线程执行 fn（队列满时等待，形成背压）；
+  主线程自己调用时从不阻塞（队列满时暂存到只由主线程访问的溢出列表），
+  否则主线程等在 put 上就再也没有人取队列，界面死锁
+- Task.cancel()：尚未开始的任务直接取消；已在运行的任务结果被丢弃，
+  任务函数也可通过 Task.cancelled 主动提前结束
+- key：同一 key 的新任务会取消旧任务（如预览只保留最新一次）
+- max_in_flight：同时在途的任务上限，超出时 submit 返回 None
+"""
+import collections
+import queue
+import threading
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+
+# 有任务在途时的轮询间隔（毫秒）与空闲时的轮询间隔
+DISPATCH_POLL_MS = 16
+DISPATCH_IDLE_POLL_MS = 100
+# 每次轮询最多执行的回调数，其余留到下一轮，避免一次卡住界面
+DISPATCH_BATCH = 64
+# 主线程回调队列的容量（后台线程 post 时的背压上限）
+DISPATCH_QUEUE_SIZE = 1024
+# 同时在途的后台任务上限
+DISPATCH_MAX_IN_FLIGHT = 32
+
+
+class Task:
+    """一个已提交的后台任务"""
+
+    def __init__(self, key=None):
+        self.key = key
+        self.future = None
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        """取消任务：未开始的不再执行，已开始的结果不再回调"""
+        self._cancelled.set()
+        if self.future is not None:
+            self.future.cancel()
+
+    def done(self):
+        return self.future is not None and self.future.done()
+
+
+class UiDispatcher:
+    """后台执行 + 主线程批量回调"""
+
+    def __init__(self, root, executor=None, max_workers=2, max_in_flight=DISPATCH_MAX_IN_FLIGHT,
+                 queue_size=DISPATCH_QUEUE_SIZE, batch=DISPATCH_BATCH):
+        self.root = root
+        self._own_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='ui-worker')
+        self.max_in_flight = max_in_flight
+        self.batch = batch
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._overflow = collections.deque()  # 主线程入队时队列已满的回调（只由主线程访问）
+        self._main_thread = threading.get_ident()
+        self._in_flight = set()
+        self._keyed = {}  # {key: 最新的 Task}
+        self._closed = False
+        self._poll_id = self.root.after(DISPATCH_IDLE_POLL_MS, self._poll)
+
+    # ---- 主线程接口 ----
+    def submit(self, fn, *args, on_done=None, on_error=None, key=None, pass_task=False):
+        """在后台执行 fn(*args)，完成后在主线程调用 on_done(结果) 或 on_error(异常)。
+
+        pass_task 为 True 时以 fn(task, *args) 调用，便于长任务检查 task.cancelled。
+        在途任务已达上限或调度器已关闭时返回 None。
+        """
+        if self._closed or len(self._in_flight) >= self.max_in_flight:
+            return None
+        if key is not None and key in self._keyed:
+            self._keyed.pop(key).cancel()
+        task = Task(key)
+        if pass_task:
+            args = (task,) + args
+        task.future = self.executor.submit(fn, *args)
+        self._in_flight.add(task)
+        if key is not None:
+            self._keyed[key] = task
+        task.future.add_done_callback(lambda future: self._enqueue((self._finish, task, on_done, on_error)))
+        self._reschedule(DISPATCH_POLL_MS)
+        return task
+
+    def cancel_all(self):
+        for task in list(self._in_flight):
+            task.cancel()
+
+    def shutdown(self):
+        """取消全部任务并停止轮询（窗口关闭前调用）"""
+        self._closed = True
+        self.cancel_all()
+        if self._poll_id is not None:
+            try:
+                self.root.after_cancel(self._poll_id)
+            except tk.TclError:
+                pass
+            self._poll_id = None
+        if self._own_executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    # ---- 任意线程接口 ----
+    def post(self, fn, *args, timeout=None):
+        """请求在主线程执行 fn(*args)。队列满时阻塞（背压）；超时或已关闭时返回 False"""
+        return self._enqueue((fn,) + args, timeout)
+
+    def _enqueue(self, item, timeout=None):
+        if self._closed:
+            return False
+        if threading.get_ident() == self._main_thread:
+            # 任务在 submit 时已完成的话，完成回调就在主线程执行：不能阻塞
+            try:
+                self._queue.put_nowait(item)
+            except queue.Full:
+                self._overflow.append(item)
+            return True
+        try:
+            self._queue.put(item, timeout=timeout)
+        except queue.Full:
+            return False
+        return True
+
+    def _next_item(self):
+        try:
+            return self._queue.get_nowait()
+        except queue.Empty:
+            if self._overflow:
+                return self._overflow.popleft()
+            return None
+
+    # ---- 主线程轮询 ----
+    def _finish(self, task, on_done, on_error):
+        self._in_flight.discard(task)
+        if task.key is not None and self._keyed.get(task.key) is task:
+            del self._keyed[task.key]
+        if task.cancelled or task.future.cancelled():
+            return
+        error = task.future.exception()
+        if error is not None:
+            if on_error is not None:
+                on_error(error)
+            else:
+                print(f"后台任务出错：{error!r}")
+        elif on_done is not None:
+            on_done(task.future.result())
+
+    def _poll(self):
+        self._poll_id = None
+        for _ in range(self.batch):
+            item = self._next_item()
+            if item is None:
+                break
+            fn, args = item[0], item[1:]
+            try:
+                fn(*args)
+            except Exception as e:
+                print(f"界面回调出错：{e!r}")
+        if self._closed:
+            return
+        busy = self._in_flight or self._overflow or not self._queue.empty()
+        self._reschedule(DISPATCH_POLL_MS if busy else DISPATCH_IDLE_POLL_MS)
+
+    def _reschedule(self, delay):
+        if self._poll_id is not None:
+            if delay >= DISPATCH_IDLE_POLL_MS:
+                return
+            self.root.after_cancel(self._poll_id)
+        try:
+            self._poll_id = self.root.after(delay, self._poll)
+        except tk.TclError:
+            self._poll_id = None
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""批量写入、限制行数的日志面板。
+
+逐条 insert + see('end') 在一次结算写多条日志时会反复重排 Text 组件，
+组件内容也会随游戏进行无限增长。LogSink 先把消息缓存起来，在 Tk 空闲时
+一次性插入；组件只保留最近 max_lines 行，超出一截后从头部整段删除。
+完整历史另存于定长环形缓冲区（history）中。
+"""
+import tkinter as tk
+from collections import deque
+
+# 日志组件保留的最大行数
+LOG_MAX_LINES = 500
+# 组件外保留的历史条数
+LOG_HISTORY_SIZE = 5000
+
+
+class LogSink:
+    """把消息写入只读 Text 组件的缓冲日志"""
+
+    def __init__(self, text_widget, max_lines=LOG_MAX_LINES, history_size=LOG_HISTORY_SIZE):
+        self.widget = text_widget
+        self.max_lines = max_lines
+        # 超出上限这么多行才裁剪一次，避免每次刷新都删除
+        self.trim_chunk = max(1, max_lines // 10)
+        self.history = deque(maxlen=history_size)
+        self._pending = []
+        self._flush_id = None
+        self._lines = 0  # 组件中现有的日志行数
+
+    def write(self, message):
+        """记录一条消息，在下一个空闲周期写入组件"""
+        message = str(message)
+        self.history.append(message)
+        self._pending.append(message)
+        if self._flush_id is None:
+            self._flush_id = self.widget.after_idle(self.flush)
+
+    __call__ = write
+
+    def flush(self):
+        """立即把缓存的消息写入组件"""
+        self._flush_id = None
+        if not self._pending:
+            return
+        text = '\n'.join(self._pending) + '\n'
+        self._pending = []
+        widget = self.widget
+        try:
+            widget.config(state='normal')
+            widget.insert('end', text)
+            self._lines += text.count('\n')
+            if self._lines > self.max_lines + self.trim_chunk:
+                excess = self._lines - self.max_lines
+                widget.delete('1.0', f'{excess + 1}.0')
+                self._lines -= excess
+            widget.see('end')
+            widget.config(state='disabled')
+        except tk.TclError:
+            # 组件已销毁（如战斗窗口已关闭），丢弃即可，历史仍保留
+            pass
+
+    def cancel(self):
+        """取消尚未执行的刷新（销毁组件前调用）"""
+        if self._flush_id is not None:
+            try:
+                self.widget.after_cancel(self._flush_id)
+            except tk.TclError:
+                pass
+            self._flush_id = None
+
+    def history_text(self):
+        return '\n'.join(self.history)
@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""按帧推进的界面动画（root.after 驱动，不占用线程、不阻塞输入）。
+
+Timeline 只在有动画播放时每 FRAME_MS 毫秒推进一帧，空闲时不占用事件循环：
+- Tween：在给定时长内把数值从 start 过渡到 end，每帧调用 apply(值)
+- Repeat：每隔 interval 毫秒调用一次 fn(序号)，共 count 次（如骰子翻面）
+- Pause / Call：等待一段时间 / 调用一次函数
+- Sequence：依次播放上面的步骤
+- play(..., key=)：同一 key 的新动画会先把旧动画直接跳到结尾，动画不会堆积
+- finish() / finish_all()：跳到结尾（只应用最终状态，不补播中间帧）
+
+全局速度倍率由 set_speed 设置（也可用环境变量 GAME_ANIMATION_SPEED），
+倍率为 0 时所有动画在 play 时立即跳到结尾，不安排任何帧。
+"""
+import os
+import time
+import tkinter as tk
+import weakref
+
+SPEED_ENV_VAR = 'GAME_ANIMATION_SPEED'
+# 每帧间隔（毫秒），约 60 帧/秒
+FRAME_MS = 16
+
+
+def _speed_from_env():
+    try:
+        return max(0.0, float(os.environ.get(SPEED_ENV_VAR, 1.0)))
+    except ValueError:
+        return 1.0
+
+
+_speed = _speed_from_env()
+_timelines = weakref.WeakSet()
+
+
+def linear(t):
+    return t
+
+
+def ease_out(t):
+    return 1 - (1 - t) * (1 - t)
+
+
+class Tween:
+    """在 duration 毫秒内从 start 过渡到 end"""
+
+    def __init__(self, duration, apply, start=0.0, end=1.0, easing=ease_out):
+        self.duration = duration
+        self.apply = apply
+        self.start = start
+        self.end = end
+        self.easing = easing
+        self.elapsed = 0.0
+
+    def advance(self, ms):
+        """推进 ms 毫秒，返回未用完的时间（仍在播放时为 None）"""
+        self.elapsed += ms
+        if self.elapsed >= self.duration:
+            self.apply(self.end)
+            return self.elapsed - self.duration
+        t = self.easing(self.elapsed / self.duration)
+        self.apply(self.start + (self.end - self.start) * t)
+        return None
+
+    def finish(self):
+        self.apply(self.end)
+
+
+class Repeat:
+    """每隔 interval 毫秒调用一次 fn(序号)，共 count 次；跳到结尾时不再调用"""
+
+    def __init__(self, count, interval, fn):
+        self.count = count
+        self.interval = interval
+        self.fn = fn
+        self.done = 0
+        self.elapsed = 0.0
+
+    def advance(self, ms):
+        self.elapsed += ms
+        while self.done < self.count and self.elapsed >= self.interval:
+            self.elapsed -= self.interval
+            self.fn(self.done)
+            self.done += 1
+        return self.elapsed if self.done >= self.count else None
+
+    def finish(self):
+        self.done = self.count
+
+
+class Pause(Repeat):
+    """等待 duration 毫秒"""
+
+    def __init__(self, duration):
+        super().__init__(1, duration, lambda _: None)
+
+
+class Call:
+    """调用一次 fn（不占用时间）"""
+
+    def __init__(self, fn, *args, **kwargs):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+
+    def advance(self, ms):
+        self.finish()
+        return ms
+
+    def finish(self):
+        self.fn(*self.args, **self.kwargs)
+
+
+class Sequence:
+    """依次播放各个步骤；上一步剩余的时间计入下一步"""
+
+    def __init__(self, *steps):
+        self.steps = list(steps)
+        self.index = 0
+
+    def advance(self, ms):
+        while self.index < len(self.steps):
+            ms = self.steps[self.index].advance(ms)
+            if ms is None:
+                return None
+            self.index += 1
+        return ms
+
+    def finish(self):
+        # 跳到结尾：每个剩余步骤只应用最终状态
+        while self.index < len(self.steps):
+            step = self.steps[self.index]
+            self.index += 1
+            step.finish()
+
+
+class Timeline:
+    """一组按帧推进的动画，只在有动画时调度下一帧"""
+
+    def __init__(self, root, frame_ms=FRAME_MS):
+        self.root = root
+        self.frame_ms = frame_ms
+        self._playing = {}  # {key: (动画, 结束回调)}；无 key 的动画以自身为键
+        self._frame_id = None
+        self._last = None
+        _timelines.add(self)
+
+    def play(self, animation, key=None, on_done=None):
+        """开始播放；同一 key 上的旧动画先跳到结尾。速度为 0 时直接跳到结尾"""
+        key = animation if key is None else key
+        self.finish(key)
+        if _speed == 0:
+            self._complete(animation, on_done)
+            return animation
+        self._playing[key] = (animation, on_done)
+        if self._frame_id is None:
+            self._last = time.perf_counter()
+            self._schedule()
+        return animation
+
+    def is_playing(self, key):
+        return key in self._playing
+
+    def finish(self, key):
+        """把 key 上的动画跳到结尾（没有时什么也不做）"""
+        entry = self._playing.pop(key, None)
+        if entry is not None:
+            self._complete(*entry)
+
+    def finish_all(self):
+        for key in list(self._playing):
+            self.finish(key)
+        self._stop()
+
+    def cancel_all(self):
+        """丢弃全部动画（不应用最终状态，用于组件即将销毁时）"""
+        self._playing.clear()
+        self._stop()
+
+    def _complete(self, animation, on_done):
+        try:
+            animation.finish()
+            if on_done is not None:
+                on_done()
+        except tk.TclError:
+            pass  # 组件已销毁
+
+    def _schedule(self):
+        try:
+            self._frame_id = self.root.after(self.frame_ms, self._frame)
+        except tk.TclError:
+            self._frame_id = None
+            self._playing.clear()
+
+    def _stop(self):
+        if self._frame_id is not None:
+            try:
+                self.root.after_cancel(self._frame_id)
+            except tk.TclError:
+                pass
+            self._frame_id = None
+
+    def _frame(self):
+        self._frame_id = None
+        now = time.perf_counter()
+        # 按实际经过的时间推进，帧迟到时动画不会变慢
+        ms = (now - self._last) * 1000 * _speed
+        self._last = now
+        for key, (animation, on_done) in list(self._playing.items()):
+            if self._playing.get(key, (None,))[0] is not animation:
+                continue  # 已被本帧中的回调替换或结束
+            try:
+                if animation.advance(ms) is None:
+                    continue
+                self._playing.pop(key, None)
+                if on_done is not None:
+                    on_done()
+            except tk.TclError:
+                self._playing.pop(key, None)
+        # 回调中 play 的新动画可能已经安排了下一帧
+        if self._playing and self._frame_id is None:
+            self._schedule()
+
+
+def speed():
+    return _speed
+
+
+def set_speed(value):
+    """设置全局动画速度倍率（1 为正常，0 为立即完成）；设为 0 时正在播放的动画直接跳到结尾"""
+    global _speed
+    _speed = max(0.0, float(value))
+    if _speed == 0:
+        for timeline in list(_timelines):
+            timeline.finish_all()
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""基于 Fenwick 树（树状数组）的整数权重抽样器。
+
+抽样、改权重、启用/禁用均为 O(log n)。抽样语义与原 weighted_choice 完全一致：
+r = rng.randint(1, total)，按插入顺序累加权重，返回第一个累计值 >= r 的键；
+权重为 0 的键视为禁用，不会被抽中。
+"""
+import random
+
+
+class WeightedSampler:
+    """可增量更新的加权抽样器"""
+
+    def __init__(self, keys=(), weights=None):
+        self.keys = []
+        self.slots = {}  # {key: 1-based 下标}
+        self.weights = [0]  # 下标 0 占位
+        self.tree = [0]
+        keys = list(keys)
+        weights = [1] * len(keys) if weights is None else list(weights)
+        for key, weight in zip(keys, weights):
+            self.keys.append(key)
+            self.slots[key] = len(self.keys)
+            self.weights.append(int(weight))
+            self.tree.append(int(weight))
+        # O(n) 建树
+        n = len(self.keys)
+        for i in range(1, n + 1):
+            parent = i + (i & -i)
+            if parent <= n:
+                self.tree[parent] += self.tree[i]
+        self.total = sum(self.weights)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, key):
+        return key in self.slots
+
+    def _prefix(self, i):
+        s = 0
+        tree = self.tree
+        while i > 0:
+            s += tree[i]
+            i -= i & -i
+        return s
+
+    def add(self, key, weight=0):
+        """在末尾追加一个键"""
+        if key in self.slots:
+            self.set_weight(key, weight)
+            return
+        self.keys.append(key)
+        i = len(self.keys)
+        self.slots[key] = i
+        self.weights.append(0)
+        # 新节点覆盖 (i - lowbit(i), i]，其中已有的部分和可由前缀和求出
+        self.tree.append(self._prefix(i - 1) - self._prefix(i - (i & -i)))
+        self.set_weight(key, weight)
+
+    def weight(self, key):
+        return self.weights[self.slots[key]]
+
+    def set_weight(self, key, weight):
+        i = self.slots[key]
+        delta = int(weight) - self.weights[i]
+        if not delta:
+            return
+        self.weights[i] += delta
+        self.total += delta
+        tree = self.tree
+        n = len(self.keys)
+        while i <= n:
+            tree[i] += delta
+            i += i & -i
+
+    def disable(self, key):
+        self.set_weight(key, 0)
+
+    def find(self, r):
+        """返回累计权重首次 >= r 的键（1 <= r <= total）"""
+        tree = self.tree
+        n = len(self.keys)
+        pos = 0
+        step = 1 << n.bit_length()
+        while step:
+            nxt = pos + step
+            if nxt <= n and tree[nxt] < r:
+                pos = nxt
+                r -= tree[nxt]
+            step >>= 1
+        return self.keys[pos]
+
+    def sample(self, rng=random):
+        """按权重抽取一个键；全部禁用时返回 None"""
+        if self.total <= 0:
+            return None
+        return self.find(rng.randint(1, self.total))